@@ -1,6 +1,7 @@
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
+from pytabkit.bench.data.paths import Paths
 from pytabkit.bench.data.tasks import TaskPackage, TaskInfo
 from pytabkit.bench.run.results import ResultManager
 from pytabkit.models.training.logging import Logger
@@ -43,11 +44,12 @@ class AlgWrapper:
         """
         raise NotImplementedError()
 
-    def get_max_n_vectorized(self, task_info: TaskInfo) -> int:
+    def get_max_n_vectorized(self, task_info: TaskInfo, paths: Optional[Paths] = None) -> int:
         """
         Returns 1 by default, should be overridden in subclasses if they benefit from vectorization.
 
         :param task_info: Information about the task that this method should run on.
+        :param paths: Path configuration (optional). Can be used to load the task or to cache information about it.
         :return: Maximum number of train/test splits that this method can be run on at once.
         """
         return 1
@@ -13,6 +13,7 @@ from pytabkit.models.alg_interfaces.ensemble_interfaces import PrecomputedPredic
 from pytabkit.models.alg_interfaces.lightgbm_interfaces import LGBMSubSplitInterface, LGBMHyperoptAlgInterface, \
     LGBMSklearnSubSplitInterface, RandomParamsLGBMAlgInterface
 from pytabkit.bench.alg_wrappers.general import AlgWrapper
+from pytabkit.bench.alg_wrappers.vectorization_tuning import VectorizationTuner
 from pytabkit.bench.data.tasks import TaskPackage, TaskInfo
 from pytabkit.bench.run.results import ResultManager
 from pytabkit.models.alg_interfaces.other_interfaces import RFSubSplitInterface, SklearnMLPSubSplitInterface, \
@@ -94,7 +95,8 @@ class AlgInterfaceWrapper(AlgWrapper):
 
     def run(self, task_package: TaskPackage, logger: Logger, assigned_resources: NodeResources,
             tmp_folders: List[Path]) -> List[ResultManager]:
-        task = task_package.task_info.load_task(task_package.paths)
+        # with mmap_task=True, concurrent jobs on the same task share the page cache instead of copying the data
+        task = task_package.task_info.load_task(task_package.paths, mmap=self.config.get('mmap_task', False))
         task_desc = task_package.task_info.task_desc
         n_cv = task_package.n_cv
         n_refit = task_package.n_refit
@@ -113,7 +115,12 @@ class AlgInterfaceWrapper(AlgWrapper):
         cv_idxs_list = []
         refit_idxs_list = []
 
-        rms = [ResultManager() for split_info in task_package.split_infos]
+        y_pred_format = task_package.y_pred_format
+        if y_pred_format == 'uint8' and not ds.tensor_infos['y'].is_cat():
+            # quantized probabilities are only possible for classification,
+            # and float16 could overflow or lose too much precision for regression targets
+            y_pred_format = 'float32'
+        rms = [ResultManager(y_pred_format=y_pred_format) for split_info in task_package.split_infos]
 
         if len(rms) == 1:
             logger.log(1,
@@ -219,7 +226,8 @@ class CaruanaEnsembleWrapper(AlgInterfaceWrapper):
             for sub_wrapper in self.sub_wrappers:
                 sub_tp = TaskPackage(task_info=task_package.task_info, split_infos=[split_info], n_cv=task_package.n_cv,
                                      n_refit=task_package.n_refit, paths=task_package.paths, rerun=task_package.rerun,
-                                     alg_name=task_package.alg_name, save_y_pred=task_package.save_y_pred)
+                                     alg_name=task_package.alg_name, save_y_pred=task_package.save_y_pred,
+                                     y_pred_format=task_package.y_pred_format)
                 single_alg_interfaces.append(sub_wrapper.create_alg_interface(sub_tp))
             single_split_alg_interfaces.append(CaruanaEnsembleAlgInterface(single_alg_interfaces, **self.config))
         return MultiSplitWrapperAlgInterface(single_split_alg_interfaces)
@@ -242,7 +250,8 @@ class AlgorithmSelectionWrapper(AlgInterfaceWrapper):
             for sub_wrapper in self.sub_wrappers:
                 sub_tp = TaskPackage(task_info=task_package.task_info, split_infos=[split_info], n_cv=task_package.n_cv,
                                      n_refit=task_package.n_refit, paths=task_package.paths, rerun=task_package.rerun,
-                                     alg_name=task_package.alg_name, save_y_pred=task_package.save_y_pred)
+                                     alg_name=task_package.alg_name, save_y_pred=task_package.save_y_pred,
+                                     y_pred_format=task_package.y_pred_format)
                 single_alg_interfaces.append(sub_wrapper.create_alg_interface(sub_tp))
             single_split_alg_interfaces.append(AlgorithmSelectionAlgInterface(single_alg_interfaces, **self.config))
         return MultiSplitWrapperAlgInterface(single_split_alg_interfaces)
@@ -291,7 +300,10 @@ class NNInterfaceWrapper(AlgInterfaceWrapper):
     def __init__(self, **config):
         super().__init__(NNAlgInterface, **config)
 
-    def get_max_n_vectorized(self, task_info: TaskInfo) -> int:
+    def get_max_n_vectorized(self, task_info: TaskInfo, paths: Optional[Paths] = None) -> int:
+        if paths is not None and self.config.get('auto_tune_n_vectorized', False):
+            # calibrate with the plain NN since the widths do not depend on the hyperparameter search
+            return VectorizationTuner(paths, NNAlgInterface, self.config).get_max_n_vectorized(task_info)
         ds = DictDataset(tensors=None, tensor_infos=task_info.tensor_infos, device='cpu',
                          n_samples=task_info.n_samples)
         max_ram_gb = 8.0
@@ -311,7 +323,10 @@ class NNHyperoptInterfaceWrapper(AlgInterfaceWrapper):
     def __init__(self, **config):
         super().__init__(NNHyperoptAlgInterface, **config)
 
-    def get_max_n_vectorized(self, task_info: TaskInfo) -> int:
+    def get_max_n_vectorized(self, task_info: TaskInfo, paths: Optional[Paths] = None) -> int:
+        if paths is not None and self.config.get('auto_tune_n_vectorized', False):
+            # calibrate with the plain NN since the widths do not depend on the hyperparameter search
+            return VectorizationTuner(paths, NNAlgInterface, self.config).get_max_n_vectorized(task_info)
         ds = DictDataset(tensors=None, tensor_infos=task_info.tensor_infos, device='cpu',
                          n_samples=task_info.n_samples)
         max_ram_gb = 8.0
@@ -0,0 +1,241 @@
+import hashlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import psutil
+import scipy.optimize
+import torch
+
+from pytabkit.bench.data.paths import Paths
+from pytabkit.bench.data.tasks import TaskInfo
+from pytabkit.models import utils
+from pytabkit.models.alg_interfaces.alg_interfaces import AlgInterface
+from pytabkit.models.alg_interfaces.base import SplitIdxs, InterfaceResources
+from pytabkit.models.data.data import DictDataset
+from pytabkit.models.torch_utils import seeded_randperm
+from pytabkit.models.training.logging import StdoutLogger
+
+
+class PeakRAMMonitor:
+    """
+    Context manager that measures the peak memory usage (in GB) relative to the usage when entering it.
+    On CUDA devices, the statistics of the PyTorch allocator are used,
+    on the CPU, the resident set size of the process is sampled in a background thread.
+    Since the resident set size rarely decreases after memory has been freed,
+    measurements on the CPU are only meaningful for the first large allocation in a process.
+    """
+    def __init__(self, device: str, sampling_interval_s: float = 0.005):
+        self.device = device
+        self.sampling_interval_s = sampling_interval_s
+        self.peak_ram_gb = 0.0
+
+    def __enter__(self) -> 'PeakRAMMonitor':
+        if self.device.startswith('cuda'):
+            torch.cuda.synchronize(self.device)
+            torch.cuda.reset_peak_memory_stats(self.device)
+            self.start_bytes = torch.cuda.memory_allocated(self.device)
+        else:
+            self.process = psutil.Process()
+            self.start_bytes = self.process.memory_info().rss
+            self.peak_bytes = self.start_bytes
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(target=self._sample_rss, daemon=True)
+            self.thread.start()
+        return self
+
+    def _sample_rss(self):
+        while not self.stop_event.wait(self.sampling_interval_s):
+            self.peak_bytes = max(self.peak_bytes, self.process.memory_info().rss)
+
+    def __exit__(self, type, value, traceback):
+        if self.device.startswith('cuda'):
+            torch.cuda.synchronize(self.device)
+            peak_bytes = torch.cuda.max_memory_allocated(self.device)
+        else:
+            self.stop_event.set()
+            self.thread.join()
+            peak_bytes = max(self.peak_bytes, self.process.memory_info().rss)
+        self.peak_ram_gb = max(0, peak_bytes - self.start_bytes) / (1024 ** 3)
+
+
+def _run_calibration_fit(tuner: 'VectorizationTuner', warm_up_ds: DictDataset, ds: DictDataset,
+                         width: int) -> Tuple[float, float]:
+    # runs in a fresh process for each measurement on the CPU, see VectorizationTuner.measure_fit()
+    tuner.device = 'cpu'
+    tuner._fit(warm_up_ds, width=1, seed=0)
+    return tuner.measure_fit(ds, width)
+
+
+class VectorizationTuner:
+    """
+    Chooses the number of vectorized models (max_n_vectorized) for NN methods from measurements
+    instead of the static estimates in get_required_resources().
+    Short calibration fits are run on subsamples of the task for several vectorization widths
+    (powers of two up to max_n_vectorized, and max_n_vectorized itself).
+    For each fit, the peak memory and the throughput (trained samples per second, summed over all models) are measured.
+    The peak memory is modeled as c_0 + c_1 * n_samples + c_2 * width + c_3 * width * n_samples
+    with non-negative coefficients fitted to the measurements at two subsample sizes.
+    The selected width is the one with the highest measured throughput
+    whose extrapolated peak memory on the full task fits into the memory budget.
+    The measurements are cached in paths.vectorization_tuning() per task-shape signature
+    (n_samples bucket, feature and category sizes, number of classes, device, and configuration),
+    so tasks of similar shape only need to be calibrated once.
+    On the CPU, each calibration fit runs in a fresh subprocess, such that memory retained by earlier fits
+    does not hide the memory usage of later fits. This adds a few seconds of startup time per fit.
+    The calibration runs synchronously in the calling process, i.e., in TabBenchJobManager.add_jobs()
+    on the driver and not as a scheduled job, and it only uses cuda:0 (or the CPU if no GPU is used).
+    """
+    def __init__(self, paths: Paths, create_alg_interface_fn: Callable[..., AlgInterface], config: Dict[str, Any]):
+        """
+        :param paths: Path configuration, used for loading the task and for caching the measurements.
+        :param create_alg_interface_fn: Function creating the (vectorized) AlgInterface from the configuration.
+        :param config: Configuration of the method. The following keys configure the tuning:
+            max_n_vectorized (maximum width, default 50),
+            auto_tune_max_ram_gb (memory budget, defaults to the total memory of the GPU
+            or the currently available CPU memory),
+            auto_tune_ram_safety_factor (factor applied to the extrapolated memory, default 1.2),
+            auto_tune_n_samples (size of the larger calibration subsample, default 2048),
+            auto_tune_n_epochs (number of epochs of each calibration fit, default 1).
+        """
+        self.paths = paths
+        self.create_alg_interface_fn = create_alg_interface_fn
+        self.config = config
+        self.max_n_vectorized = config.get('max_n_vectorized', 50)
+        use_gpu = config.get('use_gpu', True) and torch.cuda.is_available()
+        self.device = 'cuda:0' if use_gpu else 'cpu'
+
+    def get_widths(self) -> List[int]:
+        widths = [2 ** i for i in range(int(np.log2(self.max_n_vectorized)) + 1)]
+        return widths if widths[-1] == self.max_n_vectorized else widths + [self.max_n_vectorized]
+
+    def get_signature(self, task_info: TaskInfo) -> str:
+        cat_sizes = task_info.tensor_infos['x_cat'].get_cat_sizes().tolist()
+        shape_info = {'n_samples_bucket': int(np.ceil(np.log2(max(task_info.n_samples, 1)))),
+                      'n_cont': task_info.tensor_infos['x_cont'].get_n_features(),
+                      'cat_size_buckets': sorted(int(np.ceil(np.log2(cat_size))) for cat_size in cat_sizes),
+                      'n_classes': task_info.get_n_classes(),
+                      'device': torch.cuda.get_device_name(self.device) if self.device != 'cpu' else 'cpu',
+                      # the memory budget is only used when selecting the width, not for the measurements
+                      'config': sorted((key, str(value)) for key, value in self.config.items()
+                                       if key not in ['auto_tune_max_ram_gb', 'auto_tune_ram_safety_factor'])}
+        return hashlib.sha256(str(shape_info).encode('utf-8')).hexdigest()[:20]
+
+    def get_max_ram_gb(self) -> float:
+        max_ram_gb = self.config.get('auto_tune_max_ram_gb', None)
+        if max_ram_gb is not None:
+            return max_ram_gb
+        if self.device != 'cpu':
+            return torch.cuda.get_device_properties(self.device).total_memory / (1024 ** 3)
+        return psutil.virtual_memory().available / (1024 ** 3)
+
+    def _fit(self, ds: DictDataset, width: int, seed: int) -> None:
+        n_train = int(0.8 * ds.n_samples)
+        perms = [seeded_randperm(ds.n_samples, 'cpu', seed + i) for i in range(width)]
+        idxs_list = [SplitIdxs(train_idxs=perm[None, :n_train], val_idxs=perm[None, n_train:], test_idxs=None,
+                               split_seed=seed + i, sub_split_seeds=[seed + i], split_id=i)
+                     for i, perm in enumerate(perms)]
+        config = utils.join_dicts(self.config, {'n_epochs': self.config.get('auto_tune_n_epochs', 1)})
+        alg_interface = self.create_alg_interface_fn(**config)
+        alg_interface.fit(ds, idxs_list, InterfaceResources(n_threads=1, gpu_devices=[self.device]
+                                                            if self.device != 'cpu' else []),
+                          StdoutLogger(verbosity_level=0), [None] * width, 'vectorization tuning')
+
+    def measure_fit(self, ds: DictDataset, width: int) -> Tuple[float, float]:
+        """
+        Runs a calibration fit in the current process.
+
+        :param ds: Dataset to fit on.
+        :param width: Number of vectorized models.
+        :return: Peak memory in GB and time in seconds of the fit.
+        """
+        start_time = time.time()
+        with PeakRAMMonitor(self.device) as monitor:
+            self._fit(ds, width=width, seed=0)
+        return monitor.peak_ram_gb, time.time() - start_time
+
+    def _measure_fit_in_subprocess(self, warm_up_ds: DictDataset, ds: DictDataset, width: int) -> Tuple[float, float]:
+        # the subsamples are small, so they can be sent to the subprocess
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            return executor.submit(_run_calibration_fit, self, warm_up_ds.to('cpu'), ds.to('cpu'), width).result()
+
+    def calibrate(self, task_info: TaskInfo) -> Dict[str, List]:
+        """
+        Runs the calibration fits on subsamples of the given task.
+
+        :param task_info: Information about the task.
+        :return: Dictionary with the lists 'widths', 'n_samples', 'peak_ram_gb' and 'samples_per_second',
+            containing one entry per calibration fit.
+        """
+        ds = task_info.load_task(self.paths, mmap=True).ds
+        n_large = min(task_info.n_samples, self.config.get('auto_tune_n_samples', 2048))
+        perm = seeded_randperm(task_info.n_samples, 'cpu', 0)
+        n_epochs = self.config.get('auto_tune_n_epochs', 1)
+
+        # warm-up fit such that one-time initialization costs are not attributed to the first width
+        warm_up_ds = ds.get_sub_dataset(perm[:n_large // 4].sort()[0])
+        if self.device != 'cpu':
+            self._fit(warm_up_ds, width=1, seed=0)
+
+        results = {'widths': [], 'n_samples': [], 'peak_ram_gb': [], 'samples_per_second': []}
+        for n_samples in [n_large // 4, n_large]:
+            sub_ds = ds.get_sub_dataset(perm[:n_samples].sort()[0])
+            for width in self.get_widths():
+                if self.device == 'cpu':
+                    peak_ram_gb, fit_time = self._measure_fit_in_subprocess(warm_up_ds, sub_ds, width)
+                else:
+                    peak_ram_gb, fit_time = self.measure_fit(sub_ds, width)
+                results['widths'].append(width)
+                results['n_samples'].append(n_samples)
+                results['peak_ram_gb'].append(peak_ram_gb)
+                results['samples_per_second'].append(width * int(0.8 * n_samples) * n_epochs / fit_time)
+        return results
+
+    def select_width(self, task_info: TaskInfo, results: Dict[str, List]) -> int:
+        """
+        Selects the width from calibration results.
+
+        :param task_info: Information about the task.
+        :param results: Results of calibrate().
+        :return: Width with the best measured throughput (on the larger subsample)
+            among the widths that are expected to fit into the memory budget.
+        """
+        widths = np.asarray(results['widths'], dtype=np.float64)
+        n_samples = np.asarray(results['n_samples'], dtype=np.float64)
+        features = np.stack([np.ones_like(widths), n_samples, widths, widths * n_samples], axis=1)
+        # non-negative coefficients, since measurement noise could otherwise produce decreasing memory estimates
+        coefs, _ = scipy.optimize.nnls(features, np.asarray(results['peak_ram_gb'], dtype=np.float64))
+
+        max_ram_gb = self.get_max_ram_gb()
+        # on the CPU, the full task is held in RAM by the process as well
+        ds_ram_gb = task_info.get_ds_size_gb() if self.device == 'cpu' else 0.0
+        safety_factor = self.config.get('auto_tune_ram_safety_factor', 1.2)
+
+        best_width, best_samples_per_second = 1, 0.0
+        max_n_samples = np.max(n_samples)
+        for width, n, samples_per_second in zip(results['widths'], n_samples, results['samples_per_second']):
+            if n != max_n_samples:
+                continue
+            ram_gb = ds_ram_gb + safety_factor * coefs.dot([1.0, task_info.n_samples, width,
+                                                            width * task_info.n_samples])
+            if ram_gb <= max_ram_gb and samples_per_second > best_samples_per_second:
+                best_width, best_samples_per_second = width, samples_per_second
+        return best_width
+
+    def get_max_n_vectorized(self, task_info: TaskInfo) -> int:
+        """
+        :param task_info: Information about the task.
+        :return: Tuned max_n_vectorized, using cached calibration results for the task signature if available.
+        """
+        if self.max_n_vectorized <= 1:
+            return 1
+        cache_file = self.paths.vectorization_tuning() / f'{self.get_signature(task_info)}.yaml'
+        if utils.existsFile(cache_file):
+            results = utils.deserialize(cache_file, use_yaml=True)
+        else:
+            results = self.calibrate(task_info)
+            utils.serialize(cache_file, results, use_yaml=True)
+        return self.select_width(task_info, results)
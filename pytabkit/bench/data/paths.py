@@ -82,6 +82,9 @@ class Paths:
     def result_summaries(self) -> Path:
         return self.result_summaries_path
 
+    def result_store(self) -> Path:
+        return self.base() / 'result_store.sqlite3'
+
     def eval(self) -> Path:
         return self.base() / 'eval'
 
@@ -100,6 +103,12 @@ class Paths:
     def times(self) -> Path:
         return self.base() / 'times'
 
+    def vectorization_tuning(self) -> Path:
+        return self.base() / 'vectorization_tuning'
+
+    def resource_feedback(self) -> Path:
+        return self.base() / 'resource_feedback'
+
     def new_tmp_folder(self) -> TmpPathContextManager:
         # https://stackoverflow.com/questions/2759644/python-multiprocessing-doesnt-play-nicely-with-uuid-uuid4
         return TmpPathContextManager(self.tmp() / str(uuid.UUID(bytes=os.urandom(16), version=4)))
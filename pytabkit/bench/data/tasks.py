@@ -44,14 +44,15 @@ class TaskDescription:
         """
         return TaskInfo.load(paths, self)
 
-    def load_task(self, paths: Paths):
+    def load_task(self, paths: Paths, mmap: bool = False):
         """
         Load the associated Task object.
 
         :param paths: Path configuration.
+        :param mmap: Whether to memory-map the data (see TaskInfo.load_task()).
         :return: Task object.
         """
-        return self.load_info(paths).load_task(paths)
+        return self.load_info(paths).load_task(paths, mmap=mmap)
 
     def exists_task(self, paths: Paths):
         """
@@ -170,18 +171,31 @@ class TaskInfo:
         """
         return self.tensor_infos['y'].get_cat_size_product()   # we take the product, but it should only be 1 element
 
-    def load_task(self, paths: Paths) -> 'Task':
+    def load_task(self, paths: Paths, mmap: bool = False) -> 'Task':
         """
         Load the associated task.
         :param paths: Path configuration.
+        :param mmap: If True, the arrays are memory-mapped (copy-on-write) instead of being read into memory,
+            and x_cat is kept in its stored int32 dtype.
+            Rows are then only read when they are gathered (e.g. in DictDataset.get_sub_dataset()),
+            and multiple processes loading the same task share the page cache instead of holding private copies.
         :return: Task object.
         """
         path = paths.tasks_task(self.task_desc)
         tensors = {}
-        tensors['x_cont'] = torch.as_tensor(np.load(str(path / 'x_cont.npy'))).type(torch.float32)
-        tensors['x_cat'] = torch.as_tensor(np.load(str(path / 'x_cat.npy'))).type(torch.long)
-        tensors['y'] = torch.as_tensor(np.load(str(path / 'y.npy'))).type(
-            torch.long if self.task_type == TaskType.CLASSIFICATION else torch.float32)
+        if mmap:
+            # mmap_mode='c' gives writable arrays (as required by torch.from_numpy())
+            # whose pages are only copied if they are written to
+            tensors['x_cont'] = torch.from_numpy(np.load(str(path / 'x_cont.npy'), mmap_mode='c'))
+            tensors['x_cat'] = torch.from_numpy(np.load(str(path / 'x_cat.npy'), mmap_mode='c'))
+            y = torch.from_numpy(np.load(str(path / 'y.npy'), mmap_mode='c'))
+            # y is small, so we convert it to the dtype used by the metrics
+            tensors['y'] = y.type(torch.long) if self.task_type == TaskType.CLASSIFICATION else y
+        else:
+            tensors['x_cont'] = torch.as_tensor(np.load(str(path / 'x_cont.npy'))).type(torch.float32)
+            tensors['x_cat'] = torch.as_tensor(np.load(str(path / 'x_cat.npy'))).type(torch.long)
+            tensors['y'] = torch.as_tensor(np.load(str(path / 'y.npy'))).type(
+                torch.long if self.task_type == TaskType.CLASSIFICATION else torch.float32)
         ds = DictDataset(tensors=tensors, tensor_infos=self.tensor_infos)
         return Task(task_info=self, ds=ds)
 
@@ -258,7 +272,7 @@ class TaskPackage:
     Combines information about how to run a task on a benchmark.
     """
     def __init__(self, task_info: TaskInfo, split_infos: List[SplitInfo], n_cv: int, n_refit: int, paths: Paths,
-                 rerun: bool, alg_name: str, save_y_pred: bool):
+                 rerun: bool, alg_name: str, save_y_pred: bool, y_pred_format: str = 'float32'):
         self.task_info = task_info
         self.split_infos = split_infos
         self.n_cv = n_cv
@@ -267,6 +281,7 @@ class TaskPackage:
         self.rerun = rerun
         self.alg_name = alg_name
         self.save_y_pred = save_y_pred
+        self.y_pred_format = y_pred_format
 
 
 
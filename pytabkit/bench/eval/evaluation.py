@@ -6,6 +6,7 @@ import numpy as np
 from pytabkit.bench.data.common import SplitType
 from pytabkit.bench.data.paths import Paths
 from pytabkit.bench.data.tasks import TaskCollection, TaskInfo
+from pytabkit.bench.run.result_store import ResultStore
 from pytabkit.models import utils
 from pytabkit.models.training.metrics import Metrics
 
@@ -269,12 +270,18 @@ class MultiResultsTable:
 
     @staticmethod
     def load(task_collection: TaskCollection, n_cv: int, paths: Paths, alg_filter: Optional[AlgFilter] = None,
-             split_type=SplitType.RANDOM, max_n_splits: Optional[int] = None):
-        # load only summaries (faster)
-        alg_names = [alg_path.name for alg_path in paths.result_summaries().iterdir()]
-        # now only keep algs where all tasks from task_collection have been evaluated
-        alg_names = [an for an in alg_names if np.all([utils.existsDir(paths.summary_alg_task(task_desc, an, n_cv))
-                                                       for task_desc in task_collection.task_descs])]
+             split_type=SplitType.RANDOM, max_n_splits: Optional[int] = None, use_result_store: bool = False):
+        # use_result_store: load from the ResultStore instead of the result summaries (faster for many algs/tasks)
+        if use_result_store:
+            result_store = ResultStore.from_paths(paths)
+            alg_names = result_store.get_complete_alg_names(task_collection.task_descs, n_cv=n_cv,
+                                                            split_type=split_type)
+        else:
+            # load only summaries (faster)
+            alg_names = [alg_path.name for alg_path in paths.result_summaries().iterdir()]
+            # now only keep algs where all tasks from task_collection have been evaluated
+            alg_names = [an for an in alg_names if np.all([utils.existsDir(paths.summary_alg_task(task_desc, an, n_cv))
+                                                           for task_desc in task_collection.task_descs])]
 
         print('computed alg names')
 
@@ -295,16 +302,23 @@ class MultiResultsTable:
 
         # val_metric_name = Metrics.default_metric_name(task_infos[0].task_type)
 
-        # indexed by
-        # [alg_idx][task_idx]['cv'/'refit']['train'/'val'/'test'][str(n_models)][str(start_idx)][metric_name][split_idx]
-        alg_task_results = [[utils.deserialize(paths.summary_alg_task(task_desc, alg_name, n_cv)
-                                               / f'metrics.msgpack.gz', use_msgpack=True, compressed=True)[split_type]
-                             for task_desc in task_collection.task_descs]
-                            for alg_name in alg_names]
-
-        # swap split_idx dimension to after task_idx, now indexed by
-        # [alg_idx][task_idx][split_idx]['cv'/'refit']['train'/'val'/'test'][str(n_models)][str(start_idx)][metric_name]
-        alg_task_results = utils.shift_dim_nested(alg_task_results, 7, 2)
+        if use_result_store:
+            # indexed by
+            # [alg_idx][task_idx][split_idx]['cv'/'refit']['train'/'val'/'test'][str(n_models)][str(start_idx)][metric_name]
+            df = result_store.load_df(n_cv=n_cv, split_type=split_type, alg_names=alg_names,
+                                      task_descs=task_collection.task_descs)
+            alg_task_results = ResultStore.to_nested(df, alg_names, task_collection.task_descs)
+        else:
+            # indexed by
+            # [alg_idx][task_idx]['cv'/'refit']['train'/'val'/'test'][str(n_models)][str(start_idx)][metric_name][split_idx]
+            alg_task_results = [[utils.deserialize(paths.summary_alg_task(task_desc, alg_name, n_cv)
+                                                   / f'metrics.msgpack.gz', use_msgpack=True, compressed=True)[split_type]
+                                 for task_desc in task_collection.task_descs]
+                                for alg_name in alg_names]
+
+            # swap split_idx dimension to after task_idx, now indexed by
+            # [alg_idx][task_idx][split_idx]['cv'/'refit']['train'/'val'/'test'][str(n_models)][str(start_idx)][metric_name]
+            alg_task_results = utils.shift_dim_nested(alg_task_results, 7, 2)
 
         if max_n_splits is not None and max_n_splits >= 1:
             alg_task_results = utils.map_nested(alg_task_results,
@@ -0,0 +1,212 @@
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import pandas as pd
+
+from pytabkit.bench.data.paths import Paths
+from pytabkit.bench.data.tasks import TaskDescription, TaskInfo
+from pytabkit.models import utils
+
+
+class ResultStore:
+    """
+    Stores the metrics of all runs in a single SQLite database, with one row per
+    (alg_name, task, n_cv, split, cv/refit, train/val/test, n_models, start_idx, metric_name).
+    In contrast to the per-split metrics.yaml files written by ResultManager,
+    results can be appended incrementally and atomically by concurrently running jobs,
+    and evaluation queries can be answered by scanning a single indexed table.
+    SQLite relies on file locks, which are unreliable on many network file systems (e.g., NFS).
+    If the results are written by jobs on different machines to a shared file system,
+    the store should therefore be disabled (see TabBenchJobManager(use_result_store=False))
+    and the results should be loaded from the files written by ResultManager, which is the default.
+    """
+    # names of the nesting levels of ResultManager.metrics_dict
+    metric_key_columns = ['cv_refit', 'data_part', 'n_models', 'start_idx', 'metric_name']
+    key_columns = ['alg_name', 'task_source', 'task_name', 'n_cv', 'split_type', 'split_id'] + metric_key_columns
+
+    def __init__(self, db_path: Path, timeout: float = 600.0):
+        """
+        :param db_path: Path of the database file. It will be created if it does not exist yet.
+        :param timeout: Time in seconds to wait for locks held by other processes.
+        """
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        utils.ensureDir(self.db_path)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS metrics (alg_name TEXT, task_source TEXT, task_name TEXT, '
+                         'n_cv INTEGER, split_type TEXT, split_id INTEGER, cv_refit TEXT, data_part TEXT, '
+                         'n_models TEXT, start_idx TEXT, metric_name TEXT, value REAL, '
+                         f'PRIMARY KEY ({", ".join(self.key_columns)}))')
+            # for queries that only select some metrics of a task collection
+            conn.execute('CREATE INDEX IF NOT EXISTS metrics_by_metric_name '
+                         'ON metrics (metric_name, n_cv, split_type, task_source, task_name)')
+
+    @staticmethod
+    def from_paths(paths: Paths) -> 'ResultStore':
+        return ResultStore(paths.result_store())
+
+    @contextmanager
+    def _connect(self):
+        # commits (or rolls back) the transaction and closes the connection afterward
+        conn = sqlite3.connect(str(self.db_path), timeout=self.timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _create_task_table(conn: sqlite3.Connection, task_descs: List[TaskDescription]) -> None:
+        # temporary table with the given tasks, such that queries can filter the tasks by a join
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS selected_tasks (task_source TEXT, task_name TEXT, '
+                     'PRIMARY KEY (task_source, task_name))')
+        conn.execute('DELETE FROM selected_tasks')
+        conn.executemany('INSERT OR IGNORE INTO selected_tasks VALUES (?, ?)',
+                         [(td.task_source, td.task_name) for td in task_descs])
+
+    @staticmethod
+    def _flatten_metrics(metrics_dict: Dict, prefix: Tuple = ()) -> Iterable[Tuple]:
+        for key, value in metrics_dict.items():
+            if isinstance(value, dict):
+                yield from ResultStore._flatten_metrics(value, prefix + (str(key),))
+            else:
+                yield prefix + (str(key), float(value))
+
+    def add_metrics(self, alg_name: str, task_desc: TaskDescription, n_cv: int, split_type: str, split_id: int,
+                    metrics_dict: Dict) -> None:
+        """
+        Adds the metrics of a single run. This is done in a single transaction,
+        so other processes see either all or none of the new rows.
+        Existing results for the same keys are overwritten.
+
+        :param alg_name: Name of the method.
+        :param task_desc: Task description.
+        :param n_cv: Number of cross-validation splits.
+        :param split_type: Split type.
+        :param split_id: Index of the trainval-test split.
+        :param metrics_dict: Metrics, in the format of ResultManager.metrics_dict, i.e.,
+            metrics_dict['cv'/'refit']['train'/'val'/'test'][str(n_models)][str(start_idx)][metric_name] = float
+        """
+        prefix = (alg_name, task_desc.task_source, task_desc.task_name, n_cv, split_type, split_id)
+        rows = [prefix + row for row in self._flatten_metrics(metrics_dict)]
+        if len(rows) == 0:
+            return
+        for row in rows:
+            if len(row) != len(self.key_columns) + 1:
+                raise ValueError(f'metrics_dict has the wrong nesting depth, got row {row}')
+        with self._connect() as conn:
+            conn.executemany(f'INSERT OR REPLACE INTO metrics VALUES ({", ".join(["?"] * len(rows[0]))})', rows)
+
+    def import_results(self, paths: Paths, task_infos: List[TaskInfo], alg_name: str, n_cv: int) -> None:
+        """
+        Imports results that have been saved by ResultManager.save() into the store,
+        e.g., results that were computed before the store was used.
+
+        :param paths: Path configuration.
+        :param task_infos: Task infos of tasks whose results should be imported.
+        :param alg_name: Name of the method.
+        :param n_cv: Number of cross-validation splits.
+        """
+        # imported here to avoid a circular import
+        from pytabkit.bench.run.results import ResultManager
+
+        for task_info in task_infos:
+            task_desc = task_info.task_desc
+            src_path = paths.results_alg_task(task_desc, alg_name, n_cv)
+            if not utils.existsDir(src_path):
+                continue
+            for split_type_path in src_path.iterdir():
+                split_id = 0
+                while utils.existsDir(split_type_path / str(split_id)):
+                    rm = ResultManager.load(split_type_path / str(split_id), only_metrics=True)
+                    self.add_metrics(alg_name, task_desc, n_cv, split_type_path.name, split_id, rm.metrics_dict)
+                    split_id += 1
+
+    def load_df(self, n_cv: Optional[int] = None, split_type: Optional[str] = None,
+                alg_names: Optional[List[str]] = None, task_descs: Optional[List[TaskDescription]] = None,
+                metric_names: Optional[List[str]] = None, **filters: Any) -> pd.DataFrame:
+        """
+        Loads the matching rows as a DataFrame with the columns in self.key_columns and a 'value' column.
+        All filter arguments that are None are ignored.
+
+        :param n_cv: Number of cross-validation splits.
+        :param split_type: Split type.
+        :param alg_names: Names of the methods.
+        :param task_descs: Task descriptions.
+        :param metric_names: Names of the metrics.
+        :param filters: Filters for other columns, e.g., cv_refit='cv' or data_part='test'.
+        :return: DataFrame with the matching rows.
+        """
+        conditions = []
+        params = []
+        for name, value in utils.join_dicts(dict(n_cv=n_cv, split_type=split_type), filters).items():
+            if name not in self.key_columns:
+                raise ValueError(f'Unknown column "{name}"')
+            if value is not None:
+                conditions.append(f'{name} = ?')
+                params.append(value)
+        for name, values in [('alg_name', alg_names), ('metric_name', metric_names)]:
+            if values is not None:
+                conditions.append(f'{name} IN ({", ".join(["?"] * len(values))})')
+                params.extend(values)
+        query = 'SELECT metrics.* FROM metrics'
+        if task_descs is not None:
+            query += ' JOIN selected_tasks USING (task_source, task_name)'
+        if len(conditions) > 0:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        with self._connect() as conn:
+            if task_descs is not None:
+                self._create_task_table(conn, task_descs)
+            return pd.read_sql_query(query, conn, params=params)
+
+    def get_complete_alg_names(self, task_descs: List[TaskDescription], n_cv: int, split_type: str) -> List[str]:
+        """
+        :return: Names of all methods that have results on all the given tasks.
+        """
+        n_tasks = len({(td.task_source, td.task_name) for td in task_descs})
+        with self._connect() as conn:
+            self._create_task_table(conn, task_descs)
+            rows = conn.execute('SELECT alg_name FROM (SELECT DISTINCT alg_name, task_source, task_name FROM metrics '
+                                'JOIN selected_tasks USING (task_source, task_name) '
+                                'WHERE n_cv = ? AND split_type = ?) GROUP BY alg_name HAVING COUNT(*) = ? '
+                                'ORDER BY alg_name', (n_cv, split_type, n_tasks)).fetchall()
+        return [row[0] for row in rows]
+
+    def get_split_table(self, metric_name: str, n_cv: int, split_type: str, cv_refit: str = 'cv',
+                        data_part: str = 'test', n_models: str = '1', start_idx: str = '0') -> pd.DataFrame:
+        """
+        Vectorized query for a single result per split.
+
+        :return: DataFrame indexed by (alg_name, task_source, task_name) with one column per split_id.
+        """
+        df = self.load_df(n_cv=n_cv, split_type=split_type, metric_names=[metric_name], cv_refit=cv_refit,
+                          data_part=data_part, n_models=n_models, start_idx=start_idx)
+        return df.pivot_table(index=['alg_name', 'task_source', 'task_name'], columns='split_id', values='value')
+
+    @staticmethod
+    def to_nested(df: pd.DataFrame, alg_names: List[str], task_descs: List[TaskDescription]) -> List:
+        """
+        Converts the rows of a DataFrame returned by load_df() (for a single n_cv and split_type)
+        to the nested format used by MultiResultsTable, which is indexed by
+        [alg_idx][task_idx][split_idx]['cv'/'refit']['train'/'val'/'test'][str(n_models)][str(start_idx)][metric_name]
+        """
+        alg_idxs = {alg_name: i for i, alg_name in enumerate(alg_names)}
+        task_idxs = {(td.task_source, td.task_name): i for i, td in enumerate(task_descs)}
+        task_index = pd.MultiIndex.from_tuples(list(task_idxs.keys()), names=['task_source', 'task_name'])
+        df = df[df['alg_name'].isin(alg_idxs.keys())
+                & pd.MultiIndex.from_frame(df[['task_source', 'task_name']]).isin(task_index)]
+
+        nested = [[[] for td in task_descs] for alg_name in alg_names]
+        # the groups are sorted, so the splits are appended in the order of their split_id
+        for (alg_name, task_source, task_name, split_id), group in df.groupby(
+                ['alg_name', 'task_source', 'task_name', 'split_id'], sort=True):
+            split_dict = dict()
+            # the metric dicts are nested by the remaining key columns
+            for cv_refit, data_part, n_models, start_idx, metric_name, value in zip(
+                    *[group[column].tolist() for column in ResultStore.metric_key_columns + ['value']]):
+                split_dict.setdefault(cv_refit, dict()).setdefault(data_part, dict()).setdefault(n_models, dict()) \
+                    .setdefault(start_idx, dict())[metric_name] = value
+            nested[alg_idxs[alg_name]][task_idxs[(task_source, task_name)]].append(split_dict)
+        return nested
@@ -1,16 +1,75 @@
+import os
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Union
+
+import numpy as np
+import torch
 
 from pytabkit.bench.data.paths import Paths
 from pytabkit.bench.data.tasks import TaskInfo
 from pytabkit.models import utils
 
 
+def save_y_preds(path: Path, y_preds: Union[torch.Tensor, np.ndarray], y_pred_format: str = 'float32',
+                 chunk_size: int = 2 ** 16) -> None:
+    """
+    Saves predictions to a .npy file that can be memory-mapped by load_y_preds().
+    The data is converted and written in chunks along the sample dimension,
+    and the file is only moved to the final path once it is complete.
+
+    :param path: Path of the .npy file.
+    :param y_preds: Predictions of shape [n_models, n_samples, n_outputs].
+    :param y_pred_format: 'float32' (lossless), 'float16', or 'uint8'.
+        For 'uint8', y_preds are interpreted as classification logits,
+        and the softmax probabilities are stored as uint8 with a resolution of 1/255.
+    :param chunk_size: Number of samples per chunk.
+    """
+    dtypes = {'float32': np.float32, 'float16': np.float16, 'uint8': np.uint8}
+    if y_pred_format not in dtypes:
+        raise ValueError(f'Unknown y_pred_format "{y_pred_format}", expected one of {list(dtypes.keys())}')
+    y_preds = torch.as_tensor(y_preds)
+    tmp_path = path.parent / (path.name + '.tmp.npy')
+    utils.ensureDir(tmp_path)
+    out = np.lib.format.open_memmap(str(tmp_path), mode='w+', dtype=dtypes[y_pred_format],
+                                    shape=tuple(y_preds.shape))
+    for start in range(0, y_preds.shape[1], chunk_size):
+        chunk = y_preds[:, start:start + chunk_size].float()
+        if y_pred_format == 'uint8':
+            chunk = torch.round(torch.softmax(chunk, dim=-1) * 255)
+        out[:, start:start + chunk_size] = chunk.numpy()
+    out.flush()
+    del out
+    os.replace(tmp_path, path)
+
+
+def load_y_preds(path: Path, mmap: bool = True) -> torch.Tensor:
+    """
+    Loads predictions saved by save_y_preds().
+
+    :param path: Path of the .npy file.
+    :param mmap: Whether to memory-map the file.
+        In this case, float32 predictions are not copied into memory until they are accessed.
+    :return: Tensor of shape [n_models, n_samples, n_outputs] with dtype float32
+        (containing logits in case the predictions were stored as quantized probabilities).
+    """
+    # copy-on-write, such that the returned tensor is writable without modifying the file
+    arr = np.load(str(path), mmap_mode='c' if mmap else None)
+    if arr.dtype == np.uint8:
+        return torch.log(torch.from_numpy(arr.astype(np.float32)) / 255 + 1e-30)
+    elif arr.dtype != np.float32:
+        return torch.from_numpy(arr.astype(np.float32))
+    return torch.from_numpy(arr)
+
+
 class ResultManager:
     """
     Stores experimental results and can save and load them.
     """
-    def __init__(self):
+    def __init__(self, y_pred_format: str = 'float32'):
+        """
+        :param y_pred_format: Format for saving predictions (if present),
+            'msgpack' (as lists inside other.msgpack.gz) or one of the formats of save_y_preds().
+        """
         # indexing convention:
         # self.metrics_dict['cv'/'refit']['train'/'val'/'test'][str(n_models)][str(start_idx)][metric_name] = float
         self.metrics_dict = {}
@@ -19,6 +78,8 @@ class ResultManager:
         # or ['sub_info'] for hyperopt sub-results
         self.other_dict = {}
 
+        self.y_pred_format = y_pred_format
+
     def add_results(self, is_cv: bool, results_dict: Dict) -> None:
         """
         Add a dictionary of results.
@@ -37,22 +98,37 @@ class ResultManager:
                 self.other_dict[cv_str][key] = value
 
     def save(self, path: Path) -> None:
+        other_dict = {}
+        for cv_str, dct in self.other_dict.items():
+            y_preds = dct.get('y_preds', None)
+            if isinstance(y_preds, (torch.Tensor, np.ndarray)):
+                if self.y_pred_format == 'msgpack':
+                    dct = utils.update_dict(dct, {'y_preds': np.asarray(y_preds).tolist()})
+                else:
+                    save_y_preds(path / f'y_preds_{cv_str}.npy', y_preds, y_pred_format=self.y_pred_format)
+                    dct = utils.update_dict(dct, remove_keys=['y_preds'])
+            other_dict[cv_str] = dct
         utils.serialize(path / 'metrics.yaml', self.metrics_dict, use_yaml=True)
-        utils.serialize(path / 'other.msgpack.gz', self.other_dict, use_msgpack=True, compressed=True)
+        utils.serialize(path / 'other.msgpack.gz', other_dict, use_msgpack=True, compressed=True)
 
     @staticmethod
-    def load(path: Path, only_metrics: bool = False):
+    def load(path: Path, only_metrics: bool = False, mmap_y_preds: bool = True):
         """
         Load results.
         :param path: Data path.
         :param only_metrics: If True, only the metrics results are loaded
         (this can be much faster, especially if predictions are also stored).
+        :param mmap_y_preds: Whether predictions saved with save_y_preds() should be memory-mapped.
         :return:
         """
         rm = ResultManager()
         rm.metrics_dict = utils.deserialize(path / 'metrics.yaml', use_yaml=True)
         if not only_metrics:
             rm.other_dict = utils.deserialize(path / 'other.msgpack.gz', use_msgpack=True, compressed=True)
+            for cv_str in ['cv', 'refit']:
+                y_preds_path = path / f'y_preds_{cv_str}.npy'
+                if y_preds_path.exists():
+                    rm.other_dict.setdefault(cv_str, {})['y_preds'] = load_y_preds(y_preds_path, mmap=mmap_y_preds)
         return rm
 
 
@@ -1,9 +1,10 @@
 import shutil
-from typing import List, Optional
+from typing import List, Optional, Dict
 
 from pytabkit.bench.alg_wrappers.general import AlgWrapper
 from pytabkit.bench.data.paths import Paths
 from pytabkit.bench.data.tasks import TaskPackage, TaskInfo
+from pytabkit.bench.run.result_store import ResultStore
 from pytabkit.bench.run.results import ResultManager, save_summaries
 from pytabkit.bench.scheduling.schedulers import BaseJobScheduler
 from pytabkit.models import utils
@@ -11,26 +12,35 @@ from pytabkit.models.training.logging import StdoutLogger
 import glob
 import math
 
-from pytabkit.bench.scheduling.jobs import AbstractJob
+from pytabkit.bench.scheduling.jobs import AbstractJob, JobResult
+from pytabkit.bench.scheduling.resource_feedback import ResourceFeedback
 from pytabkit.bench.scheduling.resources import NodeResources
 from pytabkit.models.alg_interfaces.base import RequiredResources
+from pytabkit.models.alg_interfaces.resource_computation import get_resource_features
+from pytabkit.models.data.data import DictDataset
 
 
 class TabBenchJob(AbstractJob):
     """
     Internal helper class implementing AbstractJob for running tabular benchmarking jobs with our scheduling code.
     """
-    def __init__(self, alg_name: str, alg_wrapper: AlgWrapper, task_package: TaskPackage, paths: Paths):
+    def __init__(self, alg_name: str, alg_wrapper: AlgWrapper, task_package: TaskPackage, paths: Paths,
+                 resource_feedback: Optional[ResourceFeedback] = None, use_result_store: bool = True):
         """
         :param alg_name: Unique name of the method (for saving results).
         :param alg_wrapper: Wrapper implementing the ML method.
         :param task_package: Task package containing information on dataset and splits.
         :param paths: Data path configuration.
+        :param resource_feedback: If not None, the measured resource usage is recorded after the job has finished,
+            and the estimated resources are corrected based on records of previous jobs.
+        :param use_result_store: Whether the metrics should also be added to the ResultStore.
         """
         self.alg_name = alg_name
         self.alg_wrapper = alg_wrapper
         self.task_package = task_package
         self.paths = paths
+        self.resource_feedback = resource_feedback
+        self.use_result_store = use_result_store
 
     def get_group(self) -> str:
         """
@@ -65,9 +75,13 @@ class TabBenchJob(AbstractJob):
                                                          split_id=split_info.id) / 'tmp' for split_info in
                        self.task_package.split_infos]
         result_managers = self.alg_wrapper.run(self.task_package, logger, assigned_resources, tmp_folders)
+        result_store = ResultStore.from_paths(self.paths) if self.use_result_store else None
         for rm, split_info in zip(result_managers, self.task_package.split_infos):
             rm.save(self.paths.results_alg_task_split(task_desc, self.alg_name, self.task_package.n_cv,
                                                       split_info.split_type, split_info.id))
+            if result_store is not None:
+                result_store.add_metrics(self.alg_name, task_desc, self.task_package.n_cv, split_info.split_type,
+                                         split_info.id, rm.metrics_dict)
 
         # delete tmp_folders to save disk space
         for tmp_folder in tmp_folders:
@@ -78,8 +92,30 @@ class TabBenchJob(AbstractJob):
               flush=True)
         return finished_normally
 
+    def _get_resource_features(self, predicted: RequiredResources) -> Dict[str, float]:
+        task_info = self.task_package.task_info
+        ds = DictDataset(tensors=None, tensor_infos=task_info.tensor_infos, device='cpu',
+                         n_samples=task_info.n_samples)
+        resource_features = get_resource_features(self.alg_wrapper.config, ds, n_cv=self.task_package.n_cv,
+                                                  n_refit=self.task_package.n_refit,
+                                                  n_splits=len(self.task_package.split_infos))
+        return ResourceFeedback.get_features(resource_features, predicted)
+
     def get_required_resources(self) -> RequiredResources:
-        return self.alg_wrapper.get_required_resources(self.task_package)
+        required_resources = self.alg_wrapper.get_required_resources(self.task_package)
+        if self.resource_feedback is not None:
+            required_resources = self.resource_feedback.correct(self.get_group(),
+                                                                self._get_resource_features(required_resources),
+                                                                required_resources)
+        return required_resources
+
+    def on_finished(self, job_result: JobResult) -> None:
+        # only record jobs whose time and RAM usage are representative (no exceptions, no pre-computed results)
+        if self.resource_feedback is not None and job_result.finished_normally:
+            # use the uncorrected estimate as a feature such that the corrections do not compound over runs
+            predicted = self.alg_wrapper.get_required_resources(self.task_package)
+            self.resource_feedback.add_record(self.get_group(), self._get_resource_features(predicted),
+                                              time_s=job_result.time_s, cpu_ram_gb=job_result.max_cpu_ram_gb)
 
     def get_desc(self) -> str:
         split_ids = [split_info.id for split_info in self.task_package.split_infos]
@@ -98,7 +134,7 @@ class RunConfig:
     """
     def __init__(self, n_tt_splits: int, n_cv: int = 1, n_refit: int = 0, use_default_split: bool = False,
                  trainval_fraction: float = 0.8,
-                 save_y_pred: bool = False, min_split_idx: int = 0):
+                 save_y_pred: bool = False, min_split_idx: int = 0, y_pred_format: str = 'float32'):
         """
         :param n_tt_splits: Number of trainval-test-splits to evaluate the method with.
         :param n_cv: Number of cross-validation folds. If n_cv=1, use a single random split.
@@ -111,6 +147,12 @@ class RunConfig:
         for running a single method on meta-train and meta-test benchmarks).
         :param min_split_idx: Minimum index of the split that should be used.
         Can be set larger than zero if only a sub-range of the splits should be run.
+        :param y_pred_format: Format for saving predictions if save_y_pred=True.
+        'float32', 'float16', and 'uint8' save them as .npy files that can be memory-mapped
+        (see results.save_y_preds()).
+        'uint8' stores the predicted probabilities quantized to uint8 with a resolution of 1/255.
+        This is only possible for classification, regression predictions are saved as float32 instead.
+        'msgpack' saves them as lists in other.msgpack.gz (slow).
         """
         self.n_tt_splits = n_tt_splits
         self.n_cv = n_cv
@@ -119,17 +161,26 @@ class RunConfig:
         self.trainval_fraction = trainval_fraction
         self.save_y_pred = save_y_pred
         self.min_split_idx = min_split_idx
+        self.y_pred_format = y_pred_format
 
 
 class TabBenchJobManager:
     """
     This class can be used to add and run jobs for tabular benchmarks.
     """
-    def __init__(self, paths: Paths):
+    def __init__(self, paths: Paths, use_resource_feedback: bool = False, use_result_store: bool = True):
         """
         :param paths: Data path configuration.
+        :param use_resource_feedback: Whether to record the measured time and RAM usage of completed jobs
+            in paths.resource_feedback() and to correct the estimated resources of jobs
+            using models refitted on the records from previous runs (see ResourceFeedback).
+        :param use_result_store: Whether the metrics should also be written to the SQLite ResultStore,
+            in addition to the result files. This should be disabled if jobs on different machines
+            write to a shared network file system, where SQLite locking is unreliable.
         """
         self.paths = paths
+        self.resource_feedback = ResourceFeedback(paths.resource_feedback()) if use_resource_feedback else None
+        self.use_result_store = use_result_store
         self.jobs = []
         self.save_args = []
 
@@ -173,7 +224,7 @@ class TabBenchJobManager:
             if n_tt_splits == 0:
                 continue
 
-            max_n_vectorized = alg_wrapper.get_max_n_vectorized(task_info)
+            max_n_vectorized = alg_wrapper.get_max_n_vectorized(task_info, paths=self.paths)
             n_splits_per_package = min(n_tt_splits,
                                        max(1, max_n_vectorized // max(run_config.n_cv, run_config.n_refit)))
             n_packages_per_task = math.ceil(n_tt_splits / n_splits_per_package)
@@ -188,10 +239,13 @@ class TabBenchJobManager:
                 task_packages.append(TaskPackage(task_info, split_infos=tt_split_infos[start:stop],
                                                  n_cv=run_config.n_cv, n_refit=run_config.n_refit,
                                                  paths=self.paths, rerun=rerun, alg_name=alg_name,
-                                                 save_y_pred=run_config.save_y_pred))
+                                                 save_y_pred=run_config.save_y_pred,
+                                                 y_pred_format=run_config.y_pred_format))
 
         for tp in task_packages:
-            self.jobs.append(TabBenchJob(alg_name=alg_name, alg_wrapper=alg_wrapper, task_package=tp, paths=self.paths))
+            self.jobs.append(TabBenchJob(alg_name=alg_name, alg_wrapper=alg_wrapper, task_package=tp, paths=self.paths,
+                                         resource_feedback=self.resource_feedback,
+                                         use_result_store=self.use_result_store))
 
         if len(task_packages) > 0:
             # store alg info because something is actually being run
@@ -166,7 +166,7 @@ class RayJobManager(NodeManager):
         self.ray_kwargs = ray_kwargs
         self.runner_futures = []  # keep node_runner futures for termination
         self.job_queues = []
-        self.feedback_queues = []
+        self.feedback_queue = None
         self.resource_manager: Optional[ResourceManager] = None
         self.max_n_threads = max_n_threads
         self.available_cpu_ram_multiplier = available_cpu_ram_multiplier
@@ -181,14 +181,16 @@ class RayJobManager(NodeManager):
         from ray.util import queue
         nodes = ray.nodes()
         print(f'Nodes: {nodes}')
-        feedback_queues = [queue.Queue() for i in range(len(nodes))]
+        # all nodes share one feedback queue such that pop_finished_job_infos() can block on it
+        # and react to a finished job immediately instead of polling the queues of all nodes
+        feedback_queue = queue.Queue()
         job_queues = [queue.Queue() for i in range(len(nodes))]
 
         for i, node in enumerate(nodes):
             node_id = f'node:{node["NodeManagerAddress"]}'
             num_gpus = 0 if 'GPU' not in node['Resources'] else round(node['Resources']['GPU'])
             future = ray.remote(num_gpus=num_gpus)(node_runner).options(resources={node_id: 1.0}) \
-                .remote(feedback_queue=feedback_queues[i], job_queue=job_queues[i], node_id=i)
+                .remote(feedback_queue=feedback_queue, job_queue=job_queues[i], node_id=i)
             self.runner_futures.append(future)
 
         print(f'Started {len(job_queues)} nodes', flush=True)
@@ -196,7 +198,7 @@ class RayJobManager(NodeManager):
         total_resources: List[Optional[NodeResources]] = [None] * n_nodes
         fixed_resources: List[Optional[NodeResources]] = [None] * n_nodes
 
-        for feedback_queue in feedback_queues:
+        for i in range(n_nodes):
             nr, fnr = feedback_queue.get()  # should be a NodeResources object
             total_resources[nr.node_id] = nr
             fixed_resources[fnr.node_id] = fnr
@@ -212,7 +214,7 @@ class RayJobManager(NodeManager):
                                                 fixed_resources=SystemResources(fixed_resources))
 
         self.job_queues = job_queues
-        self.feedback_queues = feedback_queues
+        self.feedback_queue = feedback_queue
 
     def get_resource_manager(self) -> ResourceManager:
         if self.resource_manager is None:
@@ -234,28 +236,23 @@ class RayJobManager(NodeManager):
         self.resource_manager.job_started(job_info)
 
     def pop_finished_job_infos(self, timeout_s: float = -1.0) -> List[JobInfo]:
+        """
+        Blocks until at least one job has finished or until the timeout is reached.
+
+        :param timeout_s: Timeout in seconds. If it is not positive, there is no timeout.
+        :return: Job infos of all jobs that have finished (empty list in case of a timeout).
+        """
         if self.resource_manager is None:
             raise RuntimeError('called pop_results() before start()')
-        has_new_result = False
-        start_time = time.time()
-        job_infos = []
-
-        while not has_new_result:
-            if timeout_s > 0.0 and time.time() > start_time + timeout_s:
-                # timeout
-                return job_infos
-
-            for feedback_queue in self.feedback_queues:
-                while not feedback_queue.empty():
-                    job_result = feedback_queue.get()
-                    job_info = self.resource_manager.job_finished(job_result)
-                    job_infos.append(job_info)
-                    has_new_result = True
-
-            if not has_new_result:
-                time.sleep(0.05)
-
-        return job_infos
+        from ray.util.queue import Empty
+        try:
+            job_results = [self.feedback_queue.get(block=True, timeout=timeout_s if timeout_s > 0.0 else None)]
+        except Empty:
+            return []  # timeout
+        while not self.feedback_queue.empty():
+            job_results.append(self.feedback_queue.get())
+
+        return [self.resource_manager.job_finished(job_result) for job_result in job_results]
 
     def terminate(self) -> None:
         for jq in self.job_queues:
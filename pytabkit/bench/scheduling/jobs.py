@@ -81,6 +81,15 @@ class AbstractJob:
         """
         raise NotImplementedError()
 
+    def on_finished(self, job_result: JobResult) -> None:
+        """
+        Called by the scheduler (in the main process) after the job has finished. Does nothing by default.
+        Can be overridden, e.g., to record the measured resource usage.
+
+        :param job_result: Result of the job, including measured time and RAM usage.
+        """
+        pass
+
 
 class JobRunner:
     """
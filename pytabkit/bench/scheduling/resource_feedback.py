@@ -0,0 +1,126 @@
+import copy
+import json
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from pytabkit.models import utils
+from pytabkit.models.alg_interfaces.base import RequiredResources
+from pytabkit.models.alg_interfaces.resource_computation import FeatureSpec, process_resource_features, \
+    fit_resource_factors, eval_linear_product_model
+
+
+class ResourceFeedback:
+    """
+    Online correction of resource estimates from measured job telemetry.
+    For each completed job, the measured time and peak CPU RAM are stored together with resource features
+    (see get_resource_features()) and the static estimates of get_required_resources() of the job.
+    Between runs, log-linear models (see fit_resource_factors()) are refitted on these records for each job group,
+    predicting the measured values from the static estimates and a few product features.
+    The refitted models then replace the static estimates for time and CPU RAM.
+    The RAM model is fitted pessimistically, i.e., it is scaled to cover all measured RAM values
+    (times ram_coef_factor), such that nodes can be packed tighter without causing OOM errors.
+    """
+    time_feature_spec = FeatureSpec.concat('', 'predicted_time_s', 'predicted_time_s*1/n_threads',
+                                           'n_cv_refit*n_splits*n_samples*n_features*1/n_threads')
+    ram_feature_spec = FeatureSpec.concat('', 'predicted_cpu_ram_gb', 'ds_size_gb', 'n_cv_refit*n_splits*ds_size_gb')
+
+    def __init__(self, path: Path, min_n_records: int = 20, ram_coef_factor: float = 1.2):
+        """
+        :param path: Folder where the records and the fitted coefficients are stored.
+        :param min_n_records: Minimum number of records of a group before the static estimates are replaced.
+        :param ram_coef_factor: Safety factor for the pessimistic RAM model.
+        """
+        self.path = path
+        self.min_n_records = min_n_records
+        self.ram_coef_factor = ram_coef_factor
+        self.coefs = dict()  # fitted coefficients per group, loaded lazily
+
+    def _records_file(self, group: str) -> Path:
+        return self.path / f'{group}.jsonl'
+
+    def _coefs_file(self, group: str) -> Path:
+        return self.path / f'{group}_coefs.yaml'
+
+    @staticmethod
+    def get_features(resource_features: Dict[str, Any], predicted: RequiredResources) -> Dict[str, float]:
+        """
+        :param resource_features: Features from get_resource_features().
+            Non-numeric entries (from the configuration) are ignored.
+        :param predicted: Static estimate of the required resources.
+        :return: Features that are used by the correction models.
+        """
+        features = {key: float(value) for key, value in resource_features.items()
+                    if isinstance(value, (int, float, np.integer, np.floating))}
+        features['1/n_threads'] = 1.0 / max(1.0, predicted.n_threads)
+        features['predicted_time_s'] = float(predicted.time_s)
+        features['predicted_cpu_ram_gb'] = float(predicted.cpu_ram_gb)
+        return features
+
+    def add_record(self, group: str, features: Dict[str, float], time_s: float, cpu_ram_gb: float) -> None:
+        """
+        Appends a record of a completed job.
+
+        :param group: Group of the job (see AbstractJob.get_group()).
+        :param features: Features from get_features().
+        :param time_s: Measured time in seconds.
+        :param cpu_ram_gb: Measured peak CPU RAM in GB.
+        """
+        utils.ensureDir(self._records_file(group))
+        with open(self._records_file(group), 'a') as file:
+            file.write(json.dumps({'features': features, 'time_s': time_s, 'cpu_ram_gb': cpu_ram_gb}) + '\n')
+
+    def load_records(self, group: str) -> List[Dict[str, Any]]:
+        if not utils.existsFile(self._records_file(group)):
+            return []
+        with open(self._records_file(group), 'r') as file:
+            return [json.loads(line) for line in file if line.strip() != '']
+
+    def _fit(self, records: List[Dict[str, Any]], feature_spec: List[str], target: str,
+             pessimistic: bool) -> Dict[str, float]:
+        data = [(process_resource_features(record['features'], feature_spec), max(record[target], 1e-8))
+                for record in records]
+        # constant-zero features cannot be normalized in fit_resource_factors() and are not informative
+        feature_names = [name for name in feature_spec if any(x[name] != 0.0 for x, y in data)]
+        data = [({name: x[name] for name in feature_names}, y) for x, y in data]
+        coefs = fit_resource_factors(data, pessimistic=pessimistic, coef_factor=self.ram_coef_factor, verbose=False)
+        return {name: float(coef) for name, coef in coefs.items()}
+
+    def get_coefs(self, group: str) -> Optional[Dict[str, Dict[str, float]]]:
+        """
+        :param group: Group of the job.
+        :return: Fitted coefficients for 'time_s' and 'cpu_ram_gb', or None if there are too few records.
+            The coefficients are refitted if new records have been added since the last fit.
+        """
+        if group in self.coefs:
+            return self.coefs[group]
+        records = self.load_records(group)
+        coefs = None
+        if len(records) >= self.min_n_records:
+            coefs_file = self._coefs_file(group)
+            if utils.existsFile(coefs_file):
+                coefs = utils.deserialize(coefs_file, use_yaml=True)
+            if coefs is None or coefs['n_records'] != len(records):
+                coefs = {'n_records': len(records),
+                         'time_s': self._fit(records, self.time_feature_spec, 'time_s', pessimistic=False),
+                         'cpu_ram_gb': self._fit(records, self.ram_feature_spec, 'cpu_ram_gb', pessimistic=True)}
+                utils.serialize(coefs_file, coefs, use_yaml=True)
+        self.coefs[group] = coefs
+        return coefs
+
+    def correct(self, group: str, features: Dict[str, float], predicted: RequiredResources) -> RequiredResources:
+        """
+        :param group: Group of the job.
+        :param features: Features from get_features().
+        :param predicted: Static estimate of the required resources.
+        :return: Estimate with time and CPU RAM from the refitted models,
+            or the static estimate if there are too few records for the group.
+        """
+        coefs = self.get_coefs(group)
+        if coefs is None:
+            return predicted
+        corrected = copy.copy(predicted)
+        corrected.time_s = eval_linear_product_model(features, coefs['time_s'])
+        corrected.cpu_ram_gb = eval_linear_product_model(features, coefs['cpu_ram_gb'])
+        return corrected
@@ -1,7 +1,7 @@
 import copy
 import sys
 import time
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Tuple, Optional
 
 import numpy as np
 
@@ -74,6 +74,7 @@ class BaseJobScheduler:
             for job_info in finished_job_infos:
                 # update the status of the job infos that have been finished
                 self.job_infos[job_info.job_id] = job_info
+                job_info.job.on_finished(job_info.job_result)
 
             # todo: register finished job infos in self
 
@@ -501,3 +502,100 @@ class CustomJobScheduler(BaseJobScheduler):
                     n_started_time[job_info.job.get_group()] += 1
                     break  # leave inner loop, recompute scores
 
+
+class LPTBackfillJobScheduler(BaseJobScheduler):
+    """
+    Scheduler that starts the jobs with the longest estimated time first (longest-processing-time-first),
+    such that long jobs (e.g., HPO jobs) do not start at the end of a benchmark and leave the other nodes idle.
+    If the next job does not fit on any node, it gets a reservation on the node where it can start the earliest
+    (estimated from the remaining times of the running jobs).
+    Smaller jobs are then backfilled into the free resources, but only on the reserved node
+    if they are estimated to finish before the reservation starts.
+    Jobs are placed on the node where they leave the least free resources (best fit),
+    and, as in SimpleJobScheduler, a few jobs from each group are started first to calibrate the time estimates.
+    Since RayJobManager.pop_finished_job_infos() returns as soon as a job finishes,
+    new jobs are submitted immediately after a job has finished.
+    """
+    def _get_reservation(self, job_info: JobInfo, free_resources, fixed_resources,
+                         group_stats: Dict[str, Dict[str, Union[int, float]]]) -> Tuple[Optional[int], float]:
+        """
+        :return: Tuple (node_idx, start_time_s) of the node where the job can start the earliest
+            and the estimated time (from now on) until it can start there.
+            node_idx is None if the job cannot run on any node.
+        """
+        running_job_infos = [ji for ji in self.job_infos if ji.is_running()]
+        remaining_times = self._get_time_estimates(running_job_infos, group_stats)
+        best_node_idx, best_start_time_s = None, np.inf
+        for node_idx, r in enumerate(free_resources.resources):
+            node_free_resources = copy.deepcopy(r)
+            node_jobs = [(remaining_time, ji) for remaining_time, ji in zip(remaining_times, running_job_infos)
+                         if ji.assigned_resources.node_id == r.node_id]
+            node_jobs.sort(key=lambda t: t[0])
+            # release the resources of running jobs in the order in which they are estimated to finish
+            for remaining_time, ji in node_jobs:
+                node_free_resources += ji.assigned_resources
+                if node_free_resources.try_assign(job_info.required_resources, fixed_resources) is not None:
+                    if remaining_time < best_start_time_s:
+                        best_node_idx, best_start_time_s = node_idx, remaining_time
+                    break
+        return best_node_idx, best_start_time_s
+
+    def _submit_more_jobs(self) -> None:
+        min_starts_per_group = 3
+
+        job_infos = [ji for ji in self.job_infos if ji.is_remaining()]
+        if len(job_infos) == 0:
+            return
+
+        group_stats = self._compute_group_stats()
+        job_times = self._get_time_estimates(job_infos, group_stats)
+        n_started_times = {key: value['n_running'] + value['n_finished_with_time']
+                           for key, value in group_stats.items()}
+        resource_manager = self.job_manager.get_resource_manager()
+        total_resources = resource_manager.get_total_resources()
+        free_resources = copy.deepcopy(resource_manager.get_free_resources())
+        fixed_resources = resource_manager.get_fixed_resources()
+
+        # start the longest jobs of groups without enough time measurements first
+        priorities = np.copy(job_times)
+        priority_offset = 2 * np.max(job_times)
+        for group, n_started in n_started_times.items():
+            if n_started < min_starts_per_group:
+                job_idxs = np.asarray([i for i, ji in enumerate(job_infos) if ji.job.get_group() == group],
+                                      dtype=np.int64)
+                if len(job_idxs) > 0:
+                    sort_perm = np.argsort(job_times[job_idxs])
+                    n_offset = min(len(sort_perm), min_starts_per_group - n_started)
+                    priorities[job_idxs[sort_perm[-n_offset:]]] += priority_offset
+
+        # only the first job that cannot be started gets a reservation (as in EASY backfilling)
+        reserved_node_idx, reservation_time_s = None, np.inf
+
+        for job_idx in np.argsort(-priorities, kind='stable'):
+            job_info = job_infos[job_idx]
+
+            best_node_idx, best_assigned_resources, best_leftover = None, None, np.inf
+            for node_idx, r in enumerate(free_resources.resources):
+                if node_idx == reserved_node_idx and job_times[job_idx] > reservation_time_s:
+                    continue  # the job would delay the reserved job
+                assigned_resources = r.try_assign(job_info.required_resources, fixed_resources)
+                if assigned_resources is None:
+                    continue
+                total_rv = total_resources.resources[node_idx].get_resource_vector()
+                leftover = np.sum((r.get_resource_vector() - assigned_resources.get_resource_vector())
+                                  / (total_rv + 1e-8))
+                if leftover < best_leftover:
+                    best_node_idx, best_assigned_resources, best_leftover = node_idx, assigned_resources, leftover
+
+            if best_node_idx is not None:
+                job_info.set_started(best_assigned_resources)
+                self.job_manager.submit_job(job_info)
+                free_resources.resources[best_node_idx] -= best_assigned_resources
+            elif reserved_node_idx is None:
+                reserved_node_idx, reservation_time_s = self._get_reservation(job_info, free_resources,
+                                                                              fixed_resources, group_stats)
+                if reserved_node_idx is None and not any(
+                        r.try_assign(job_info.required_resources, fixed_resources) is not None
+                        for r in total_resources.resources):
+                    print(f'The following job does not fit on any node: {job_info.job.get_desc()}',
+                          file=sys.stderr, flush=True)
@@ -117,7 +117,7 @@ class AlgInterface:
             Denote by `results` such a NestedDict object. Then, `results` will contain the following contents:
             results['metrics', 'train'/'val'/'test', str(n_models), str(start_idx), metric_name] = metric_value
             Here, an ensemble of the predictions of models [start_idx:start_idx+n_models] will be used.
-            results['y_preds'] = a list (converted from a tensor) with predictions on the whole dataset,
+            results['y_preds'] = a tensor with predictions on the whole dataset,
             included only if return_preds==True.
             results['fit_params'] = self.fit_params
         """
@@ -146,7 +146,8 @@ class AlgInterface:
 
             y_preds = y_pred_full[idx:idx + idxs.n_trainval_splits]
             if return_preds:
-                results['y_preds'] = y_preds.numpy().tolist()
+                # converting to a list here would be very slow, ResultManager.save() takes care of serialization
+                results['y_preds'] = y_preds
             idx += idxs.n_trainval_splits
 
             if idxs.test_idxs is not None:
@@ -207,6 +208,17 @@ class AlgInterface:
         """
         return self.fit_params
 
+    def set_init_interface(self, alg_interface: 'AlgInterface') -> None:
+        """
+        Allows to continue training in fit() from an AlgInterface of the same type
+        that has been fitted with a smaller budget (e.g., fewer boosting rounds) on the same data and splits.
+        This is used by multi-fidelity hyperparameter optimization (see SuccessiveHalvingOptimizer).
+        Override in subclasses that support this, by default training starts from scratch.
+
+        :param alg_interface: Previously fitted AlgInterface.
+        """
+        pass
+
     def get_required_resources(self, ds: DictDataset, n_cv: int, n_refit: int, n_splits: int,
                                split_seeds: List[int]) -> RequiredResources:
         """
@@ -297,6 +309,7 @@ class OptAlgInterface(SingleSplitAlgInterface):
         # self.fit_params['sub_fit_params'] will contain the fit_params of the best fitted alg_interface
         self.best_alg_interface = None
         self.opt_step = 0
+        self.step_results = dict()
 
         # list where all results from all optimization steps can be stored (except y_preds, to save memory)
         # this list will then be included into the final results, such that one can retrospectively simulate
@@ -319,9 +332,13 @@ class OptAlgInterface(SingleSplitAlgInterface):
 
     def objective(self, params, ds: DictDataset, idxs_list: List[SplitIdxs], interface_resources: InterfaceResources,
                   logger: Logger, tmp_folder: Optional[Path], name: str, metrics: Optional[Metrics],
-                  return_preds: bool) -> Tuple[float, Tuple[List[NestedDict], AlgInterface]]:
-        self.opt_step += 1
-        tmp_folder = tmp_folder / f'step_{self.opt_step}' if tmp_folder is not None else None
+                  return_preds: bool, step: Optional[int] = None,
+                  prev_info: Optional[Tuple[List[NestedDict], AlgInterface]] = None) \
+            -> Tuple[float, Tuple[List[NestedDict], AlgInterface]]:
+        if step is None:
+            self.opt_step += 1
+            step = self.opt_step
+        tmp_folder = tmp_folder / f'step_{step}' if tmp_folder is not None else None
 
         could_load = False
 
@@ -350,6 +367,9 @@ class OptAlgInterface(SingleSplitAlgInterface):
             tmp_folders = [tmp_folder / 'alg_interface' if tmp_folder is not None else None]
             alg_interface = self.create_alg_interface(idxs_list[0].n_trainval_splits,
                                                       **utils.join_dicts(self.config, params))
+            if prev_info is not None:
+                # continue from the evaluation of the same configuration with a smaller budget
+                alg_interface.set_init_interface(prev_info[1])
             results = alg_interface.fit_and_eval(ds=ds, idxs_list=idxs_list, interface_resources=interface_resources,
                                                  logger=logger, tmp_folders=tmp_folders, name=name, metrics=metrics,
                                                  return_preds=return_preds)
@@ -370,7 +390,8 @@ class OptAlgInterface(SingleSplitAlgInterface):
         results[0]['fit_params'] = {'hyper_fit_params': params, 'sub_fit_params': sub_fit_params}
 
         # store all parameters and results (metrics) without predictions
-        self.results_list.append(utils.update_dict(results[0].get_dict(), remove_keys=['y_preds']))
+        # (by step since the steps can finish in any order when they are run in parallel)
+        self.step_results[step] = utils.update_dict(results[0].get_dict(), remove_keys=['y_preds'])
 
         val_loss = metrics.compute_val_score(results[0]['metrics']['val'])
         return val_loss, (results, alg_interface)
@@ -391,13 +412,21 @@ class OptAlgInterface(SingleSplitAlgInterface):
             metrics = Metrics(metric_names=[val_metric_name], val_metric_name=val_metric_name, task_type=task_type)
 
         self.opt_step = 0
-        f = functools.partial(self.objective, ds=ds, idxs_list=idxs_list, interface_resources=interface_resources,
+        self.step_results = dict()
+
+        # evaluate multiple steps in parallel threads and split the thread budget across them
+        n_parallel = max(1, min(self.config.get('n_parallel_hpo_trials', 1), interface_resources.n_threads))
+        step_resources = InterfaceResources(n_threads=interface_resources.n_threads // n_parallel,
+                                            gpu_devices=interface_resources.gpu_devices)
+
+        f = functools.partial(self.objective, ds=ds, idxs_list=idxs_list, interface_resources=step_resources,
                               logger=logger, tmp_folder=tmp_folder, name=name, metrics=metrics,
                               return_preds=return_preds)
         hyper_fit_params, (results, best_alg_interface) = self.hyper_optimizer.optimize(
-            f=f, seed=split_idxs.sub_split_seeds[0], opt_desc=opt_desc, logger=logger)
+            f=f, seed=split_idxs.sub_split_seeds[0], opt_desc=opt_desc, logger=logger, n_parallel=n_parallel)
         self.best_alg_interface = best_alg_interface
         self.fit_params = [results[0]['fit_params']]
+        self.results_list.extend(self.step_results[step] for step in sorted(self.step_results.keys()))
         results[0]['opt_step_results'] = self.results_list
         return results
 
@@ -1,7 +1,8 @@
+import contextlib
 import copy
 import warnings
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple, Union
+from typing import Optional, Dict, Any, List, Tuple, Union, ContextManager
 
 import numpy as np
 import torch
@@ -14,7 +15,7 @@ from pytabkit.models.alg_interfaces.base import RequiredResources
 from pytabkit.models.alg_interfaces.sub_split_interfaces import TreeBasedSubSplitInterface, SingleSplitWrapperAlgInterface, \
     SklearnSubSplitInterface
 from pytabkit.models.data.data import DictDataset
-from pytabkit.models.hyper_opt.hyper_optimizers import HyperoptOptimizer
+from pytabkit.models.hyper_opt.hyper_optimizers import HyperoptOptimizer, SuccessiveHalvingOptimizer
 import catboost
 
 from pytabkit.models.alg_interfaces.alg_interfaces import AlgInterface, \
@@ -193,14 +194,35 @@ class CatBoostSubSplitInterface(TreeBasedSubSplitInterface):
         return params
 
     def _convert_ds(self, ds: DictDataset) -> Any:
-        x_df = ds.without_labels().to_df()
         label = None if 'y' not in ds.tensors else ds.tensors['y'].cpu().numpy()
+        has_cat = 'x_cat' in ds.tensor_infos and ds.tensor_infos['x_cat'].get_n_features() > 0
+        if not has_cat:
+            # no categorical columns, CatBoost can directly use the float32 array
+            return catboost.Pool(ds.without_labels().to_numpy()[0], label)
+
+        # CatBoost needs categorical values as integers or strings, which is fastest with a categorical DataFrame
+        x_df = ds.without_labels().to_df()
         cat_features = x_df.select_dtypes(include='category').columns.tolist()
         return catboost.Pool(x_df, label, cat_features=cat_features)
 
+    def _use_train_pool(self, train_ds: DictDataset, params: Dict[str, Any]) -> ContextManager[catboost.Pool]:
+        if not self.config.get('use_gbdt_dataset_cache', False) or 'device' in params:
+            return contextlib.nullcontext(self._convert_ds(train_ds))
+
+        # quantize the cached Pool once, the quantization only depends on the parameters in the cache key
+        quantization_params = {key: params[key] for key in ['border_count', 'feature_border_type', 'nan_mode']
+                               if key in params}
+
+        def create_pool() -> catboost.Pool:
+            pool = self._convert_ds(train_ds)
+            pool.quantize(**quantization_params)
+            return pool
+
+        return self._use_converted_ds(train_ds, create_pool, tuple(sorted(quantization_params.items())))
+
     def _fit(self, train_ds: DictDataset, val_ds: Optional[DictDataset], params: Dict[str, Any], seed: int,
              n_threads: int, val_metric_name: Optional[str] = None,
-             tmp_folder: Optional[Path] = None) -> Tuple[Any, Optional[List[float]]]:
+             tmp_folder: Optional[Path] = None, init_model: Optional[Any] = None) -> Tuple[Any, Optional[List[float]]]:
         # print(f'Fitting CatBoost')
         n_classes = train_ds.tensor_infos['y'].get_cat_sizes()[0].item()
         params = self._preprocess_params(params, n_classes)
@@ -217,7 +239,15 @@ class CatBoostSubSplitInterface(TreeBasedSubSplitInterface):
         bst = catboost.CatBoost(params)
         with warnings.catch_warnings():
             warnings.filterwarnings('ignore', message='Can\'t optimze method "evaluate" because self argument is used')
-            bst.fit(self._convert_ds(train_ds), eval_set=None if val_ds is None else self._convert_ds(val_ds))
+            if init_model is not None:
+                # CatBoost sets the predictions of init_model as baseline of the Pools, so they are not cached
+                bst.fit(self._convert_ds(train_ds), eval_set=None if val_ds is None else self._convert_ds(val_ds),
+                        init_model=init_model)
+            else:
+                val_context = contextlib.nullcontext(None) if val_ds is None \
+                    else self._use_converted_ds(val_ds, lambda: self._convert_ds(val_ds))
+                with self._use_train_pool(train_ds, params) as train_pool, val_context as val_pool:
+                    bst.fit(train_pool, eval_set=val_pool)
 
         if val_ds is not None:
             evals_result = bst.get_evals_result()
@@ -234,9 +264,9 @@ class CatBoostSubSplitInterface(TreeBasedSubSplitInterface):
         # print(f'CatBoost _predict(): {other_params=}')
         ntree_end = 0 if other_params is None else other_params['n_estimators']
         prediction_type = 'RawFormulaVal' if n_classes == 0 else 'LogProbability'
-        y_pred = torch.as_tensor(
-            bst.predict(self._convert_ds(ds), ntree_end=ntree_end, prediction_type=prediction_type),
-            dtype=torch.float32)
+        with self._use_converted_ds(ds, lambda: self._convert_ds(ds)) as pool:
+            y_pred = torch.as_tensor(bst.predict(pool, ntree_end=ntree_end, prediction_type=prediction_type),
+                                     dtype=torch.float32)
         if n_classes == 0:
             y_pred = y_pred.unsqueeze(-1)
 
@@ -265,7 +295,7 @@ class CatBoostSubSplitInterface(TreeBasedSubSplitInterface):
 
 
 class CatBoostHyperoptAlgInterface(OptAlgInterface):
-    def __init__(self, space=None, n_hyperopt_steps: int = 50, **config):
+    def __init__(self, space=None, n_hyperopt_steps: int = 50, opt_method: str = 'hyperopt', **config):
         from hyperopt import hp
         default_config = {}
         max_config = {}
@@ -341,9 +371,10 @@ class CatBoostHyperoptAlgInterface(OptAlgInterface):
             default_config = dict(n_estimators=2000)
             max_config['max_depth'] = 10
         config = utils.update_dict(default_config, config)
-        super().__init__(hyper_optimizer=HyperoptOptimizer(space=space, fixed_params=dict(),
-                                                           n_hyperopt_steps=n_hyperopt_steps,
-                                                           **config),
+        opt_class = SuccessiveHalvingOptimizer if opt_method == 'successive_halving' else HyperoptOptimizer
+        super().__init__(hyper_optimizer=opt_class(space=space, fixed_params=dict(),
+                                                   n_hyperopt_steps=n_hyperopt_steps,
+                                                   **config),
                          max_resource_config=utils.join_dicts(config, max_config),
                          **config)
 
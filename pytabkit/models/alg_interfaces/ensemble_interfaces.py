@@ -21,12 +21,111 @@ class WeightedPrediction:
     def predict_for_weights(self, weights: np.ndarray):
         weights = weights.astype(np.float32)
         norm_weights = weights / np.sum(weights)
-        weighted_sum = sum([w * y_pred for w, y_pred in zip(norm_weights, self.y_pred_converted_list)])
+        # models with zero weight are skipped, such that their invalid (NaN or inf) predictions do not propagate
+        weighted_sum = sum([w * y_pred for w, y_pred in zip(norm_weights, self.y_pred_converted_list) if w != 0.0])
         if self.task_type == TaskType.CLASSIFICATION:
             weighted_sum = torch.log(weighted_sum + 1e-30)
         return weighted_sum
 
 
+class IncrementalEnsembleSelector:
+    """
+    Greedy ensemble selection as in CaruanaEnsembleAlgInterface, but keeps a running sum of the selected
+    (converted) predictions and scores all candidate additions of a step at once,
+    instead of recomputing the full weighted sum for every candidate.
+    For cross_entropy, class_error, brier and rmse, the losses are computed directly in batched form,
+    other metrics are evaluated with Metrics.apply() for each candidate.
+    """
+    def __init__(self, y_pred_list: List[torch.Tensor], y: torch.Tensor, task_type: TaskType, metric_name: str,
+                 max_chunk_numel: int = 2 ** 24):
+        """
+        :param y_pred_list: Predictions of the candidate models (logits for classification),
+            each of shape n_samples x output_dim.
+        :param y: Labels of shape n_samples x 1 (class indices for classification) or n_samples x output_dim.
+        :param task_type: Task type.
+        :param metric_name: Name of the metric that should be minimized.
+        :param max_chunk_numel: Maximum number of elements of the tensor holding the candidate ensemble predictions.
+            If necessary, the candidates are processed in chunks to respect this limit.
+        """
+        self.task_type = task_type
+        self.metric_name = metric_name
+        self.y = y
+        # shape: n_models x n_samples x output_dim
+        self.y_preds = torch.stack([y_pred if task_type == TaskType.REGRESSION else torch.softmax(y_pred, dim=-1)
+                                    for y_pred in y_pred_list], dim=0)
+        n_models, n_samples, output_dim = self.y_preds.shape
+        self.chunk_size = max(1, min(n_models, max_chunk_numel // max(1, n_samples * output_dim)))
+        self.is_classification = task_type == TaskType.CLASSIFICATION
+        # Metrics.apply() replaces predictions containing NaN or inf values,
+        # for an ensemble this affects the samples where one of the selected models has invalid predictions:
+        # their (log-)probabilities become uniform for classification and their predictions become zero for regression
+        self.invalid = torch.any(~torch.isfinite(self.y_preds), dim=-1)  # n_models x n_samples
+        self.invalid_value = 1.0 / output_dim if self.is_classification else 0.0
+        if self.is_classification and metric_name == 'cross_entropy':
+            # only the probabilities of the correct classes are needed
+            self.y_preds_correct = self.y_preds.gather(
+                -1, y[None, :, :].expand(n_models, -1, -1)).squeeze(-1)  # n_models x n_samples
+
+    def _get_candidate_losses(self, ens_sum: torch.Tensor, ens_invalid: torch.Tensor,
+                              n_selected: int) -> torch.Tensor:
+        # returns the losses of the ensembles (ens_sum + y_preds[i]) / (n_selected + 1) for all i,
+        # where ens_invalid marks the samples with invalid predictions of the already selected models
+        denom = n_selected + 1
+        if self.is_classification and self.metric_name == 'cross_entropy':
+            ens_sum_correct = ens_sum.gather(-1, self.y).squeeze(-1)
+            probs = (ens_sum_correct[None, :] + self.y_preds_correct) / denom
+            probs = probs.masked_fill(ens_invalid[None, :] | self.invalid, self.invalid_value)
+            return -torch.log(probs + 1e-30).mean(dim=-1)
+
+        losses = []
+        for start in range(0, self.y_preds.shape[0], self.chunk_size):
+            cand = (ens_sum[None] + self.y_preds[start:start + self.chunk_size]) / denom
+            cand_invalid = ens_invalid[None, :] | self.invalid[start:start + self.chunk_size]
+            if self.metric_name in ['class_error', 'brier', 'rmse']:
+                cand = cand.masked_fill(cand_invalid[:, :, None], self.invalid_value)
+            if self.is_classification and self.metric_name == 'class_error':
+                losses.append((cand.argmax(dim=-1) != self.y[:, 0]).float().mean(dim=-1))
+            elif self.is_classification and self.metric_name == 'brier':
+                one_hot = torch.nn.functional.one_hot(self.y[:, 0], num_classes=cand.shape[-1])
+                losses.append((cand - one_hot).square().sum(dim=-1).mean(dim=-1))
+            elif not self.is_classification and self.metric_name == 'rmse':
+                losses.append((cand - self.y[None]).square().mean(dim=(-2, -1)).sqrt())
+            else:
+                if self.is_classification:
+                    cand = torch.log(cand + 1e-30)
+                losses.append(torch.stack([Metrics.apply(cand[i], self.y, self.metric_name)
+                                           for i in range(cand.shape[0])]))
+        return torch.cat(losses, dim=0)
+
+    def select(self, n_steps: int) -> np.ndarray:
+        """
+        :param n_steps: Number of greedy selection steps.
+        :return: Integer weights (number of times each model has been selected) of the best ensemble.
+        """
+        weights = np.zeros(self.y_preds.shape[0], dtype=np.int32)
+        best_weights = np.copy(weights)
+        best_loss = np.Inf
+        ens_sum = torch.zeros_like(self.y_preds[0])
+        ens_invalid = torch.zeros_like(self.invalid[0])
+
+        for step_idx in range(n_steps):
+            losses = self._get_candidate_losses(ens_sum, ens_invalid, n_selected=step_idx)
+            # NaN losses are never selected by the non-incremental version
+            losses = torch.where(torch.isnan(losses), torch.full_like(losses, np.Inf), losses)
+            # argmin() returns the first minimum, which matches the tie-breaking of the non-incremental version
+            best_idx = losses.argmin().item()
+            weights[best_idx] += 1
+            ens_sum += self.y_preds[best_idx]
+            ens_invalid |= self.invalid[best_idx]
+
+            best_step_loss = losses[best_idx].item()
+            if best_step_loss < best_loss:
+                best_loss = best_step_loss
+                best_weights = np.copy(weights)
+
+        return best_weights
+
+
 class CaruanaEnsembleAlgInterface(SingleSplitAlgInterface):
     """
     Following a simple variant of Caruana et al. (2004), "Ensemble selection from libraries of models"
@@ -77,6 +176,20 @@ class CaruanaEnsembleAlgInterface(SingleSplitAlgInterface):
         y = ds.tensors['y']
         y_oob = cat_if_necessary([y[idxs_list[0].val_idxs[j]] for j in range(idxs_list[0].val_idxs.shape[0])], dim=0)
 
+        if self.config.get('use_incremental_caruana', True):
+            best_weights = IncrementalEnsembleSelector(y_preds_oob_list, y_oob, self.task_type,
+                                                       val_metric_name).select(n_caruana_steps)
+        else:
+            best_weights = self._select_weights(y_preds_oob_list, y_oob, val_metric_name, n_caruana_steps)
+
+        logger.log(2, f'Obtained ensemble weights: {best_weights}')
+
+        self.fit_params = [dict(alg_weights=best_weights.tolist(),
+                                sub_fit_params=[alg_interface.get_fit_params()[0]
+                                                for alg_interface in self.alg_interfaces])]
+
+    def _select_weights(self, y_preds_oob_list: List[torch.Tensor], y_oob: torch.Tensor, val_metric_name: str,
+                        n_caruana_steps: int) -> np.ndarray:
         weights = np.zeros(len(self.alg_interfaces), dtype=np.int32)
         best_weights = np.copy(weights)
         best_loss = np.Inf
@@ -104,11 +217,7 @@ class CaruanaEnsembleAlgInterface(SingleSplitAlgInterface):
 
             weights = best_step_weights
 
-        logger.log(2, f'Obtained ensemble weights: {best_weights}')
-
-        self.fit_params = [dict(alg_weights=best_weights.tolist(),
-                                sub_fit_params=[alg_interface.get_fit_params()[0]
-                                                for alg_interface in self.alg_interfaces])]
+        return best_weights
 
     def predict(self, ds: DictDataset) -> torch.Tensor:
         weights = self.fit_params[0]['alg_weights']
@@ -0,0 +1,116 @@
+import contextlib
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+import numpy as np
+
+from pytabkit.models.data.data import DictDataset
+
+
+class _CacheEntry:
+    def __init__(self, n_bytes: int):
+        self.n_bytes = n_bytes
+        self.value: Optional[Any] = None
+        # held while the value is used, since the GBDT libraries modify their datasets during training
+        self.lock = threading.Lock()
+
+
+class GBDTDatasetCache:
+    """
+    LRU cache for datasets that have been converted to the formats of GBDT libraries
+    (xgb.DMatrix, lgbm.Dataset, catboost.Pool).
+    Building these objects (and the feature histograms / quantization that is computed on them)
+    is repeated for every fold, hyperparameter optimization step and refit otherwise,
+    although the preprocessed data is often identical.
+    Entries are keyed by a fingerprint of the (preprocessed) tensors,
+    which covers the data identity and the row subset, together with the parameters used for binning.
+    Since the converted datasets are usually as large as the data itself,
+    the number of entries and their estimated total size are bounded.
+    The cached objects are not thread-safe (e.g., lgbm.train() modifies the parameters of its Dataset),
+    so every entry can only be used by one thread at a time.
+    Threads that find an entry in use (e.g., with n_parallel_folds > 1 or n_parallel_hpo_trials > 1)
+    create a private, uncached dataset instead of waiting.
+    """
+    def __init__(self, max_n_entries: int = 8, max_n_bytes: int = 2 * 1024 ** 3):
+        """
+        :param max_n_entries: Maximum number of cached datasets. The least recently used ones are evicted first.
+        :param max_n_bytes: Maximum estimated total size of the cached datasets in bytes.
+            Datasets that are larger than this are not cached.
+        """
+        self.max_n_entries = max_n_entries
+        self.max_n_bytes = max_n_bytes
+        self.entries = OrderedDict()
+        self.n_bytes = 0
+        self.lock = threading.Lock()
+        self.n_hits = 0
+        self.n_misses = 0
+
+    @staticmethod
+    def get_fingerprint(ds: DictDataset) -> str:
+        """
+        :param ds: Dataset.
+        :return: Hash of the tensors and tensor infos of the dataset.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for key in sorted(ds.tensors.keys()):
+            arr = np.ascontiguousarray(ds.tensors[key].detach().cpu().numpy())
+            tensor_info = ds.tensor_infos[key]
+            h.update(f'{key}:{arr.dtype}:{arr.shape}:{tensor_info.get_cat_sizes().tolist()}'.encode('utf-8'))
+            h.update(arr.data)
+        return h.hexdigest()
+
+    @contextlib.contextmanager
+    def use(self, key: Hashable, create_fn: Callable[[], Any], n_bytes: int) -> Iterator[Any]:
+        """
+        Context manager providing exclusive access to a cached entry while the context is active.
+
+        :param key: Key of the entry.
+        :param create_fn: Function creating the entry if it is not cached yet.
+        :param n_bytes: Estimated size of the entry in bytes.
+        :return: The cached or newly created entry.
+        """
+        if n_bytes > self.max_n_bytes:
+            yield create_fn()
+            return
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is None:
+                entry = _CacheEntry(n_bytes)
+                self.entries[key] = entry
+                self.n_bytes += n_bytes
+                self._evict()
+            else:
+                self.entries.move_to_end(key)
+        if not entry.lock.acquire(blocking=False):
+            # another thread currently uses the entry
+            yield create_fn()
+            return
+        try:
+            if entry.value is None:
+                with self.lock:
+                    self.n_misses += 1
+                # create outside the cache lock such that other threads are not blocked
+                entry.value = create_fn()
+            else:
+                with self.lock:
+                    self.n_hits += 1
+            yield entry.value
+        finally:
+            entry.lock.release()
+
+    def _evict(self) -> None:
+        # evicted entries that are still in use are freed when their current user is done
+        while len(self.entries) > self.max_n_entries or self.n_bytes > self.max_n_bytes:
+            _, entry = self.entries.popitem(last=False)
+            self.n_bytes -= entry.n_bytes
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.n_bytes = 0
+
+
+# shared by all tree-based interfaces in the process, such that HPO steps and refits can reuse the datasets
+gbdt_dataset_cache = GBDTDatasetCache()
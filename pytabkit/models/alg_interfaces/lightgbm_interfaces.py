@@ -1,3 +1,4 @@
+import contextlib
 import copy
 from pathlib import Path
 from typing import Optional, Dict, Tuple, Any, List
@@ -13,16 +14,23 @@ from pytabkit.models import utils
 from pytabkit.models.alg_interfaces.alg_interfaces import OptAlgInterface, \
     AlgInterface, RandomParamsAlgInterface
 from pytabkit.models.alg_interfaces.base import RequiredResources
+from pytabkit.models.alg_interfaces.gbdt_dataset_cache import GBDTDatasetCache
 from pytabkit.models.alg_interfaces.sub_split_interfaces import TreeBasedSubSplitInterface, SingleSplitWrapperAlgInterface, \
     SklearnSubSplitInterface
 from pytabkit.models.data.data import DictDataset
-from pytabkit.models.hyper_opt.hyper_optimizers import HyperoptOptimizer, SMACOptimizer
+from pytabkit.models.hyper_opt.hyper_optimizers import HyperoptOptimizer, SMACOptimizer, \
+    SuccessiveHalvingOptimizer
 import lightgbm as lgbm
 import warnings
 
 from pytabkit.models.training.metrics import Metrics
 
 
+# parameters that LightGBM uses for constructing (binning) a Dataset and that cannot be changed afterwards
+_lgbm_dataset_param_names = ['max_bin', 'min_data_in_bin', 'bin_construct_sample_cnt', 'use_missing',
+                             'zero_as_missing', 'feature_pre_filter', 'data_random_seed', 'linear_tree', 'verbosity']
+
+
 class LGBMCustomMetric:
     def __init__(self, metric_name: str, is_classification: bool, is_higher_better: bool = False):
         self.metric_name = metric_name
@@ -153,23 +161,18 @@ class LGBMSubSplitInterface(TreeBasedSubSplitInterface):
             params['min_data_in_leaf'] = int(params['min_data_in_leaf'])
         return params
 
-    def _convert_ds(self, ds: DictDataset) -> Any:
-        x_cont = ds.tensors['x_cont'].cpu().numpy()
+    def _convert_ds(self, ds: DictDataset, params: Optional[Dict[str, Any]] = None,
+                    reference: Optional[lgbm.Dataset] = None) -> Any:
         label = None if 'y' not in ds.tensors else ds.tensors['y'].cpu().numpy()
         if label is not None and label.shape[1] == 1:
             label = label[:, 0]
-        has_cat = 'x_cat' in ds.tensor_infos and ds.tensor_infos['x_cat'].get_n_features() > 0
-        if not has_cat:
-            # no categorical columns
-            return lgbm.Dataset(x_cont, label=label, categorical_feature=[])
-
-        x_df = ds.without_labels().to_df()
-        cat_features = x_df.select_dtypes(include='category').columns.tolist()
-        return lgbm.Dataset(x_df, label, categorical_feature=cat_features)
+        # LightGBM takes categorical features as non-negative integer codes, so no DataFrame is needed
+        x, cat_col_idxs = ds.without_labels().to_numpy()
+        return lgbm.Dataset(x, label, categorical_feature=cat_col_idxs, params=params, reference=reference)
 
     def _fit(self, train_ds: DictDataset, val_ds: Optional[DictDataset], params: Dict[str, Any], seed: int,
              n_threads: int, val_metric_name: Optional[str] = None,
-             tmp_folder: Optional[Path] = None) -> Tuple[Any, Optional[List[float]]]:
+             tmp_folder: Optional[Path] = None, init_model: Optional[Any] = None) -> Tuple[Any, Optional[List[float]]]:
         # print(f'Fitting LightGBM')
         n_classes = train_ds.tensor_infos['y'].get_cat_sizes()[0].item()
         params = self._preprocess_params(params, n_classes)
@@ -214,20 +217,42 @@ class LGBMSubSplitInterface(TreeBasedSubSplitInterface):
         if val_ds is None:
             params = utils.update_dict(params, remove_keys=['early_stopping_round', 'early_stopping_rounds'])
 
-        evals = [] if val_ds is None else [self._convert_ds(val_ds)]
+        if self.config.get('use_gbdt_dataset_cache', False) and init_model is None:
+            # LightGBM does not allow to change the binning parameters of an already constructed Dataset,
+            # so they are part of the cache key. Without pre-filtering, min_data_in_leaf is not used for binning.
+            params['feature_pre_filter'] = False
+            dataset_params = {key: params[key] for key in _lgbm_dataset_param_names if key in params}
+        else:
+            dataset_params = None
+        dataset_key = tuple(sorted(dataset_params.items())) if dataset_params is not None else None
+        if init_model is not None:
+            # the Datasets get the predictions of init_model as init_score, so they are not shared via the cache
+            lgbm_train_ds = self._convert_ds(train_ds)
+            datasets_context = contextlib.nullcontext(
+                (lgbm_train_ds, [] if val_ds is None else [self._convert_ds(val_ds, reference=lgbm_train_ds)]))
+        elif val_ds is None:
+            datasets_context = self._use_converted_ds(
+                train_ds, lambda: (self._convert_ds(train_ds, params=dataset_params), []), dataset_key)
+        else:
+            def convert_train_val() -> Tuple[lgbm.Dataset, List[lgbm.Dataset]]:
+                lgbm_train = self._convert_ds(train_ds, params=dataset_params)
+                return lgbm_train, [self._convert_ds(val_ds, params=dataset_params, reference=lgbm_train)]
+
+            # the validation Dataset is binned using the train Dataset, so both are cached together
+            val_key = GBDTDatasetCache.get_fingerprint(val_ds) if dataset_params is not None else None
+            datasets_context = self._use_converted_ds(train_ds, convert_train_val, dataset_key, val_key)
         valid_names = [] if val_ds is None else ['val']
         evals_result = {}
-        train_ds = self._convert_ds(train_ds)
         # warning filtering taken from https://auto.gluon.ai/dev/_modules/autogluon/tabular/models/lgb/lgb_model.html
-        with warnings.catch_warnings():
+        with datasets_context as (lgbm_train_ds, evals), warnings.catch_warnings():
             # Filter harmless warnings introduced in lightgbm 3.0,
             # future versions plan to remove: https://github.com/microsoft/LightGBM/issues/3379
             warnings.filterwarnings('ignore', message='Overriding the parameters from Reference Dataset.')
             warnings.filterwarnings('ignore', message='categorical_column in param dict is overridden.')
-            bst = lgbm.train(utils.update_dict(params, remove_keys=['n_estimators']), train_ds, valid_sets=evals,
-                             valid_names=valid_names, feval=feval,
+            bst = lgbm.train(utils.update_dict(params, remove_keys=['n_estimators']), lgbm_train_ds,
+                             valid_sets=evals, valid_names=valid_names, feval=feval,
                              callbacks=[record_evaluation(evals_result)],
-                             num_boost_round=params['n_estimators'])
+                             num_boost_round=params['n_estimators'], init_model=init_model)
 
         if val_ds is not None:
             # print('evals_result val:', evals_result['val'], flush=True)
@@ -239,8 +264,9 @@ class LGBMSubSplitInterface(TreeBasedSubSplitInterface):
     def _predict(self, bst: lgbm.Booster, ds: DictDataset, n_classes: int, other_params: Dict[str, Any]) -> torch.Tensor:
         # print(f'LGBM _predict() with {other_params=}')
         num_iteration = None if other_params is None else other_params['n_estimators']
-        y_pred = torch.as_tensor(bst.predict(self._convert_ds(ds).data, num_iteration=num_iteration),
-                                 dtype=torch.float32)
+        with self._use_converted_ds(ds, lambda: self._convert_ds(ds).data) as x:
+            y_pred = torch.as_tensor(bst.predict(x, num_iteration=num_iteration),
+                                     dtype=torch.float32)
         if n_classes == 0:
             y_pred = y_pred.unsqueeze(-1)
         elif n_classes <= 2:
@@ -332,7 +358,12 @@ class LGBMHyperoptAlgInterface(OptAlgInterface):
             default_config = dict(n_estimators=1000, min_sum_hessian_in_leaf=1e-5)
             max_config['num_leaves'] = 256
         config = utils.update_dict(default_config, config)
-        opt_class = SMACOptimizer if opt_method == 'smac' else HyperoptOptimizer
+        if opt_method == 'smac':
+            opt_class = SMACOptimizer
+        elif opt_method == 'successive_halving':
+            opt_class = SuccessiveHalvingOptimizer
+        else:
+            opt_class = HyperoptOptimizer
         super().__init__(hyper_optimizer=opt_class(space=space, fixed_params=dict(),
                                                    n_hyperopt_steps=n_hyperopt_steps,
                                                    **config),
@@ -9,14 +9,16 @@ import pytorch_lightning as pl
 import logging
 
 from pytabkit.models import utils
-from pytabkit.models.data.data import DictDataset
+from pytabkit.models.data.data import DictDataset, TaskType
 from pytabkit.models.hyper_opt.hyper_optimizers import HyperoptOptimizer, SMACOptimizer
 from pytabkit.models.nn_models.base import Layer, Variable
 from pytabkit.models.nn_models.models import NNFactory
 from pytabkit.models.sklearn.default_params import DefaultParams
 from pytabkit.models.torch_utils import cat_if_necessary
+from pytabkit.models.training.inference import BatchedInferenceEngine
 from pytabkit.models.training.lightning_modules import TabNNModule
 from pytabkit.models.training.logging import Logger
+from pytabkit.models.training.metrics import Metrics
 from pytabkit.models.alg_interfaces.alg_interfaces import AlgInterface, SingleSplitAlgInterface, OptAlgInterface
 from pytabkit.models.alg_interfaces.base import SplitIdxs, InterfaceResources, RequiredResources
 
@@ -26,6 +28,7 @@ class NNAlgInterface(AlgInterface):
         super().__init__(fit_params=fit_params, **config)
         self.model: Optional[TabNNModule] = None
         self.trainer: Optional[pl.Trainer] = None
+        self.inference_engine: Optional[BatchedInferenceEngine] = None
         self.device = None
 
     def get_refit_interface(self, n_refit: int, fit_params: Optional[List[Dict]] = None) -> 'AlgInterface':
@@ -59,12 +62,14 @@ class NNAlgInterface(AlgInterface):
         # todo: allow preprocessing on CPU and then only put batches on GPU in data loader?
         gpu_devices = interface_resources.gpu_devices
         self.device = gpu_devices[0] if len(gpu_devices) > 0 else 'cpu'
-        ds = ds.to(self.device)
+        if not self.config.get('keep_data_on_host', False):
+            ds = ds.to(self.device)
 
         n_epochs = self.config.get('n_epochs', 256)
         self.model = TabNNModule(**utils.join_dicts({'n_epochs': 256, 'logger': logger}, self.config),
                                  fit_params=self.fit_params)
         self.model.compile_model(ds, idxs_list, interface_resources)
+        self.inference_engine = None
 
         if self.device == 'cpu':
             pl_accelerator = 'cpu'
@@ -111,10 +116,17 @@ class NNAlgInterface(AlgInterface):
         old_allow_tf32 = torch.backends.cuda.matmul.allow_tf32
         torch.backends.cuda.matmul.allow_tf32 = False
         self.model.to(self.device)
-        ds = ds.to(self.device)
+        if not self.config.get('keep_data_on_host', False):
+            ds = ds.to(self.device)
         ds_x, _ = ds.split_xy()
-        y_pred = self.trainer.predict(model=self.model, dataloaders=self.model.get_predict_dataloader(ds_x))
-        y_pred = cat_if_necessary(y_pred, dim=-2).to('cpu')  # concat along batch dimension
+        if self.config.get('use_trainer_predict', False):
+            y_pred = self.trainer.predict(model=self.model, dataloaders=self.model.get_predict_dataloader(ds_x))
+            y_pred = cat_if_necessary(y_pred, dim=-2).to('cpu')  # concat along batch dimension
+        else:
+            # bypass pl.Trainer.predict(), which has a large overhead for small numbers of samples
+            if self.inference_engine is None:
+                self.inference_engine = self.model.create_inference_engine()
+            y_pred = self.inference_engine.predict(ds_x).to('cpu')
         torch.backends.cuda.matmul.allow_tf32 = old_allow_tf32
         # self.model.to('cpu')  # to allow serialization without GPU issues, but doesn't work
         return y_pred
@@ -153,7 +165,9 @@ class NNAlgInterface(AlgInterface):
         # init_ram_gb = 1.5
 
         factor = 1.5  # to go safe on ram
-        gpu_ram_gb = fixed_ram_gb + ds_ram_gb + max(init_ram_gb,
+        # with keep_data_on_host=True, only batches (and the validation labels) are stored on the GPU
+        gpu_ds_ram_gb = 0.0 if self.config.get('keep_data_on_host', False) else ds_ram_gb
+        gpu_ram_gb = fixed_ram_gb + gpu_ds_ram_gb + max(init_ram_gb,
                                                     factor * (n_parallel * (pass_memory + param_memory)) / (1024 ** 3))
 
         gpu_usage = min(1.0, n_parallel / 100)  # rather underestimate it and use up all the ram on the gpu
@@ -354,6 +368,117 @@ class RandomParamsNNAlgInterface(SingleSplitAlgInterface):
         return alg_interface.get_required_resources(ds, n_cv, n_refit, n_splits, split_seeds)
 
 
+class VectorizedRandomParamsNNAlgInterface(SingleSplitAlgInterface):
+    """
+    Random search over the RealMLP hyperparameters from RealMLPParamSampler,
+    which trains multiple sampled configurations in one vectorized model.
+    The configurations are sampled as in RandomParamsNNAlgInterface with model_idx=0, ..., n_hyperopt_steps-1,
+    and the best configuration is selected on the validation set as in AlgorithmSelectionAlgInterface.
+    Configurations that only differ in the hyperparameters from per_model_param_names are trained together,
+    by training on the same split multiple times, with one hyperparameter value per train-test split
+    (see HyperparamManager.get_model_values()).
+    """
+    per_model_param_names = ['lr', 'wd', 'p_drop', 'ls_eps', 'plr_sigma']
+
+    def __init__(self, n_hyperopt_steps: int = 50, fit_params: Optional[List[Dict[str, Any]]] = None, **config):
+        """
+        :param n_hyperopt_steps: Number of sampled configurations.
+        :param fit_params: Fit parameters (not used since refitting is not implemented).
+        :param config: Configuration for the NNs. The maximum number of configurations
+            that are trained in one vectorized model can be specified as n_vectorized_configs.
+        """
+        super().__init__(fit_params=fit_params, **config)
+        self.n_hyperopt_steps = n_hyperopt_steps
+        self.alg_interface = None
+        # index of the best configuration in the vectorized model of self.alg_interface
+        self.best_group_pos = None
+        self.n_tv_splits = None
+
+    def get_refit_interface(self, n_refit: int, fit_params: Optional[List[Dict]] = None) -> 'AlgInterface':
+        raise NotImplementedError('Refit is not fully implemented...')
+
+    def _sample_params(self, ds: DictDataset, seed: int) -> List[Dict[str, Any]]:
+        is_classification = not ds.tensor_infos['y'].is_cont()
+        sampler = RealMLPParamSampler(is_classification)
+        return [sampler.sample_params(utils.combine_seeds(seed, model_idx))
+                for model_idx in range(self.n_hyperopt_steps)]
+
+    def _get_groups(self, params_list: List[Dict[str, Any]]) -> List[List[int]]:
+        # indices of the configurations that are trained in the same vectorized model
+        max_group_size = self.config.get('n_vectorized_configs', self.n_hyperopt_steps)
+        groups = dict()
+        for config_idx, params in enumerate(params_list):
+            key = str(sorted((name, str(value)) for name, value in params.items()
+                             if name not in self.per_model_param_names))
+            groups.setdefault(key, []).append(config_idx)
+        return [group[i:i + max_group_size] for group in groups.values()
+                for i in range(0, len(group), max_group_size)]
+
+    def _create_group_interface(self, params_list: List[Dict[str, Any]], group: List[int]) -> NNAlgInterface:
+        group_params = utils.update_dict(params_list[group[0]],
+                                         {name: [params_list[config_idx][name] for config_idx in group]
+                                          for name in self.per_model_param_names if name in params_list[group[0]]})
+        return NNAlgInterface(fit_params=None, **utils.update_dict(self.config, group_params))
+
+    def fit(self, ds: DictDataset, idxs_list: List[SplitIdxs], interface_resources: InterfaceResources,
+            logger: Logger, tmp_folders: List[Optional[Path]], name: str) -> None:
+        assert len(idxs_list) == 1
+        split_idxs = idxs_list[0]
+        if split_idxs.val_idxs is None:
+            raise ValueError('VectorizedRandomParamsNNAlgInterface.fit(): No validation set was provided')
+
+        is_classification = not ds.tensor_infos['y'].is_cont()
+        task_type = TaskType.CLASSIFICATION if is_classification else TaskType.REGRESSION
+        val_metric_name = self.config.get('alg_sel_metric_name', self.config.get('val_metric_name', None))
+        if val_metric_name is None:
+            val_metric_name = Metrics.default_metric_name(task_type=task_type)
+
+        # get out-of-bag labels
+        y = ds.tensors['y']
+        self.n_tv_splits = split_idxs.n_trainval_splits
+        y_oob = cat_if_necessary([y[split_idxs.val_idxs[i]] for i in range(self.n_tv_splits)], dim=0)
+
+        params_list = self._sample_params(ds, split_idxs.split_seed)
+        # (loss, config_idx) of the best configuration, ties are resolved towards the smaller index
+        best = (np.Inf, len(params_list))
+        for group_idx, group in enumerate(self._get_groups(params_list)):
+            alg_interface = self._create_group_interface(params_list, group)
+            sub_tmp_folders = [tmp_folder / f'group_{group_idx}' if tmp_folder is not None else None
+                               for tmp_folder in tmp_folders]
+            alg_interface.fit(ds, [split_idxs] * len(group), interface_resources, logger,
+                              sub_tmp_folders * len(group), name + f'sub-group-{group_idx}')
+            y_preds = alg_interface.predict(ds)
+            for group_pos, config_idx in enumerate(group):
+                y_pred_oob = cat_if_necessary([y_preds[group_pos * self.n_tv_splits + j, split_idxs.val_idxs[j]]
+                                               for j in range(self.n_tv_splits)], dim=0)
+                loss = Metrics.apply(y_pred_oob, y_oob, val_metric_name).item()
+                if np.isnan(loss):
+                    loss = np.Inf
+                if (loss, config_idx) < best:
+                    best = (loss, config_idx)
+                    self.alg_interface = alg_interface
+                    self.best_group_pos = group_pos
+            logger.log(2, f'Trained configurations {group} in one vectorized model')
+
+        best_config_idx = best[1]
+        self.fit_params = [dict(best_alg_idx=best_config_idx, sub_fit_params=params_list[best_config_idx])]
+        logger.log(2, f'Best configuration has index {best_config_idx}')
+
+    def predict(self, ds: DictDataset) -> torch.Tensor:
+        y_preds = self.alg_interface.predict(ds)
+        return y_preds[self.best_group_pos * self.n_tv_splits:(self.best_group_pos + 1) * self.n_tv_splits]
+
+    def get_required_resources(self, ds: DictDataset, n_cv: int, n_refit: int, n_splits: int,
+                               split_seeds: List[int]) -> RequiredResources:
+        assert len(split_seeds) == 1
+        params_list = self._sample_params(ds, split_seeds[0])
+        # each vectorized model is trained like len(group) splits
+        single_resources = [self._create_group_interface(params_list, group).get_required_resources(
+            ds, n_cv, n_refit, n_splits=n_splits * len(group), split_seeds=split_seeds * len(group))
+            for group in self._get_groups(params_list)]
+        return RequiredResources.combine_sequential(single_resources)
+
+
 # class NNHyperoptAlgInterface(OptAlgInterface):
 #     def __init__(self, space=None, n_hyperopt_steps: int = 50, **config):
 #         from hyperopt import hp
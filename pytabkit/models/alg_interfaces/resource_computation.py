@@ -180,8 +180,9 @@ class LogLinearModule(nn.Module):
 
 
 class LogLinearRegressor:
-    def __init__(self, pessimistic: bool):
+    def __init__(self, pessimistic: bool, verbose: bool = True):
         self.pessimistic = pessimistic
+        self.verbose = verbose
 
     def fit(self, X: np.ndarray, y: np.ndarray):
         x = torch.as_tensor(X, dtype=torch.float64)
@@ -203,7 +204,7 @@ class LogLinearRegressor:
                 loss = pinball_loss(torch.exp(y_pred_log), y, quantile=0.99)
             else:
                 loss = ((y_pred_log - y_log) ** 2).mean()
-            if i % (n_it // 10) == 0:
+            if self.verbose and i % (n_it // 10) == 0:
                 print(f'Loss: {loss.item():g}')
             loss.backward()
             opt.step()
@@ -213,7 +214,8 @@ class LogLinearRegressor:
         return np.exp(self.model_.params.detach().numpy())
 
 
-def fit_resource_factors(data: List[Tuple[Dict[str, float], float]], pessimistic: bool, coef_factor: float = 1.0):
+def fit_resource_factors(data: List[Tuple[Dict[str, float], float]], pessimistic: bool, coef_factor: float = 1.0,
+                         verbose: bool = True):
     feature_names = list(data[0][0].keys())
     y = np.asarray([data[i][1] for i in range(len(data))])
     X = np.asarray([[data[i][0][feature_names[j]] for j in range(len(feature_names))] for i in range(len(data))])
@@ -225,7 +227,7 @@ def fit_resource_factors(data: List[Tuple[Dict[str, float], float]], pessimistic
 
     # coefs: np.ndarray = np.linalg.lstsq(X, y)[0]
     # always use pessimistic version
-    reg = NormalizedDataRegressor(LogLinearRegressor(pessimistic=True))
+    reg = NormalizedDataRegressor(LogLinearRegressor(pessimistic=True, verbose=verbose))
     reg.fit(X, y)
     coefs = reg.get_coefs()
     coefs[coefs < 0.0] = 0.0
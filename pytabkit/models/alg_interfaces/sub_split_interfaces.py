@@ -1,6 +1,9 @@
+import contextlib
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Callable, Hashable, ContextManager
 
 import numpy as np
 import pandas as pd
@@ -9,12 +12,18 @@ import torch
 from pytabkit.models import utils
 from pytabkit.models.alg_interfaces.alg_interfaces import SingleSplitAlgInterface, AlgInterface
 from pytabkit.models.alg_interfaces.base import SplitIdxs, InterfaceResources, RequiredResources
+from pytabkit.models.alg_interfaces.gbdt_dataset_cache import GBDTDatasetCache, gbdt_dataset_cache
 from pytabkit.models.data.data import DictDataset
 from pytabkit.models.nn_models.models import PreprocessingFactory
 from pytabkit.models.training.logging import Logger
 from pytabkit.models.training.metrics import insert_missing_class_columns
 
 
+# Sub-split interfaces seed the global RNGs and then fit the preprocessing (which may use them).
+# This lock keeps these parts deterministic when folds are fitted in parallel threads.
+_global_rng_lock = threading.RLock()
+
+
 class SingleSplitWrapperAlgInterface(SingleSplitAlgInterface):
     """
     AlgInterface that takes multiple AlgInterfaces that can only handle a single train-val-test split
@@ -28,6 +37,12 @@ class SingleSplitWrapperAlgInterface(SingleSplitAlgInterface):
         super().__init__(fit_params=fit_params, **config)
         self.sub_split_interfaces = sub_split_interfaces
 
+    def set_init_interface(self, alg_interface: AlgInterface) -> None:
+        if isinstance(alg_interface, SingleSplitWrapperAlgInterface) \
+                and len(alg_interface.sub_split_interfaces) == len(self.sub_split_interfaces):
+            for ssi, init_ssi in zip(self.sub_split_interfaces, alg_interface.sub_split_interfaces):
+                ssi.set_init_interface(init_ssi)
+
     def get_refit_interface(self, n_refit: int, fit_params: Optional[List[Dict]] = None) -> 'AlgInterface':
         if fit_params is not None:
             assert len(fit_params) == 1  # single split required
@@ -56,9 +71,8 @@ class SingleSplitWrapperAlgInterface(SingleSplitAlgInterface):
         assert len(tmp_folders) == 1  # this is a SingleSplitAlgInterface
         split_idxs = idxs_list[0]
         tmp_folder = tmp_folders[0]
-        hyper_results_list = []
-        # todo: this could be parallelized if necessary, but not for now
-        for i in range(split_idxs.n_trainval_splits):
+
+        def fit_sub_split(i: int, sub_interface_resources: InterfaceResources) -> List[Tuple[Dict, float]]:
             sub_split_idxs = [split_idxs.get_sub_split_idxs_alt(i)]
             sub_tmp_folder = tmp_folder / f'sub_split_{i}' if tmp_folder is not None else None
             # don't set fit_params here
@@ -66,10 +80,26 @@ class SingleSplitWrapperAlgInterface(SingleSplitAlgInterface):
             # see get_refit_interfaces()
             # if self.fit_params is not None:
             #     self.sub_split_interfaces[i].fit_params = self.fit_params
-            hyper_results = self.sub_split_interfaces[i].fit(ds, sub_split_idxs, interface_resources, logger,
+            hyper_results = self.sub_split_interfaces[i].fit(ds, sub_split_idxs, sub_interface_resources, logger,
                                                              [sub_tmp_folder], name=name)
-            hyper_results = hyper_results[0][0] if hyper_results is not None else []
-            hyper_results_list.append(hyper_results)
+            return hyper_results[0][0] if hyper_results is not None else []
+
+        config = utils.join_dicts(self.sub_split_interfaces[0].config, self.config)
+        n_parallel = min(config.get('n_parallel_folds', 1), split_idxs.n_trainval_splits)
+        if n_parallel > 1:
+            # split the thread budget across the folds that are fitted concurrently,
+            # GBDT libraries release the GIL during training, so threads are sufficient here
+            sub_interface_resources = InterfaceResources(
+                n_threads=max(1, interface_resources.n_threads // n_parallel),
+                gpu_devices=interface_resources.gpu_devices)
+            with ThreadPoolExecutor(max_workers=n_parallel) as executor:
+                futures = [executor.submit(fit_sub_split, i, sub_interface_resources)
+                           for i in range(split_idxs.n_trainval_splits)]
+                # collect the results in the order of the folds
+                hyper_results_list = [future.result() for future in futures]
+        else:
+            hyper_results_list = [fit_sub_split(i, interface_resources)
+                                  for i in range(split_idxs.n_trainval_splits)]
 
         if self.fit_params is None:
             # determine best fit parameters (early stopping epoch or so)
@@ -142,36 +172,37 @@ class SklearnSubSplitInterface(SingleSplitAlgInterface):  # todo: have another b
         # (could be number of trees, early stopping epoch, or hyperparameters from hyperparameter optimization)
         # if hyperparams is not None, use these and maybe only return one list element?
         seed = idxs_list[0].sub_split_seeds[0]
-        torch.manual_seed(seed)  # can be useful for label encoding with randomized permutation
-        np.random.seed(seed)
-        random.seed(seed)
-        # print(f'Seeding with seed {seed}')
-        # print(f'{type(seed)=}')
-        self.n_classes = ds.get_n_classes()
-        if idxs_list[0].val_idxs is None:
-            trainval_idxs = idxs_list[0].train_idxs[0]
-            # validation indices such that trainval_idxs[rel_val_idxs] is the val_idxs
-            # can be used to index trainval_ds later
-            rel_val_idxs = torch.zeros(0, dtype=torch.long)
-        else:
-            trainval_idxs = torch.cat([idxs_list[0].train_idxs[0], idxs_list[0].val_idxs[0]], dim=0)
-            rel_val_idxs = torch.arange(idxs_list[0].n_train, trainval_idxs.shape[0], dtype=torch.long)
+        with _global_rng_lock:  # see SingleSplitWrapperAlgInterface.fit()
+            torch.manual_seed(seed)  # can be useful for label encoding with randomized permutation
+            np.random.seed(seed)
+            random.seed(seed)
+            # print(f'Seeding with seed {seed}')
+            # print(f'{type(seed)=}')
+            self.n_classes = ds.get_n_classes()
+            if idxs_list[0].val_idxs is None:
+                trainval_idxs = idxs_list[0].train_idxs[0]
+                # validation indices such that trainval_idxs[rel_val_idxs] is the val_idxs
+                # can be used to index trainval_ds later
+                rel_val_idxs = torch.zeros(0, dtype=torch.long)
+            else:
+                trainval_idxs = torch.cat([idxs_list[0].train_idxs[0], idxs_list[0].val_idxs[0]], dim=0)
+                rel_val_idxs = torch.arange(idxs_list[0].n_train, trainval_idxs.shape[0], dtype=torch.long)
 
-        trainval_ds = ds.get_sub_dataset(trainval_idxs)
-        # for filling in missing classes in the train dataset later
-        # might not work when the validation set contains classes that the training set doesn't contain
-        self.train_ds = ds.get_sub_dataset(idxs_list[0].train_idxs[0])
+            trainval_ds = ds.get_sub_dataset(trainval_idxs)
+            # for filling in missing classes in the train dataset later
+            # might not work when the validation set contains classes that the training set doesn't contain
+            self.train_ds = ds.get_sub_dataset(idxs_list[0].train_idxs[0])
 
-        self.config["tmp_folder"] = tmp_folders[0]
+            self.config["tmp_folder"] = tmp_folders[0]
 
-        # create preprocessing factory
-        factory = self.config.get('factory', None)
-        if factory is None:
-            factory = PreprocessingFactory(**self.config)
+            # create preprocessing factory
+            factory = self.config.get('factory', None)
+            if factory is None:
+                factory = PreprocessingFactory(**self.config)
 
-        # transform according to factory
-        fitter = factory.create(ds.tensor_infos)
-        self.tfm, trainval_ds = fitter.fit_transform(trainval_ds)
+            # transform according to factory
+            fitter = factory.create(ds.tensor_infos)
+            self.tfm, trainval_ds = fitter.fit_transform(trainval_ds)
 
         y = trainval_ds.tensors['y']
 
@@ -252,6 +283,14 @@ class TreeBasedSubSplitInterface(SingleSplitAlgInterface):  # todo: insert more
         self.tfm = None
         self.n_classes = None
         self.model = None
+        self.init_interface = None
+        # validation errors of all boosting rounds and the requested number of rounds, used for resuming training
+        self.val_errors = None
+        self.n_estimators = None
+
+    def set_init_interface(self, alg_interface: AlgInterface) -> None:
+        if isinstance(alg_interface, self.__class__) and getattr(alg_interface, 'val_errors', None) is not None:
+            self.init_interface = alg_interface
 
     def fit(self, ds: DictDataset, idxs_list: List[SplitIdxs], interface_resources: InterfaceResources,
             logger: Logger, tmp_folders: List[Optional[Path]], name: str) -> Optional[
@@ -262,31 +301,32 @@ class TreeBasedSubSplitInterface(SingleSplitAlgInterface):  # todo: insert more
         # (could be number of trees, early stopping epoch, or hyperparameters from hyperparameter optimization)
         # if hyperparams is not None, use these and maybe only return one list element?
         seed = idxs_list[0].sub_split_seeds[0]
-        torch.manual_seed(seed)  # can be useful for label encoding with randomized permutation
-        np.random.seed(seed)
-        random.seed(seed)
-        self.n_classes = ds.get_n_classes()
-        train_idxs = idxs_list[0].train_idxs[0]
-        val_idxs = idxs_list[0].val_idxs[0] if idxs_list[0].val_idxs is not None else None
-        train_ds = ds.get_sub_dataset(train_idxs)
-        is_cv = val_idxs is not None
-        val_ds = ds.get_sub_dataset(val_idxs) if is_cv else None
-
-        # create preprocessing factory
-        factory = self.config.get('factory', None)
-        if factory is None:
-            factory = PreprocessingFactory(**self.config)
-
-        # transform according to factory
-        fitter = factory.create(ds.tensor_infos)
-        if is_cv:
-            trainval_ds = ds.get_sub_dataset(torch.cat([train_idxs, val_idxs], dim=0))
-        else:
-            trainval_ds = train_ds
-        self.tfm = fitter.fit(trainval_ds)
-        train_ds = self.tfm.forward_ds(train_ds)
-        if is_cv:
-            val_ds = self.tfm.forward_ds(val_ds)
+        with _global_rng_lock:  # see SingleSplitWrapperAlgInterface.fit()
+            torch.manual_seed(seed)  # can be useful for label encoding with randomized permutation
+            np.random.seed(seed)
+            random.seed(seed)
+            self.n_classes = ds.get_n_classes()
+            train_idxs = idxs_list[0].train_idxs[0]
+            val_idxs = idxs_list[0].val_idxs[0] if idxs_list[0].val_idxs is not None else None
+            train_ds = ds.get_sub_dataset(train_idxs)
+            is_cv = val_idxs is not None
+            val_ds = ds.get_sub_dataset(val_idxs) if is_cv else None
+
+            # create preprocessing factory
+            factory = self.config.get('factory', None)
+            if factory is None:
+                factory = PreprocessingFactory(**self.config)
+
+            # transform according to factory
+            fitter = factory.create(ds.tensor_infos)
+            if is_cv:
+                trainval_ds = ds.get_sub_dataset(torch.cat([train_idxs, val_idxs], dim=0))
+            else:
+                trainval_ds = train_ds
+            self.tfm = fitter.fit(trainval_ds)
+            train_ds = self.tfm.forward_ds(train_ds)
+            if is_cv:
+                val_ds = self.tfm.forward_ds(val_ds)
 
         params = self._get_params()
         if self.fit_params is not None:
@@ -295,10 +335,29 @@ class TreeBasedSubSplitInterface(SingleSplitAlgInterface):  # todo: insert more
                    for dev_str in interface_resources.gpu_devices if dev_str.startswith('cuda:')]
         if len(gpu_ids) > 0 and self.config.get('allow_gpu', True):
             params['device'] = f'cuda:{gpu_ids[0]}'  # this is for XGBoost 2.0
-        self.model, val_errors = self._fit(train_ds, val_ds, params=params, seed=seed,
-                                           n_threads=interface_resources.n_threads,
-                                           val_metric_name=self.config.get('val_metric_name', None),
-                                           tmp_folder=tmp_folders[0])
+
+        n_estimators = int(params.get('n_estimators', self.config.get('n_estimators', 1000)))
+        init_interface, self.init_interface = self.init_interface, None  # don't keep the old model around
+        if init_interface is not None and is_cv and self.fit_params is None:
+            prev_val_errors = list(init_interface.val_errors)
+            if len(prev_val_errors) >= n_estimators or len(prev_val_errors) < init_interface.n_estimators:
+                # trained long enough already, or early stopping has been triggered before
+                self.model, val_errors = init_interface.model, []
+            else:
+                # boost the remaining rounds starting from the previous model
+                params['n_estimators'] = n_estimators - len(prev_val_errors)
+                self.model, val_errors = self._fit(train_ds, val_ds, params=params, seed=seed,
+                                                   n_threads=interface_resources.n_threads,
+                                                   val_metric_name=self.config.get('val_metric_name', None),
+                                                   tmp_folder=tmp_folders[0], init_model=init_interface.model)
+            val_errors = prev_val_errors + list(val_errors)
+        else:
+            self.model, val_errors = self._fit(train_ds, val_ds, params=params, seed=seed,
+                                               n_threads=interface_resources.n_threads,
+                                               val_metric_name=self.config.get('val_metric_name', None),
+                                               tmp_folder=tmp_folders[0])
+        self.val_errors = val_errors
+        self.n_estimators = n_estimators
         if val_errors is None:
             return None
         else:
@@ -312,9 +371,32 @@ class TreeBasedSubSplitInterface(SingleSplitAlgInterface):  # todo: insert more
         return self._predict(self.model, ds, self.n_classes,
                              self.fit_params[0] if self.fit_params is not None else dict())[None]
 
+    def _use_converted_ds(self, ds: DictDataset, convert_fn: Callable[[], Any],
+                          *key_parts: Hashable) -> ContextManager[Any]:
+        """
+        Converts a dataset to the format of the GBDT library,
+        reusing previous conversions of identical data if use_gbdt_dataset_cache=True is set in the config.
+        The converted dataset should only be used while the returned context is active,
+        since cached datasets must not be used by multiple threads at the same time.
+
+        :param ds: (Preprocessed) dataset.
+        :param convert_fn: Function performing the conversion.
+        :param key_parts: Further parts of the cache key, e.g., parameters that are used for binning.
+        :return: Context manager providing the converted dataset.
+        """
+        if not self.config.get('use_gbdt_dataset_cache', False):
+            return contextlib.nullcontext(convert_fn())
+        key = (self.__class__.__name__, GBDTDatasetCache.get_fingerprint(ds)) + tuple(key_parts)
+        n_bytes = sum(tensor.nbytes for tensor in ds.tensors.values())
+        return gbdt_dataset_cache.use(key, convert_fn, n_bytes=n_bytes)
+
     def _fit(self, train_ds: DictDataset, val_ds: Optional[DictDataset], params: Dict[str, Any], seed: int,
              n_threads: int, val_metric_name: Optional[str] = None,
-             tmp_folder: Optional[Path] = None) -> Tuple[Any, Optional[List[float]]]:
+             tmp_folder: Optional[Path] = None, init_model: Optional[Any] = None) -> Tuple[Any, Optional[List[float]]]:
+        """
+        :param init_model: Model to continue training from. In this case, params['n_estimators']
+            is the number of additional boosting rounds, and only their validation errors are returned.
+        """
         raise NotImplementedError()
 
     def _predict(self, bst: Any, ds: DictDataset, n_classes: int, other_params: Dict[str, Any]) -> torch.Tensor:
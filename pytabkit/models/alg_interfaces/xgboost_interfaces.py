@@ -1,3 +1,4 @@
+import contextlib
 import copy
 from pathlib import Path
 from typing import Optional, Dict, Any, Tuple, List
@@ -12,7 +13,7 @@ from pytabkit.models.alg_interfaces.base import RequiredResources
 from pytabkit.models.alg_interfaces.sub_split_interfaces import TreeBasedSubSplitInterface, SingleSplitWrapperAlgInterface, \
     SklearnSubSplitInterface
 from pytabkit.models.data.data import DictDataset
-from pytabkit.models.hyper_opt.hyper_optimizers import HyperoptOptimizer
+from pytabkit.models.hyper_opt.hyper_optimizers import HyperoptOptimizer, SuccessiveHalvingOptimizer
 import xgboost as xgb
 from xgboost import XGBClassifier, XGBRegressor
 
@@ -166,18 +167,22 @@ class XGBSubSplitInterface(TreeBasedSubSplitInterface):
 
     def _convert_ds(self, ds: DictDataset) -> Any:
         label = None if 'y' not in ds.tensors else ds.tensors['y'].cpu().numpy()
-        has_cat = 'x_cat' in ds.tensor_infos and ds.tensor_infos['x_cat'].get_n_features() > 0
-        x_df = ds.without_labels().to_df()
-        return xgb.DMatrix(x_df, label, enable_categorical=has_cat)
+        # pass the categorical features as codes together with the feature types instead of building a DataFrame
+        x, cat_col_idxs = ds.without_labels().to_numpy()
+        feature_types = ['c' if i in cat_col_idxs else 'q' for i in range(x.shape[1])]
+        return xgb.DMatrix(x, label, feature_types=feature_types, enable_categorical=len(cat_col_idxs) > 0)
 
     def _fit(self, train_ds: DictDataset, val_ds: Optional[DictDataset], params: Dict[str, Any], seed: int,
              n_threads: int, val_metric_name: Optional[str] = None,
-             tmp_folder: Optional[Path] = None) -> Tuple[Any, Optional[List[float]]]:
+             tmp_folder: Optional[Path] = None, init_model: Optional[Any] = None) -> Tuple[Any, Optional[List[float]]]:
         # print(f'Fitting XGBoost')
         n_classes = train_ds.tensor_infos['y'].get_cat_sizes()[0].item()
         params = self._preprocess_params(params, n_classes)
         params.update({'seed': seed, 'nthread': n_threads})
-        evals = [] if val_ds is None else [(self._convert_ds(val_ds), 'val')]
+        if init_model is not None:
+            # the random generator of XGBoost is not re-seeded when continuing training from a model,
+            # which would make the subsampling depend on the training previously run in the same thread
+            params['seed_per_iteration'] = True
         evals_result = {}
 
         feval = None
@@ -213,9 +218,15 @@ class XGBSubSplitInterface(TreeBasedSubSplitInterface):
             # can happen for refit because fit_params are directly joined into params
             n_estimators = int(params['n_estimators'])
 
-        bst = xgb.train(params, self._convert_ds(train_ds), evals=evals, evals_result=evals_result, custom_metric=feval,
-                        num_boost_round=n_estimators, verbose_eval=False,
-                        **extra_train_params)
+        # the DMatrix stores the histogram index computed in the first training,
+        # so reusing it across folds, HPO steps and refits also avoids recomputing the bins
+        val_context = contextlib.nullcontext(None) if val_ds is None \
+            else self._use_converted_ds(val_ds, lambda: self._convert_ds(val_ds))
+        with self._use_converted_ds(train_ds, lambda: self._convert_ds(train_ds)) as dtrain, val_context as dval:
+            evals = [] if dval is None else [(dval, 'val')]
+            bst = xgb.train(params, dtrain, evals=evals, evals_result=evals_result, custom_metric=feval,
+                            num_boost_round=n_estimators, verbose_eval=False, xgb_model=init_model,
+                            **extra_train_params)
 
         if val_ds is not None:
             val_errors = evals_result['val'][eval_metric_name]
@@ -226,7 +237,8 @@ class XGBSubSplitInterface(TreeBasedSubSplitInterface):
     def _predict(self, bst: xgb.Booster, ds: DictDataset, n_classes: int, other_params: Dict[str, Any]) -> torch.Tensor:
         # print(f'XGB _predict() with {other_params=}')
         iteration_range = (0, 0) if other_params is None else (0, int(other_params['n_estimators']))
-        y_pred = torch.as_tensor(bst.predict(self._convert_ds(ds), iteration_range=iteration_range), dtype=torch.float32)
+        with self._use_converted_ds(ds, lambda: self._convert_ds(ds)) as dmatrix:
+            y_pred = torch.as_tensor(bst.predict(dmatrix, iteration_range=iteration_range), dtype=torch.float32)
         if n_classes == 0:
             y_pred = y_pred.unsqueeze(-1)
         elif n_classes == 2:
@@ -249,7 +261,7 @@ class XGBSubSplitInterface(TreeBasedSubSplitInterface):
 
 
 class XGBHyperoptAlgInterface(OptAlgInterface):
-    def __init__(self, space=None, n_hyperopt_steps: int = 50, **config):
+    def __init__(self, space=None, n_hyperopt_steps: int = 50, opt_method: str = 'hyperopt', **config):
         from hyperopt import hp
         default_config = {}
         max_config = dict()
@@ -374,9 +386,10 @@ class XGBHyperoptAlgInterface(OptAlgInterface):
             max_config['max_depth'] = 11
 
         config = utils.update_dict(default_config, config)
-        super().__init__(hyper_optimizer=HyperoptOptimizer(space=space, fixed_params=dict(),
-                                                           n_hyperopt_steps=n_hyperopt_steps,
-                                                           **config),
+        opt_class = SuccessiveHalvingOptimizer if opt_method == 'successive_halving' else HyperoptOptimizer
+        super().__init__(hyper_optimizer=opt_class(space=space, fixed_params=dict(),
+                                                   n_hyperopt_steps=n_hyperopt_steps,
+                                                   **config),
                          max_resource_config=utils.join_dicts(config, max_config),
                          **config)
 
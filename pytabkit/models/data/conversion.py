@@ -19,6 +19,39 @@ class ToDictDatasetConverter:
         self.tensor_infos = None
         self.fitted_columns = None
         self.fitted_type = None
+        # column layout cached at fit time, such that transform() can skip the column set comparison
+        # and the ColumnTransformers if the columns are the same (and in the same order) as in fit_transform()
+        self.fitted_column_index = None
+        self.is_all_numeric = False
+        self.uses_numpy_fast_path = False
+
+    def _is_numeric_array(self, x) -> bool:
+        return isinstance(x, np.ndarray) and x.ndim == 2 and np.issubdtype(x.dtype, np.number) \
+            and not np.issubdtype(x.dtype, np.complexfloating) \
+            and (self.cat_features is None or not np.any(self.cat_features))
+
+    def accepts_array(self, x) -> bool:
+        """
+        :param x: Input data.
+        :return: Whether x can be passed to fit_transform() or transform() directly,
+            without converting it to a DataFrame first (which would copy it).
+        """
+        if self.fitted:
+            return self.uses_numpy_fast_path and isinstance(x, np.ndarray) and x.ndim == 2
+        return self._is_numeric_array(x)
+
+    @staticmethod
+    def _to_float_tensor(x: np.ndarray) -> torch.Tensor:
+        # zero-copy if x is already a C-contiguous float32 array
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        if not x.flags.writeable:
+            x = x.copy()  # torch.from_numpy() does not support read-only arrays
+        return torch.from_numpy(x)
+
+    def _numeric_to_ds(self, x: np.ndarray) -> DictDataset:
+        x_cont = self._to_float_tensor(x)
+        x_cat = torch.zeros(x_cont.shape[0], 0, dtype=torch.long)
+        return DictDataset(tensors={'x_cont': x_cont, 'x_cat': x_cat}, tensor_infos=self.tensor_infos)
 
     def fit_transform(self, x: Union[np.ndarray, pd.DataFrame, pd.Series, DictDataset]) -> DictDataset:
         self.fitted = True
@@ -27,8 +60,19 @@ class ToDictDatasetConverter:
         if isinstance(x, DictDataset):
             return x
 
+        if self._is_numeric_array(x):
+            # fast path for purely numerical arrays, avoids the conversion to a DataFrame
+            self.uses_numpy_fast_path = True
+            self.is_all_numeric = True
+            self.fitted_column_index = pd.RangeIndex(x.shape[1])
+            self.fitted_columns = set(self.fitted_column_index)
+            self.tensor_infos = {'x_cont': TensorInfo(feat_shape=[x.shape[1]]),
+                                 'x_cat': TensorInfo(cat_sizes=torch.zeros(0, dtype=torch.long))}
+            return self._numeric_to_ds(x)
+
         x = pd.DataFrame(x)
         self.fitted_columns = set(x.columns)
+        self.fitted_column_index = x.columns
 
         if self.cat_features is not None:
             cat_columns = list(x.columns[self.cat_features])
@@ -65,6 +109,10 @@ class ToDictDatasetConverter:
                     # print(f'Columns classified as {name}: {list(cols)}')
                     pass
 
+        num_columns = list(self.num_tf.transformers_[0][2])
+        cat_columns = list(self.cat_tf.transformers_[0][2])
+        self.is_all_numeric = len(cat_columns) == 0 and num_columns == list(x.columns)
+
         cat_sizes = torch.max(x_cat, dim=0)[0] + 1
         self.tensor_infos = {'x_cont': TensorInfo(feat_shape=x_cont.shape[1:]),
                              'x_cat': TensorInfo(cat_sizes=cat_sizes)}
@@ -74,21 +122,40 @@ class ToDictDatasetConverter:
     def transform(self, x: Union[np.ndarray, pd.DataFrame, pd.Series, DictDataset]) -> DictDataset:
         if not self.fitted:
             raise ValueError("Call fit() first to fit the converter.")
-        if not isinstance(x, self.fitted_type):
+        if self.uses_numpy_fast_path and not isinstance(x, np.ndarray):
+            # e.g., a DataFrame or list, which was converted to a numerical array in fit_transform() before
+            x = pd.DataFrame(x)
+            if set(x.columns) != self.fitted_columns:
+                raise ValueError(f'Different columns during fit() and predict(): '
+                                 f'{self.fitted_columns} and {set(x.columns)}')
+            x = x[self.fitted_column_index].to_numpy(dtype=np.float32, na_value=np.nan)
+        elif not isinstance(x, self.fitted_type):
             raise ValueError(f'Different input types during fit and predict: {self.fitted_type} and {type(x)}')
 
         if isinstance(x, DictDataset):
             # todo: could check whether cat_sizes etc. match?
             return x
 
+        if self.uses_numpy_fast_path:
+            if x.ndim != 2 or x.shape[1] != len(self.fitted_column_index):
+                raise ValueError(f'Different number of columns during fit() and predict(): '
+                                 f'{len(self.fitted_column_index)} and {x.shape[1] if x.ndim == 2 else None}')
+            return self._numeric_to_ds(x)
+
         x = pd.DataFrame(x)
 
         # print(set(x.columns), self.fitted_columns)
 
-        if set(x.columns) != self.fitted_columns:
+        same_layout = x.columns.equals(self.fitted_column_index)
+        if not same_layout and set(x.columns) != self.fitted_columns:
             print('Raising column error')
             raise ValueError(f'Different columns during fit() and predict(): {self.fitted_columns} and {set(x.columns)}')
 
+        if same_layout and self.is_all_numeric:
+            # all columns are numerical and in the same order as during fit(),
+            # so the ColumnTransformers would only copy the data
+            return self._numeric_to_ds(x.to_numpy(dtype=np.float32, na_value=np.nan))
+
         x_cont = torch.as_tensor(self.num_tf.transform(x), dtype=torch.float32)
         x_cat = torch.as_tensor(self.cat_tf.transform(x) + 1, dtype=torch.long)
 
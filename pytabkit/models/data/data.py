@@ -1,5 +1,6 @@
 import math
-from typing import Optional, Union, List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union, List, Dict, Tuple, Callable
 
 import numpy as np
 import pandas as pd
@@ -9,6 +10,10 @@ from pytabkit.models import utils
 from pytabkit.models.torch_utils import seeded_randperm, batch_randperm
 
 
+def _to_long_if_int32(t: torch.Tensor) -> torch.Tensor:
+    return t.type(torch.long) if t.dtype == torch.int32 else t
+
+
 class TaskType:
     CLASSIFICATION = 'classification'
     REGRESSION = 'regression'
@@ -109,8 +114,30 @@ class DictDataset:
 
         return pd.concat(tensor_dfs, axis=1)
 
+    def to_numpy(self) -> Tuple[np.ndarray, List[int]]:
+        """
+        Alternative to to_df() for libraries that accept categorical features as numeric codes,
+        which avoids the DataFrame construction and the conversion of each categorical column.
+
+        :return: Tuple of a float32 array with the columns of all tensors (in the same order as in to_df())
+            and the indices of the columns that are categorical. Categorical columns contain the category indices.
+        """
+        arrays = []
+        cat_col_idxs = []
+        n_cols = 0
+        for key in self.tensors:
+            val_np = self.tensors[key].detach().cpu().numpy()
+            if self.tensor_infos[key].is_cat():
+                cat_col_idxs.extend(range(n_cols, n_cols + val_np.shape[1]))
+            arrays.append(val_np.astype(np.float32, copy=False))
+            n_cols += val_np.shape[1]
+        x = arrays[0] if len(arrays) == 1 else np.concatenate(arrays, axis=1)
+        return np.ascontiguousarray(x), cat_col_idxs
+
     def get_batch(self, idxs) -> Dict[str, torch.Tensor]:
-        return {key: t[idxs, :] for key, t in self.tensors.items()}
+        # only the rows in idxs are gathered, which is important for memory-mapped tensors
+        # int32 tensors (memory-mapped x_cat, see TaskInfo.load_task()) are converted to int64 after gathering
+        return {key: _to_long_if_int32(t[idxs, :]) for key, t in self.tensors.items()}
 
     def get_sub_dataset(self, idxs) -> 'DictDataset':
         return DictDataset(self.get_batch(idxs), self.tensor_infos, device=self.device)
@@ -131,7 +158,9 @@ class DictDataset:
                            utils.join_dicts(*[ds.tensor_infos for ds in datasets]))
 
     def to(self, device):
-        return DictDataset(self.tensors, self.tensor_infos, device=device)
+        # models using the full dataset need int64 categorical tensors
+        return DictDataset({key: _to_long_if_int32(t) for key, t in self.tensors.items()}, self.tensor_infos,
+                           device=device)
 
     def __getitem__(self, key):
         if isinstance(key, list):
@@ -151,7 +180,7 @@ class DictDataset:
 class ParallelDictDataLoader:
     def __init__(self, ds: DictDataset, idxs: torch.Tensor, batch_size: int, shuffle: bool = False,
                  adjust_bs: bool = False, drop_last: bool = False,
-                 output_device: Optional[Union[str, torch.device]] = None):
+                 output_device: Optional[Union[str, torch.device]] = None, share_idxs: bool = True):
         """
         :param dataset: A TaskData instance
         :param batch_size: default batch size, might be automatically adjusted
@@ -161,11 +190,23 @@ class ParallelDictDataLoader:
         :param drop_last: whether the last batch should be omitted if it is smaller than the other ones
         :param output_device: The device that the returned data should be on
         (if None, take the device where the data already is)
+        :param share_idxs: Whether to check if all parallel models use the same indices
+        (e.g., in refitting or prediction). In this case, the rows of unshuffled batches are only gathered once
+        and the returned tensors are expanded (non-contiguous) views. Shuffled batches still contain different rows
+        for each model, but the rows can be gathered without going through the index tensor of each model.
         """
         self.ds = ds
         self.idxs = idxs.to(ds.device)
         self.n_parallel = idxs.shape[0]
         self.n_samples = idxs.shape[1]
+        # indices shared by all models, or None
+        self.shared_idxs = None
+        # whether shared_idxs is arange(ds.n_samples), such that unshuffled batches can be obtained by slicing
+        self.shared_idxs_are_range = False
+        if share_idxs and self.n_parallel > 0 and torch.equal(self.idxs, self.idxs[:1].expand_as(self.idxs)):
+            self.shared_idxs = self.idxs[0]
+            self.shared_idxs_are_range = self.n_samples == ds.n_samples and torch.equal(
+                self.shared_idxs, torch.arange(self.n_samples, device=self.shared_idxs.device))
         self.output_device = ds.device if output_device is None else output_device
         self.adjust_bs = adjust_bs
         self.shuffle = shuffle
@@ -195,27 +236,148 @@ class ParallelDictDataLoader:
     def __len__(self):
         return self.n_batches
 
+    def _get_shared_batch(self, start: int, stop: int) -> Dict[str, torch.Tensor]:
+        # gathers the rows of an unshuffled batch only once, the tensors have a leading dimension of size 1
+        if self.shared_idxs_are_range:
+            return {key: _to_long_if_int32(t[None, start:stop]) for key, t in self.ds.tensors.items()}
+        return self.ds.get_batch(idxs=self.shared_idxs[None, start:stop])
+
+    def _get_shuffled_batch_idxs(self, perms: torch.Tensor, start: int, stop: int) -> torch.Tensor:
+        if self.shared_idxs_are_range:
+            return perms[:, start:stop]
+        elif self.shared_idxs is not None:
+            return self.shared_idxs[perms[:, start:stop]]
+        return self.idxs.gather(1, perms[:, start:stop])
+
     def __iter__(self):
         if self.shuffle:
             perms = batch_randperm(self.n_parallel, self.n_samples, device=self.ds.device)
             for start, stop in zip(self.sep_idxs[:-1], self.sep_idxs[1:]):
-                batches = self.ds.get_batch(idxs=self.idxs.gather(1, perms[:, start:stop]))
+                batches = self.ds.get_batch(idxs=self._get_shuffled_batch_idxs(perms, start, stop))
                 yield {key: t.to(self.output_device) for key, t in batches.items()}
+        elif self.shared_idxs is not None:
+            for start, stop in zip(self.sep_idxs[:-1], self.sep_idxs[1:]):
+                batches = self._get_shared_batch(start, stop)
+                # move before expanding such that only one copy is transferred
+                yield {key: t.to(self.output_device).expand(self.n_parallel, *t.shape[1:])
+                       for key, t in batches.items()}
         else:
             for start, stop in zip(self.sep_idxs[:-1], self.sep_idxs[1:]):
                 batches = self.ds.get_batch(idxs=self.idxs[:, start:stop])
                 yield {key: t.to(self.output_device) for key, t in batches.items()}
 
 
+class HostDictDataLoader(ParallelDictDataLoader):
+    """
+    Version of ParallelDictDataLoader for data sets that are too large for the memory of the training device.
+    The data set stays on the host, where it may also be memory-mapped (see TaskInfo.load_task()).
+    For each batch, only the required rows are gathered on the CPU (into pinned memory if the output device is a GPU)
+    and then copied to the output device. The next batch is gathered in a background thread
+    and copied on a separate CUDA stream while the current batch is being processed.
+    """
+    def __init__(self, ds: DictDataset, idxs: torch.Tensor, batch_size: int, shuffle: bool = False,
+                 adjust_bs: bool = False, drop_last: bool = False,
+                 output_device: Optional[Union[str, torch.device]] = None,
+                 transform: Optional[Callable[[Dict[str, torch.Tensor]], Dict[str, torch.Tensor]]] = None,
+                 share_idxs: bool = True):
+        """
+        :param ds: Data set on the CPU.
+        :param transform: Transformation that is applied to each (flattened) batch on the output device,
+        e.g., the static part of a NN model that would otherwise be applied to the whole data set.
+        Other parameters are as in ParallelDictDataLoader.
+        """
+        super().__init__(ds, idxs, batch_size=batch_size, shuffle=shuffle, adjust_bs=adjust_bs, drop_last=drop_last,
+                         output_device=output_device, share_idxs=share_idxs)
+        self.transform = transform
+        self.use_cuda = torch.device(self.output_device).type == 'cuda'
+
+    def _gather(self, idxs: torch.Tensor) -> Dict[str, torch.Tensor]:
+        # gather the rows of the flattened n_parallel x batch_size index tensor
+        flat_idxs = idxs.reshape(-1)
+        batch = {}
+        for key, t in self.ds.tensors.items():
+            out = torch.empty(flat_idxs.shape[0], *t.shape[1:], dtype=t.dtype, pin_memory=self.use_cuda)
+            batch[key] = torch.index_select(t, 0, flat_idxs, out=out)
+        return batch
+
+    def _to_output_device(self, batch: Dict[str, torch.Tensor], stream) -> Dict[str, torch.Tensor]:
+        if stream is None:
+            return {key: t.to(self.output_device) for key, t in batch.items()}
+        with torch.cuda.stream(stream):
+            # non_blocking is possible since the source tensors are in pinned memory
+            return {key: t.to(self.output_device, non_blocking=True) for key, t in batch.items()}
+
+    def _finish(self, batch: Dict[str, torch.Tensor], stream) -> Dict[str, torch.Tensor]:
+        if stream is not None:
+            current_stream = torch.cuda.current_stream(self.output_device)
+            current_stream.wait_stream(stream)
+            for t in batch.values():
+                # the tensors have been allocated on the side stream but will be used on the current stream
+                t.record_stream(current_stream)
+        batch = {key: _to_long_if_int32(t) for key, t in batch.items()}
+        if self.transform is not None:
+            batch = self.transform(batch)
+        # with shared indices, unshuffled batches only contain the rows for one model
+        n_idx_rows = 1 if self.shared_idxs is not None and not self.shuffle else self.n_parallel
+        return {key: t.reshape(n_idx_rows, -1, *t.shape[1:]).expand(self.n_parallel, *([-1] * t.dim()))
+                for key, t in batch.items()}
+
+    def __iter__(self):
+        if self.shuffle:
+            perms = batch_randperm(self.n_parallel, self.n_samples)
+            batch_idxs = [self._get_shuffled_batch_idxs(perms, start, stop)
+                          for start, stop in zip(self.sep_idxs[:-1], self.sep_idxs[1:])]
+        elif self.shared_idxs is not None:
+            batch_idxs = [self.shared_idxs[None, start:stop]
+                          for start, stop in zip(self.sep_idxs[:-1], self.sep_idxs[1:])]
+        else:
+            batch_idxs = [self.idxs[:, start:stop] for start, stop in zip(self.sep_idxs[:-1], self.sep_idxs[1:])]
+        if len(batch_idxs) == 0:
+            return
+
+        stream = torch.cuda.Stream(self.output_device) if self.use_cuda else None
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_batch = self._to_output_device(executor.submit(self._gather, batch_idxs[0]).result(), stream)
+            for i in range(len(batch_idxs)):
+                batch = next_batch
+                if i + 1 < len(batch_idxs):
+                    # gather the next batch in the background and copy it while the current batch is used
+                    future = executor.submit(self._gather, batch_idxs[i + 1])
+                    batch = self._finish(batch, stream)
+                    next_batch = self._to_output_device(future.result(), stream)
+                else:
+                    batch = self._finish(batch, stream)
+                yield batch
+
+
 class ValDictDataLoader:
-    def __init__(self, ds: DictDataset, val_idxs: torch.Tensor, val_batch_size=256):
+    def __init__(self, ds: DictDataset, val_idxs: torch.Tensor, val_batch_size=256,
+                 output_device: Optional[Union[str, torch.device]] = None,
+                 transform: Optional[Callable[[Dict[str, torch.Tensor]], Dict[str, torch.Tensor]]] = None):
         """
-        Create a Prediction Dataloader from Dataset and validation indices
+        Create a Prediction Dataloader from Dataset and validation indices.
+        If output_device is specified, the data set is kept on its device and batches are loaded
+        with HostDictDataLoader, see there for the meaning of transform.
         """
         ds_x, ds_y = ds.split_xy()
-        self.val_x_dl = ParallelDictDataLoader(ds_x, val_idxs, batch_size=val_batch_size)
         self.val_idxs = val_idxs
-        self.val_y = ds_y.get_batch(val_idxs).get('y', None)
+        if output_device is None:
+            self.val_x_dl = ParallelDictDataLoader(ds_x, val_idxs, batch_size=val_batch_size)
+            if self.val_x_dl.shared_idxs is not None:
+                # only gather the labels once if all models use the same validation set
+                val_y = ds_y.get_batch(val_idxs[:1]).get('y', None)
+                self.val_y = None if val_y is None else val_y.expand(val_idxs.shape[0], *val_y.shape[1:])
+            else:
+                self.val_y = ds_y.get_batch(val_idxs).get('y', None)
+        else:
+            self.val_x_dl = HostDictDataLoader(ds_x, val_idxs, batch_size=val_batch_size,
+                                               output_device=output_device, transform=transform)
+            self.val_y = None
+            if 'y' in ds.tensors:
+                # the transform might modify y (e.g. conversion to soft labels), and it might need the other tensors
+                val_dl = HostDictDataLoader(ds, val_idxs, batch_size=val_batch_size, output_device=output_device,
+                                            transform=transform)
+                self.val_y = torch.cat([batch['y'] for batch in val_dl], dim=1)
         self.n_samples = val_idxs.shape[1]
 
     def __len__(self):
@@ -1,10 +1,10 @@
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, Future
 from pathlib import Path
-from typing import Callable, Tuple, Any, Dict, Union
+from typing import Callable, Tuple, Any, Dict, Union, Optional, List
 
 import numpy as np
-from ConfigSpace import Configuration
-from smac.initial_design import SobolInitialDesign
 
 from pytabkit.models import utils
 from pytabkit.models.training.logging import Logger
@@ -21,22 +21,40 @@ class FunctionEvaluationTracker:
         self.logger = logger
         self.best_params = None
         self.best_result = None
+        self.best_step = None
         self.n_calls = 0
+        self.lock = threading.Lock()
+        # whether the additional information is returned, e.g., to resume training in multi-fidelity optimization
+        self.return_info = False
 
-    def __call__(self, params: dict) -> Tuple[float, Any]:
+    def __call__(self, params: dict, step: Optional[int] = None, **kwargs) -> Tuple[float, Any]:
+        """
+        :param params: Parameters to evaluate f at.
+        :param step: Index of the step (starting at 1) when the function is evaluated in parallel.
+            It is passed on to f, such that f can store results per step independent of the order of evaluation.
+        :param kwargs: Further keyword arguments for f.
+        """
         # params = utils.join_dicts(params, self.fixed_params)
         start_time = time.time()
-        result = self.f(params)
+        result = self.f(params, **kwargs) if step is None else self.f(params, step=step, **kwargs)
         if np.isnan(result[0]):
             result = (np.Inf, result[1])
         eval_time = time.time() - start_time
-        if self.best_result is None or (result[0] <= self.best_result[0]):
-            # print(f'new best result')
-            self.best_params = params
-            self.best_result = result
-        self.n_calls += 1
-        self.logger.log(-1, f'Hyperopt step {self.n_calls}/{self.n_steps} on {self.opt_desc} took {eval_time:g} s')
-
+        with self.lock:
+            self.n_calls += 1
+            if step is None:
+                step = self.n_calls
+            # for ties, prefer the later step, independent of the order in which parallel steps finish
+            if self.best_result is None or result[0] < self.best_result[0] or (
+                    result[0] == self.best_result[0] and step > self.best_step):
+                # print(f'new best result')
+                self.best_params = params
+                self.best_result = result
+                self.best_step = step
+            self.logger.log(-1, f'Hyperopt step {step}/{self.n_steps} on {self.opt_desc} took {eval_time:g} s')
+
+        if self.return_info:
+            return result
         # don't return the second part of result as HPO libraries might store all of them, causing RAM problems
         return result[0], None
 
@@ -52,8 +70,12 @@ class HyperOptimizer:
         # override this in subclasses
         raise NotImplementedError()
 
-    def optimize(self, f: Callable[[dict], Tuple[float, Any]], seed: int, opt_desc: str, logger: Logger) \
-            -> Tuple[Dict, Any]:
+    def _optimize_parallel_impl(self, f: FunctionEvaluationTracker, seed: int, n_parallel: int) -> None:
+        # override this in subclasses that can propose multiple configurations before receiving all results
+        self._optimize_impl(f, seed=seed)
+
+    def optimize(self, f: Callable[[dict], Tuple[float, Any]], seed: int, opt_desc: str, logger: Logger,
+                 n_parallel: int = 1) -> Tuple[Dict, Any]:
         """
         :param f: Function to minimize. It should take a dict of parameters
         and return a tuple containing the validation loss and additional information about the run
@@ -63,14 +85,20 @@ class HyperOptimizer:
         :param opt_desc: name of the optimized algorithm / optimization problem
          (used for printing optimization intermediate state)
         :param logger: Logger used for printing information
+        :param n_parallel: Maximum number of evaluations of f that run concurrently (in threads).
+            If n_parallel > 1 and the optimizer supports it, f is additionally passed the index of the step
+            (starting at 1) as keyword argument step.
+            The proposed configurations only depend on n_parallel and the seed, not on the order of completion.
         :return: Returns a tuple containing a dictionary with the optimal parameters
         and the additional info generated by the function at the optimal parameters
         """
         # todo: could also add verbosity level
         # todo: may need to be able to treat failures, hence make the tuple optional?
-        # todo: could allow to pass the iteration number to the function
         tracker = FunctionEvaluationTracker(f, n_steps=self.n_hyperopt_steps, opt_desc=opt_desc, logger=logger)
-        self._optimize_impl(tracker, seed=seed)
+        if n_parallel > 1:
+            self._optimize_parallel_impl(tracker, seed=seed, n_parallel=n_parallel)
+        else:
+            self._optimize_impl(tracker, seed=seed)
         best_params, best_result = tracker.get_best_params_and_result()
         return best_params, best_result[1]
 
@@ -126,11 +154,11 @@ class HyperoptOptimizer(HyperOptimizer):
             self.f = f
             self.fixed_params = fixed_params
 
-        def __call__(self, params: dict):
+        def __call__(self, params: dict, step: Optional[int] = None):
             params = f_unpack_dict(params)  # for nested/conditional params
             from hyperopt import STATUS_FAIL, STATUS_OK
             params = utils.join_dicts(params, self.fixed_params)
-            loss, additional_info = self.f(params)
+            loss, additional_info = self.f(params) if step is None else self.f(params, step=step)
             return {'loss': loss, 'additional_info': additional_info,
                     'status': STATUS_FAIL if np.isnan(loss) else STATUS_OK,
                     'params': params.copy()}
@@ -141,9 +169,8 @@ class HyperoptOptimizer(HyperOptimizer):
         self.fixed_params = fixed_params
         self.config = config
 
-    def _optimize_impl(self, f: Callable[[dict], Tuple[float, Any]], seed: int) -> None:
+    def _get_algo(self) -> Callable:
         import hyperopt
-        trials = hyperopt.Trials()  # todo: could serialize the trials object for restarting
         algo_name = self.config.get('hyperopt_algo', 'tpe')
         if algo_name == 'tpe':
             algo = hyperopt.tpe.suggest
@@ -157,11 +184,57 @@ class HyperoptOptimizer(HyperOptimizer):
             algo = hyperopt.rand.suggest
         else:
             raise ValueError(f'Unknown hyperopt_algo name "{algo_name}"')
+        return algo
+
+    def _optimize_impl(self, f: Callable[[dict], Tuple[float, Any]], seed: int) -> None:
+        import hyperopt
+        trials = hyperopt.Trials()  # todo: could serialize the trials object for restarting
         fn = HyperoptOptimizer.HyperoptFuncWrapper(f, self.fixed_params)
         _ = hyperopt.fmin(fn=fn,
-                          space=self.space, algo=algo, max_evals=self.n_hyperopt_steps, trials=trials,
+                          space=self.space, algo=self._get_algo(), max_evals=self.n_hyperopt_steps, trials=trials,
                           rstate=np.random.default_rng(seed=seed), verbose=False, show_progressbar=False)
 
+    def _optimize_parallel_impl(self, f: FunctionEvaluationTracker, seed: int, n_parallel: int) -> None:
+        # Step i is proposed once steps 1, ..., i - n_parallel are finished.
+        # The other (pending) steps are inserted into the trials with a constant liar loss,
+        # the worst loss observed so far, such that the proposals in a batch do not coincide.
+        # Results of pending steps that happen to be finished already are not used,
+        # which makes the proposals independent of the order of completion.
+        import hyperopt
+        from hyperopt import base
+        algo = self._get_algo()
+        fn = HyperoptOptimizer.HyperoptFuncWrapper(f, self.fixed_params)
+        domain = base.Domain(fn, self.space)
+        trials = hyperopt.Trials()
+        rstate = np.random.default_rng(seed=seed)
+        futures: List[Future] = []
+        results: List[Optional[Dict[str, Any]]] = []
+
+        with ThreadPoolExecutor(max_workers=n_parallel) as executor:
+            for step_idx in range(self.n_hyperopt_steps):
+                n_known = max(0, step_idx - n_parallel + 1)
+                for i in range(n_known):
+                    if results[i] is None:
+                        results[i] = futures[i].result()
+                known_losses = [result['loss'] for result in results[:n_known]
+                                if result['status'] == 'ok' and np.isfinite(result['loss'])]
+                liar_result = {'status': 'ok', 'loss': max(known_losses) if len(known_losses) > 0 else 0.0}
+                for i, trial in enumerate(trials._dynamic_trials):
+                    trial['state'] = base.JOB_STATE_DONE
+                    trial['result'] = results[i] if i < n_known else liar_result
+                trials.refresh()
+
+                new_trials = algo(trials.new_trial_ids(1), domain, trials, rstate.integers(2 ** 31 - 1))
+                trials.insert_trial_docs(new_trials)
+                trials.refresh()
+                params = hyperopt.space_eval(self.space, base.spec_from_misc(new_trials[0]['misc']))
+                futures.append(executor.submit(fn, params, step=step_idx + 1))
+                results.append(None)
+
+            # wait for all steps to finish, this also raises exceptions from the steps
+            for future in futures:
+                future.result()
+
 
 class SMACOptimizer(HyperOptimizer):
     class SMACFuncWrapper:
@@ -169,10 +242,10 @@ class SMACOptimizer(HyperOptimizer):
             self.f = f
             self.fixed_params = fixed_params
 
-        def __call__(self, params: Configuration, seed: int = 0):
+        def __call__(self, params: 'ConfigSpace.Configuration', seed: int = 0, step: Optional[int] = None):
             params = params.get_dictionary()
             params = utils.join_dicts(params, self.fixed_params)
-            loss, additional_info = self.f(params)
+            loss, additional_info = self.f(params) if step is None else self.f(params, step=step)
             return np.inf if np.isnan(loss) else loss
 
     def __init__(self, space, fixed_params: Dict[str, Any], n_hyperopt_steps: int = 50,
@@ -184,11 +257,11 @@ class SMACOptimizer(HyperOptimizer):
         self.config = config
         self.tmp_folder = tmp_folder
 
-    def _optimize_impl(self, f: Callable[[dict], Tuple[float, Any]], seed: int) -> None:
+    def _create_facade(self, fn: SMACFuncWrapper, seed: int) -> Any:
         use_gp = self.config.get('smac_surrogate', 'RF') == 'GP'
-        fn = SMACOptimizer.SMACFuncWrapper(f, self.fixed_params)
 
         import smac
+        from smac.initial_design import SobolInitialDesign
         scenario = smac.Scenario(self.space, deterministic=True, n_trials=self.n_hyperopt_steps,
                                  seed=seed, use_default_config=True, output_directory=self.tmp_folder)
 
@@ -224,4 +297,112 @@ class SMACOptimizer(HyperOptimizer):
                 logging_level=False,  # no logging
                 initial_design=initial_design,
             )
-        facade.optimize()
+        return facade
+
+    def _optimize_impl(self, f: Callable[[dict], Tuple[float, Any]], seed: int) -> None:
+        fn = SMACOptimizer.SMACFuncWrapper(f, self.fixed_params)
+        self._create_facade(fn, seed=seed).optimize()
+
+    def _optimize_parallel_impl(self, f: FunctionEvaluationTracker, seed: int, n_parallel: int) -> None:
+        # uses the ask-and-tell interface of SMAC, see HyperoptOptimizer._optimize_parallel_impl()
+        # the results of steps 1, ..., i - n_parallel are told (in this order) before step i is asked for
+        from smac.runhistory.dataclasses import TrialValue
+        fn = SMACOptimizer.SMACFuncWrapper(f, self.fixed_params)
+        facade = self._create_facade(fn, seed=seed)
+        futures: List[Future] = []
+        trial_infos = []
+        n_told = 0
+
+        with ThreadPoolExecutor(max_workers=n_parallel) as executor:
+            for step_idx in range(self.n_hyperopt_steps):
+                for i in range(n_told, max(0, step_idx - n_parallel + 1)):
+                    facade.tell(trial_infos[i], TrialValue(cost=futures[i].result()))
+                    n_told = i + 1
+                trial_info = facade.ask()
+                trial_infos.append(trial_info)
+                futures.append(executor.submit(fn, trial_info.config, step=step_idx + 1))
+
+            for i in range(n_told, len(futures)):
+                facade.tell(trial_infos[i], TrialValue(cost=futures[i].result()))
+
+
+class SuccessiveHalvingOptimizer(HyperOptimizer):
+    """
+    Multi-fidelity random search using successive halving (Jamieson and Talwalkar, 2016).
+    All sampled configurations are evaluated with a small budget (e.g., n_estimators for GBDTs),
+    then the best 1/eta of them are evaluated with an eta times larger budget, and so on,
+    until the remaining configurations are evaluated with the full budget.
+    When evaluating a configuration again with a larger budget, the function to minimize receives
+    the additional info of the previous evaluation as keyword argument prev_info, such that training can be resumed.
+    The function always receives the index of the step (starting at 1) as keyword argument step.
+    """
+    def __init__(self, space, fixed_params: Dict[str, Any], n_hyperopt_steps: int = 50, **config):
+        """
+        :param space: hyperopt search space, from which the configurations are sampled randomly.
+        :param fixed_params: Parameters that are added to every configuration.
+        :param n_hyperopt_steps: Number of sampled configurations (evaluated with the smallest budget).
+        :param config: Further configuration. The following keys configure the budgets:
+            sh_budget_name (name of the budget parameter, default 'n_estimators'),
+            sh_max_budget (full budget, defaults to config[sh_budget_name]),
+            sh_eta (factor between budgets and between the numbers of configurations, default 3),
+            sh_n_rungs (number of budgets, default 3).
+        """
+        super().__init__(n_hyperopt_steps=n_hyperopt_steps)
+        self.space = space
+        self.fixed_params = fixed_params
+        self.config = config
+        self.budget_name = config.get('sh_budget_name', 'n_estimators')
+        self.max_budget = config.get('sh_max_budget', config.get(self.budget_name, None))
+        if self.max_budget is None:
+            raise ValueError(f'No maximum budget specified for successive halving, '
+                             f'please specify sh_max_budget or {self.budget_name}')
+        self.eta = config.get('sh_eta', 3)
+        self.n_rungs = config.get('sh_n_rungs', 3)
+
+    def get_rungs(self) -> List[Tuple[int, int]]:
+        """
+        :return: List containing the number of evaluated configurations and the budget for every rung.
+        """
+        rungs = []
+        n_configs = self.n_hyperopt_steps
+        for i in range(self.n_rungs):
+            budget = max(1, int(round(self.max_budget * self.eta ** (i + 1 - self.n_rungs))))
+            rungs.append((n_configs, budget))
+            n_configs = max(1, n_configs // self.eta)
+        return rungs
+
+    def get_n_hyperopt_steps(self) -> int:
+        # number of evaluations with the full budget that require the same compute (used for resource estimation)
+        return int(np.ceil(sum(n_configs * budget for n_configs, budget in self.get_rungs()) / self.max_budget))
+
+    def _optimize_impl(self, f: FunctionEvaluationTracker, seed: int) -> None:
+        self._optimize_parallel_impl(f, seed=seed, n_parallel=1)
+
+    def _optimize_parallel_impl(self, f: FunctionEvaluationTracker, seed: int, n_parallel: int) -> None:
+        import hyperopt
+        rng = np.random.default_rng(seed=seed)
+        configs = [utils.join_dicts(f_unpack_dict(hyperopt.pyll.stochastic.sample(self.space, rng=rng)),
+                                    self.fixed_params)
+                   for i in range(self.n_hyperopt_steps)]
+        rungs = self.get_rungs()
+        f.n_steps = sum(n_configs for n_configs, budget in rungs)
+        f.return_info = True
+
+        # indices of the remaining configurations, sorted by their last loss
+        config_idxs = list(range(len(configs)))
+        prev_infos = dict()
+        step = 0
+        with ThreadPoolExecutor(max_workers=n_parallel) as executor:
+            for n_configs, budget in rungs:
+                config_idxs = config_idxs[:n_configs]
+                futures = []
+                for i in config_idxs:
+                    step += 1
+                    futures.append(executor.submit(f, utils.join_dicts(configs[i], {self.budget_name: budget}),
+                                                   step=step, prev_info=prev_infos.get(i, None)))
+                results = [future.result() for future in futures]
+                # stable sorting, such that ties are resolved deterministically
+                perm = np.argsort([loss for loss, info in results], kind='stable')
+                config_idxs = [config_idxs[j] for j in perm]
+                # only keep the information needed for resuming the configurations that can still be promoted
+                prev_infos = {config_idxs[j]: results[perm[j]][1] for j in range(max(1, n_configs // self.eta))}
@@ -477,7 +477,7 @@ class BiasLayer(Layer):
     def __init__(self, bias: Variable, factor: float = 1.0):
         super().__init__()
         self.bias = bias
-        self.factor = factor
+        self.factor = float(factor)  # factor might be a numpy scalar, which causes graph breaks in torch.compile()
 
     def forward_cont(self, x):
         if self.factor != 1.0:
@@ -508,7 +508,7 @@ class WeightLayer(Layer):
         super().__init__(new_tensor_infos={'x_cont': TensorInfo(feat_shape=[weight.shape[-1]])})
         # weight should be <batch-dims> x in_features x out_features unlike in nn.Linear
         self.weight = weight
-        self.factor = factor
+        self.factor = float(factor)
 
     def forward_cont(self, x):
         x = x.matmul(self.weight)
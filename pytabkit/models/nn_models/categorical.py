@@ -7,7 +7,7 @@ import torch.nn.functional as F
 
 from pytabkit.models import utils
 from pytabkit.models.data.data import TensorInfo, DictDataset
-from pytabkit.models.nn_models.base import FitterFactory, IdentityFitter, Layer, Fitter, Variable
+from pytabkit.models.nn_models.base import FitterFactory, IdentityFitter, Layer, Fitter, Variable, IdentityLayer
 from pytabkit.models.torch_utils import cat_if_necessary
 
 
@@ -72,12 +72,162 @@ class EncodingLayer(Layer):
                               for i in range(len(layers[0].emb_layers))], layers[0].enc_output_name, layers[0].fitter)
 
 
+class FusedEncodingLayer(Layer):
+    """
+    Equivalent to an EncodingLayer whose single layers are all SingleOneHotLayer, SingleEmbeddingLayer
+    or IdentityLayer objects, but encodes all columns with a single index_select() instead of a loop over columns.
+    The embedding tables of all columns are flattened and concatenated
+    (trainable tables and fixed tables, including one-hot encodings, are stored in two separate Variables),
+    such that output feature k of column i is read from the table at col_offsets[i] + x_cat[..., i] * emb_sizes[i] + k.
+    """
+    def __init__(self, fitter, enc_output_name: str, trainable_table: Optional[Variable],
+                 fixed_table: Optional[Variable], col_strides: torch.Tensor, col_offsets: torch.Tensor,
+                 out_col_idxs: torch.Tensor, out_positions: torch.Tensor, passthrough_idxs: torch.Tensor):
+        """
+        :param fitter: EncodingFitter that created this layer.
+        :param enc_output_name: Name of the output tensor.
+        :param trainable_table: Flattened trainable embedding tables
+            of shape (parallel dims) x n_trainable_entries, or None.
+        :param fixed_table: Flattened fixed tables of shape (parallel dims) x n_fixed_entries, or None.
+            In the concatenated table, its entries are placed after the trainable entries.
+        :param col_strides: Embedding size of each categorical column (0 for columns that are not encoded).
+        :param col_offsets: Offset of the table of each categorical column in the concatenated table.
+        :param out_col_idxs: Index of the categorical column for each output feature.
+        :param out_positions: Index of each output feature within the embedding of its column.
+        :param passthrough_idxs: Indexes of the columns that are not encoded but kept in x_cat.
+        """
+        super().__init__(fitter=fitter)
+        self.enc_output_name = enc_output_name
+        self.trainable_table = trainable_table
+        self.fixed_table = fixed_table
+        # these are not registered as buffers since they are shared between the vectorized models
+        # and therefore have no parallel dimensions, see _get_idxs()
+        self.col_strides = col_strides
+        self.col_offsets = col_offsets
+        self.out_col_idxs = out_col_idxs
+        self.out_positions = out_positions
+        self.passthrough_idxs = passthrough_idxs
+
+    def _get_idxs(self, device: torch.device) -> Tuple[torch.Tensor, ...]:
+        if self.col_strides.device != device:
+            # move to the device of the data once
+            self.col_strides, self.col_offsets, self.out_col_idxs, self.out_positions, self.passthrough_idxs = \
+                [t.to(device) for t in [self.col_strides, self.col_offsets, self.out_col_idxs, self.out_positions,
+                                        self.passthrough_idxs]]
+        return self.col_strides, self.col_offsets, self.out_col_idxs, self.out_positions, self.passthrough_idxs
+
+    @staticmethod
+    def from_single_layers(fitter, enc_layers: List[Layer], cat_sizes: List[int], enc_output_name: str,
+                           device: str) -> Optional['FusedEncodingLayer']:
+        """
+        Creates a FusedEncodingLayer that computes the same outputs as EncodingLayer(enc_layers, ...).
+
+        :return: The fused layer, or None if the layers cannot be fused.
+        """
+        # for each encoded column: (column index, table, is_trainable)
+        encoded = []
+        passthrough_idxs = []
+        hyper_factors = None
+        for i, (layer, cat_size) in enumerate(zip(enc_layers, cat_sizes)):
+            if isinstance(layer, IdentityLayer):
+                passthrough_idxs.append(i)
+            elif isinstance(layer, SingleOneHotLayer):
+                # realize the one-hot encoding as a fixed table with one row per category
+                with torch.no_grad():
+                    x_cat = torch.arange(cat_size, dtype=torch.long, device=device)[:, None]
+                    table = layer.forward_tensors({'x_cat': x_cat})['x_cont']
+                encoded.append((i, table, False))
+            elif isinstance(layer, SingleEmbeddingLayer) and layer.emb.dim() == 2:
+                if layer.emb.trainable:
+                    if hyper_factors is not None and hyper_factors != layer.emb.hyper_factors:
+                        return None
+                    hyper_factors = layer.emb.hyper_factors
+                encoded.append((i, layer.emb.detach(), layer.emb.trainable))
+            else:
+                return None
+
+        if len(encoded) == 0:
+            return None
+
+        trainable_tables = [table.reshape(-1) for _, table, is_trainable in encoded if is_trainable]
+        fixed_tables = [table.reshape(-1).to(torch.float32) for _, table, is_trainable in encoded if not is_trainable]
+        trainable_offset = 0
+        fixed_offset = sum([table.numel() for table in trainable_tables])
+        col_strides = [0] * len(enc_layers)
+        col_offsets = [0] * len(enc_layers)
+        out_col_idxs, out_positions = [], []
+        for i, table, is_trainable in encoded:
+            emb_size = table.shape[-1]
+            col_strides[i] = emb_size
+            if is_trainable:
+                col_offsets[i] = trainable_offset
+                trainable_offset += table.numel()
+            else:
+                col_offsets[i] = fixed_offset
+                fixed_offset += table.numel()
+            out_col_idxs.extend([i] * emb_size)
+            out_positions.extend(range(emb_size))
+
+        trainable_table = Variable(torch.cat(trainable_tables), trainable=True, hyper_factors=hyper_factors) \
+            if len(trainable_tables) > 0 else None
+        fixed_table = Variable(torch.cat(fixed_tables), trainable=False) if len(fixed_tables) > 0 else None
+        as_idxs = lambda values: torch.as_tensor(values, dtype=torch.long, device=device)
+        return FusedEncodingLayer(fitter, enc_output_name, trainable_table, fixed_table,
+                                  col_strides=as_idxs(col_strides), col_offsets=as_idxs(col_offsets),
+                                  out_col_idxs=as_idxs(out_col_idxs), out_positions=as_idxs(out_positions),
+                                  passthrough_idxs=as_idxs(passthrough_idxs))
+
+    def forward_tensors(self, tensors):
+        x_cat = tensors['x_cat']
+        tables = [t for t in [self.trainable_table, self.fixed_table] if t is not None]
+        table = tables[0] if len(tables) == 1 else torch.cat(tables, dim=-1)
+        parallel_shape = table.shape[:-1]
+        if len(parallel_shape) > 0:
+            x_cat = x_cat.expand(*parallel_shape, *x_cat.shape[-2:])
+        n_cols = x_cat.shape[-1]
+        col_strides, col_offsets, out_col_idxs, out_positions, passthrough_idxs = self._get_idxs(x_cat.device)
+        # Build the indexes in the transposed layout n_cat x n_rows,
+        # such that the expansion to the output features is a (fast) index_select() along the first dimension.
+        # shape: n_cat x (n_parallel * n_batch)
+        idxs = x_cat.reshape(-1, n_cols).t() * col_strides[:, None] + col_offsets[:, None]
+        if len(parallel_shape) > 0:
+            # put all parallel dimensions into the index range, as in SingleEmbeddingLayer
+            n_parallel = table[..., 0].numel()
+            parallel_offsets = table.shape[-1] * torch.arange(n_parallel, dtype=torch.long, device=x_cat.device)
+            idxs = (idxs.reshape(n_cols, n_parallel, -1) + parallel_offsets[None, :, None]).reshape(n_cols, -1)
+        # shape: n_out x (n_parallel * n_batch)
+        idxs = idxs.index_select(0, out_col_idxs).add_(out_positions[:, None])
+        x_enc = table.reshape(-1).index_select(0, idxs.reshape(-1))
+        # return a transposed view, the following concatenation or linear layer can deal with it
+        x_enc = x_enc.reshape(-1, *x_cat.shape[:-1]).movedim(0, -1)
+
+        if self.enc_output_name in tensors:
+            x_enc = torch.cat([tensors[self.enc_output_name], x_enc], dim=-1)
+        if passthrough_idxs.numel() > 0:
+            return utils.update_dict(tensors, {self.enc_output_name: x_enc,
+                                               'x_cat': x_cat[..., passthrough_idxs]})
+        else:
+            return utils.update_dict(tensors, {self.enc_output_name: x_enc}, remove_keys='x_cat')
+
+    def _stack(self, layers: List['FusedEncodingLayer']):
+        first = layers[0]
+        trainable_table = None if first.trainable_table is None \
+            else Variable.stack([layer.trainable_table for layer in layers])
+        fixed_table = None if first.fixed_table is None else Variable.stack([layer.fixed_table for layer in layers])
+        return FusedEncodingLayer(first.fitter, first.enc_output_name, trainable_table, fixed_table,
+                                  first.col_strides, first.col_offsets, first.out_col_idxs, first.out_positions,
+                                  first.passthrough_idxs)
+
+
 class EncodingFitter(Fitter):
-    def __init__(self, single_encoder_fitters: List[Fitter], enc_output_name: str = 'x_cont', **config):
+    def __init__(self, single_encoder_fitters: List[Fitter], enc_output_name: str = 'x_cont',
+                 use_fused_encoding: bool = True, **config):
         super().__init__(needs_tensors=any([enc.needs_tensors for enc in single_encoder_fitters]),
                          is_individual=any([enc.is_individual for enc in single_encoder_fitters]))
         self.single_encoder_fitters = single_encoder_fitters
         self.enc_output_name = enc_output_name  # allow to have something other than x_cont
+        # replace the loop over columns by a single FusedEncodingLayer if possible
+        self.use_fused_encoding = use_fused_encoding
         assert enc_output_name != 'x_cat'
 
     def get_n_params(self, tensor_infos: Dict[str, TensorInfo]) -> int:
@@ -135,6 +285,12 @@ class EncodingFitter(Fitter):
                 tensor_infos['y'] = ds.tensor_infos['y']
             enc_layers.append(enc.fit(DictDataset(tensors, tensor_infos, ds.device, ds.n_samples)))
 
+        if self.use_fused_encoding:
+            fused_layer = FusedEncodingLayer.from_single_layers(self, enc_layers, x_cat_sizes.tolist(),
+                                                                self.enc_output_name, ds.device)
+            if fused_layer is not None:
+                return fused_layer
+
         return EncodingLayer(enc_layers, self.enc_output_name, self)
 
     # def split_off_dynamic(self):
@@ -145,10 +301,11 @@ class EncodingFitter(Fitter):
 
 
 class EncodingFactory(FitterFactory):
-    def __init__(self, single_encoder_factory, enc_output_name: str = 'x_cont'):
+    def __init__(self, single_encoder_factory, enc_output_name: str = 'x_cont', use_fused_encoding: bool = True):
         super().__init__()
         self.single_encoder_factory = single_encoder_factory
         self.enc_output_name = enc_output_name
+        self.use_fused_encoding = use_fused_encoding
 
     def _create(self, tensor_infos):
         if 'x_cat' not in tensor_infos or tensor_infos['x_cat'].get_n_features() == 0:
@@ -158,7 +315,8 @@ class EncodingFactory(FitterFactory):
         single_encoder_fitters = [self.single_encoder_factory.create({'x_cat': TensorInfo(cat_sizes=[cat_sz]),
                                                                       'y': tensor_infos['y']})
                                   for cat_sz in x_cat_sizes]
-        return EncodingFitter(single_encoder_fitters, enc_output_name=self.enc_output_name)
+        return EncodingFitter(single_encoder_fitters, enc_output_name=self.enc_output_name,
+                              use_fused_encoding=self.use_fused_encoding)
 
 # ----- One-Hot ------
 
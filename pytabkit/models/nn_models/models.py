@@ -78,10 +78,12 @@ class PreprocessingFactory(FitterFactory):
 
     def _create(self, tensor_infos: Dict[str, TensorInfo]) -> Fitter:
         tfm_factories = []
+        use_fused = self.config.get('use_fused_encoding', True)
 
         for tfm in self.config.get('tfms', []):
             if tfm == 'one_hot':
-                tfm_factories.append(EncodingFactory(SingleOneHotFactory(**self.config), enc_output_name='x_one_hot'))
+                tfm_factories.append(EncodingFactory(SingleOneHotFactory(**self.config), enc_output_name='x_one_hot',
+                                                     use_fused_encoding=use_fused))
                 tfm_factories.append(RenameTensorFactory(old_name='x_one_hot', new_name='x_cont'))
             elif tfm == 'median_center':
                 tfm_factories.append(MedianCenterFactory(**self.config))
@@ -94,7 +96,8 @@ class PreprocessingFactory(FitterFactory):
             elif tfm == 'mean_center':
                 tfm_factories.append(MeanCenterFactory(**self.config))
             elif tfm == 'embedding':
-                tfm_factories.append(EncodingFactory(SingleEmbeddingFactory(**self.config)).add_scope('emb'))
+                tfm_factories.append(EncodingFactory(SingleEmbeddingFactory(**self.config),
+                                                     use_fused_encoding=use_fused).add_scope('emb'))
             elif tfm == 'global_scale_normalize':
                 tfm_factories.append(GlobalScaleNormalizeFactory(**self.config))
             elif tfm == 'l2_normalize':
@@ -106,9 +109,11 @@ class PreprocessingFactory(FitterFactory):
             elif tfm == 'circle_coding':
                 tfm_factories.append(CircleCodingFactory(**self.config))
             elif tfm == 'ordinal_encoding':
-                tfm_factories.append(EncodingFactory(SingleOrdinalEncodingFactory(**self.config)))
+                tfm_factories.append(EncodingFactory(SingleOrdinalEncodingFactory(**self.config),
+                                                     use_fused_encoding=use_fused))
             elif tfm == 'target_encoding':
-                tfm_factories.append(EncodingFactory(SingleTargetEncodingFactory(**self.config)))
+                tfm_factories.append(EncodingFactory(SingleTargetEncodingFactory(**self.config),
+                                                     use_fused_encoding=use_fused))
             elif tfm == 'kdi':
                 from kditransform import KDITransformer
                 tfm = KDITransformer(alpha=self.config.get('kdi_alpha', 1.0),
@@ -123,7 +128,7 @@ class PreprocessingFactory(FitterFactory):
 
         # old interface, using 'tfms' is preferred
         if self.config.get('use_one_hot', False):
-            tfm_factories.append(EncodingFactory(SingleOneHotFactory(**self.config)))
+            tfm_factories.append(EncodingFactory(SingleOneHotFactory(**self.config), use_fused_encoding=use_fused))
         if self.config.get('use_median_center', False):
             tfm_factories.append(MedianCenterFactory(**self.config))
         if self.config.get('use_robust_scale', False):
@@ -135,7 +140,8 @@ class PreprocessingFactory(FitterFactory):
         if self.config.get('use_mean_center', False):
             tfm_factories.append(MeanCenterFactory(**self.config))
         if self.config.get('use_embedding', False):
-            tfm_factories.append(EncodingFactory(SingleEmbeddingFactory(**self.config)).add_scope('emb'))
+            tfm_factories.append(EncodingFactory(SingleEmbeddingFactory(**self.config),
+                                                 use_fused_encoding=use_fused).add_scope('emb'))
         if self.config.get('use_global_scale_normalize', False):
             tfm_factories.append(GlobalScaleNormalizeFactory(**self.config))
 
@@ -159,10 +165,12 @@ class NNFactory(FitterFactory):
 
         factories = []
         net_factories = []
+        use_fused = self.config.get('use_fused_encoding', True)
 
         if 'one_hot' in self.config.get('tfms', []) or self.config.get('use_one_hot', False):
             # do it already here so it can get done once instead of per batch
-            factories.append(EncodingFactory(SingleOneHotFactory(**self.config), enc_output_name='x_one_hot'))
+            factories.append(EncodingFactory(SingleOneHotFactory(**self.config), enc_output_name='x_one_hot',
+                                             use_fused_encoding=use_fused))
 
         prep_factory = PreprocessingFactory(**self.config)
 
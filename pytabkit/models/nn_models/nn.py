@@ -1,4 +1,3 @@
-import copy
 from typing import Dict
 
 import numpy as np
@@ -10,7 +9,7 @@ from pytabkit.models import utils
 from pytabkit.models.data.data import TensorInfo, DictDataset
 from pytabkit.models.nn_models.base import Fitter, Variable, WeightLayer, BiasLayer, ScaleLayer, FitterFactory, Layer, \
     TrainContext, sub_scope_context, SequentialFitter, SequentialLayer, FunctionLayer
-from pytabkit.models.torch_utils import gauss_cdf
+from pytabkit.models.torch_utils import gauss_cdf, is_compiling
 
 
 class WeightFitter(Fitter):
@@ -330,10 +329,19 @@ class DropoutLayer(Layer):
         self.hyper_getter = self.context.hp_manager.register_hyper('p_drop', self.context.scope)
 
     def forward_cont(self, x):
-        p_drop = self.hyper_getter()
-        if p_drop == 0.0:
+        p_drop = self.hyper_getter.get_tensor() if is_compiling() else None
+        if p_drop is None:
+            p_drop = self.hyper_getter()
+            if not isinstance(p_drop, torch.Tensor):
+                if p_drop == 0.0:
+                    return x
+                return F.dropout(x, p_drop, training=self.training)
+        # F.dropout() needs p_drop as a float, which would cause recompilations when p_drop is scheduled
+        # and does not allow different values for the vectorized models
+        if not self.training:
             return x
-        return F.dropout(x, p_drop, training=self.training)
+        p_drop = self.context.hp_manager.to_model_dims(p_drop, x)
+        return x * (torch.rand_like(x) >= p_drop) / (1.0 - p_drop)
 
 
 class DropoutFitter(Fitter):
@@ -405,7 +413,7 @@ class NormalizeOutputLayer(Layer):
         self.std = std
 
     def forward_tensors(self, tensors):
-        tensors = copy.copy(tensors)  # shallow copy
+        tensors = dict(tensors)  # shallow copy
         if self.training:
             assert 'y' in tensors
             tensors['y'] = (tensors['y'] - self.mean) / (self.std + 1e-30)
@@ -435,7 +443,7 @@ class NormWeightLayer(Layer):
     def __init__(self, weight: Variable, factor: float, fitter: Fitter, transpose=False):
         super().__init__(fitter=fitter)
         self.weight = weight
-        self.factor = factor
+        self.factor = float(factor)
         self.transpose = transpose
 
     def forward_cont(self, x):
@@ -552,10 +560,14 @@ class PLREmbeddingsFactory(Fitter, FitterFactory):
         n_cont = ds.tensor_infos['x_cont'].get_n_features()  # assuming that the shape is rank 1
         hyper_factors_1 = {'lr': self.plr_lr_factor * self.plr_lr_factor_1, 'wd': self.plr_wd_factor}
         hyper_factors_2 = {'lr': self.plr_lr_factor * self.plr_lr_factor_2, 'wd': self.plr_wd_factor}
+        plr_sigma = self.plr_sigma
+        if not np.isscalar(plr_sigma):
+            # one value per train-test split, see HyperparamManager.get_model_values()
+            plr_sigma = plr_sigma[TrainContext.get_global_context().hp_manager.get_more_info_dict()['split_idx']]
 
         if self.plr_use_cos_bias:
             with sub_scope_context('weight_1'):
-                weight_1 = Variable(self.plr_sigma * torch.randn(n_cont, 1, self.plr_hidden_1, device=ds.device),
+                weight_1 = Variable(plr_sigma * torch.randn(n_cont, 1, self.plr_hidden_1, device=ds.device),
                                     hyper_factors=hyper_factors_1)
             with sub_scope_context('bias_1'):
                 # use uniform [-pi, pi] instead of uniform [0, 2pi] for smaller values in case of weight decay
@@ -564,7 +576,7 @@ class PLREmbeddingsFactory(Fitter, FitterFactory):
         else:
             # normal initialization as in the paper
             with sub_scope_context('weight_1'):
-                weight_1 = Variable(self.plr_sigma * torch.randn(n_cont, 1, self.plr_hidden_1 // 2, device=ds.device),
+                weight_1 = Variable(plr_sigma * torch.randn(n_cont, 1, self.plr_hidden_1 // 2, device=ds.device),
                                     hyper_factors=hyper_factors_1)
 
         # kaiming init from nn.Linear
@@ -776,13 +788,15 @@ class ToSoftLabelLayer(Layer):
     def __init__(self, y_tensor_info, fitter: Fitter):
         super().__init__(fitter=fitter)
         self.y_tensor_info = y_tensor_info
+        # convert to a list here since converting the tensor in forward_tensors() breaks the graph in torch.compile()
+        self.y_cat_sizes = y_tensor_info.get_cat_sizes().tolist()
 
     def forward_tensors(self, tensors):
         if 'y' not in tensors:
             return tensors
         else:
             y = tensors['y']
-            y_cs = self.y_tensor_info.get_cat_sizes().numpy()
+            y_cs = self.y_cat_sizes
             new_y_cols = []
             for i, cs in enumerate(y_cs):
                 if cs == 0:
@@ -823,9 +837,12 @@ class LabelSmoothingLayer(Layer):
         if 'y' not in tensors:
             return tensors
 
-        ls_eps = self.hyper_getter()
+        ls_eps = self.hyper_getter.get_tensor() if is_compiling() else None
+        if ls_eps is None:
+            ls_eps = self.hyper_getter()
         # print(f'{ls_eps=:g}')
         y = tensors['y']
+        ls_eps = self.context.hp_manager.to_model_dims(ls_eps, y)
         y = (1.0 - ls_eps) * y + ls_eps * self.ls_dist
         return utils.update_dict(tensors, {'y': y})
 
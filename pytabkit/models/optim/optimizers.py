@@ -6,9 +6,27 @@ from pytabkit.models.optim.scheduling_adam import SchedulingAdam
 
 
 class OptimizerBase(torch.optim.Optimizer):
-    def __init__(self, opt, hyper_mappings, hp_manager: HyperparamManager):
+    # Whether the parameter update of the wrapped optimizer is proportional to the learning rate
+    # (given the gradients and the optimizer state, which must not depend on the learning rate).
+    # Only then, one learning rate per vectorized model (see HyperparamManager.get_model_values()) is supported,
+    # by taking a step with lr=1 and scaling the change of each model's parameters afterward.
+    # This needs a copy of the parameters with per-model learning rates in every step.
+    supports_model_lrs = False
+
+    def __init__(self, opt, hyper_mappings, hp_manager: HyperparamManager, fused: bool = False):
+        """
+        :param opt: Wrapped torch optimizer, created with one parameter group per parameter.
+        :param hyper_mappings: List of tuples (hyperparameter name(s), name in the wrapped optimizer, default value(s)).
+        :param hp_manager: Hyperparameter manager that provides the (scheduled) hyperparameter values.
+        :param fused: If True, parameters whose hyperparameters are given by the same patterns
+            (and have the same hyperparameter factors) are merged into a single parameter group.
+            The scheduled hyperparameter values are then only computed once per group,
+            and the updates are applied using torch._foreach_* operations (if supported by the wrapped optimizer).
+        """
         self.hp_manager = hp_manager
         self.hyper_getters = {}
+        if fused:
+            opt = self._fuse_param_groups(opt, hyper_mappings)
         self.n_groups = len(opt.param_groups)
         for names, opt_name, defaults in hyper_mappings:
             if isinstance(names, str):
@@ -21,6 +39,26 @@ class OptimizerBase(torch.optim.Optimizer):
         self.hyper_mappings = hyper_mappings
         self.opt = opt
 
+    def _fuse_param_groups(self, opt, hyper_mappings):
+        groups = dict()
+        for group in opt.param_groups:
+            for p in group['params']:
+                key = []
+                for names, opt_name, defaults in hyper_mappings:
+                    if isinstance(names, str):
+                        names = (names,)
+                        defaults = (defaults,)
+                    for name, default in zip(names, defaults):
+                        getter = self.hp_manager.register_hyper(name, p.context.scope, default=default)
+                        key.append((name, getter.base_value_pattern, getter.sched_pattern,
+                                    p.hyper_factors.get(name, None)))
+                groups.setdefault(tuple(key), []).append(p)
+
+        opt_defaults = dict(opt.defaults)
+        if 'foreach' in opt_defaults:
+            opt_defaults['foreach'] = True
+        return type(opt)([{'params': params} for params in groups.values()], **opt_defaults)
+
     def get_hyper_values(self, name, i, use_hyper_factor=True):
         value = self.hyper_getters[name][i]()
         param = self.opt.param_groups[i]['params'][0]  # should only be one param
@@ -28,8 +66,16 @@ class OptimizerBase(torch.optim.Optimizer):
             value *= param.hyper_factors[name]
         return value
 
+    @staticmethod
+    def _get_model_factors(params, value: torch.Tensor):
+        # one tensor per parameter, which multiplies each vectorized model with its own value
+        value = value.to(params[0].device)
+        return [value.view(-1, *([1] * (p.dim() - 1))) for p in params]
+
     def step(self, closure=None):
         unhandled_mappings = []
+        # parameter groups with one learning rate per vectorized model (see HyperparamManager.get_model_values())
+        model_lr_groups = []
         for names, opt_name, defaults in self.hyper_mappings:
             if opt_name is None:
                 unhandled_mappings.append((names, opt_name, defaults))
@@ -41,6 +87,12 @@ class OptimizerBase(torch.optim.Optimizer):
             elif isinstance(names, str):
                 for i, group in enumerate(self.opt.param_groups):
                     group[opt_name] = self.get_hyper_values(names, i)
+                    if names == 'lr' and isinstance(group['lr'], torch.Tensor):
+                        if not self.supports_model_lrs:
+                            raise NotImplementedError(f'{self.__class__.__name__} does not support '
+                                                      f'different learning rates for vectorized models')
+                        model_lr_groups.append((group['params'], group['lr']))
+                        group['lr'] = 1.0
             else:
                 raise RuntimeError('Could not understand mapping key {}'.format(names))
 
@@ -50,53 +102,76 @@ class OptimizerBase(torch.optim.Optimizer):
                     for i, group in enumerate(self.opt.param_groups):
                         wd = self.get_hyper_values('wd', i)
                         lr = self.get_hyper_values('lr', i)
-                        if wd != 0.0:
-                            for p in group['params']:
-                                p.mul_(1.0 - wd * lr * p.hyper_factors.get('wd', 1.0) * p.hyper_factors.get('lr', 1.0))
+                        # all parameters in a group have the same hyperparameter factors
+                        hyper_factors = group['params'][0].hyper_factors
+                        if isinstance(wd, torch.Tensor) or isinstance(lr, torch.Tensor):
+                            factor = 1.0 - wd * lr * hyper_factors.get('wd', 1.0) * hyper_factors.get('lr', 1.0)
+                            torch._foreach_mul_(group['params'], self._get_model_factors(group['params'], factor))
+                        elif wd != 0.0:
+                            torch._foreach_mul_(group['params'], 1.0 - wd * lr * hyper_factors.get('wd', 1.0)
+                                                * hyper_factors.get('lr', 1.0))
 
             else:
                 raise RuntimeError('Could not understand mapping {}'.format((names, opt_name, defaults)))
 
+        with torch.no_grad():
+            old_params_list = [torch._foreach_mul(params, 1.0) for params, lr in model_lr_groups]
+
         self.opt.step()
 
+        with torch.no_grad():
+            for (params, lr), old_params in zip(model_lr_groups, old_params_list):
+                # params = old_params + lr * (params - old_params) = params + (1 - lr) * (old_params - params)
+                torch._foreach_lerp_(params, old_params, self._get_model_factors(params, 1.0 - lr))
+
 
 class AdamOptimizer(OptimizerBase):
-    def __init__(self, param_groups, hp_manager):
+    supports_model_lrs = True
+
+    def __init__(self, param_groups, hp_manager, fused: bool = False):
         super().__init__(optim.Adam(param_groups),
                          hyper_mappings=[('lr', 'lr', 1e-3), (('mom', 'sq_mom'), 'betas', (0.9, 0.999)),
                                          ('opt_eps', 'eps', 1e-8), ('wd', None, 0.0)],
-                         hp_manager=hp_manager)
+                         hp_manager=hp_manager, fused=fused)
 
 
 class SchedulingAdamOptimizer(OptimizerBase):
-    def __init__(self, param_groups, hp_manager):
+    supports_model_lrs = True
+
+    def __init__(self, param_groups, hp_manager, fused: bool = False):
         super().__init__(SchedulingAdam(param_groups),
                          hyper_mappings=[('lr', 'lr', 1e-3), (('mom', 'sq_mom'), 'betas', (0.9, 0.999)),
                                          ('opt_eps', 'eps', 1e-8), ('wd', None, 0.0)],
-                         hp_manager=hp_manager)
+                         hp_manager=hp_manager, fused=fused)
 
 
 class AMSGradOptimizer(OptimizerBase):
-    def __init__(self, param_groups, hp_manager):
+    supports_model_lrs = True
+
+    def __init__(self, param_groups, hp_manager, fused: bool = False):
         super().__init__(optim.Adam(param_groups, amsgrad=True),
                          hyper_mappings=[('lr', 'lr', 1e-3), (('mom', 'sq_mom'), 'betas', (0.9, 0.999)),
                                          ('opt_eps', 'eps', 1e-8), ('wd', None, 0.0)],
-                         hp_manager=hp_manager)
+                         hp_manager=hp_manager, fused=fused)
 
 
 class AdamaxOptimizer(OptimizerBase):
-    def __init__(self, param_groups, hp_manager):
+    supports_model_lrs = True
+
+    def __init__(self, param_groups, hp_manager, fused: bool = False):
         super().__init__(optim.Adamax(param_groups),
                          hyper_mappings=[('lr', 'lr', 1e-3), (('mom', 'sq_mom'), 'betas', (0.9, 0.999)),
                                          ('opt_eps', 'eps', 1e-8), ('wd', None, 0.0)],
-                         hp_manager=hp_manager)
+                         hp_manager=hp_manager, fused=fused)
 
 
 class SGDOptimizer(OptimizerBase):
-    def __init__(self, param_groups, hp_manager):
+    supports_model_lrs = True
+
+    def __init__(self, param_groups, hp_manager, fused: bool = False):
         super().__init__(optim.SGD(param_groups), hyper_mappings=[('lr', 'lr', 1e-3), ('mom', 'momentum', 0.0),
                                                                   ('wd', None, 0.0)],
-                         hp_manager=hp_manager)
+                         hp_manager=hp_manager, fused=fused)
 
 
 
@@ -0,0 +1,256 @@
+import copy
+import importlib
+import inspect
+import json
+import pickle
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Union, Optional
+
+import torch
+
+from pytabkit.__about__ import __version__
+from pytabkit.models.alg_interfaces.alg_interfaces import AlgInterface
+from pytabkit.models.alg_interfaces.sub_split_interfaces import SingleSplitWrapperAlgInterface, \
+    TreeBasedSubSplitInterface
+from pytabkit.models.data.data import DictDataset
+from pytabkit.models.nn_models.base import Layer
+from pytabkit.models.sklearn.sklearn_base import AlgInterfaceEstimator, AlgInterfaceClassifier, AlgInterfaceRegressor
+from pytabkit.models.training.coord import HyperparamManager
+from pytabkit.models.training.inference import BatchedInferenceEngine
+from pytabkit.models.training.scheduling import ConstantSchedule
+
+# This module must not import pytorch_lightning (directly or indirectly),
+# such that exported models can be loaded quickly for inference.
+# The NN layers and the data preprocessing are stored as pickled objects,
+# so exported folders are tied to the code of pytabkit (and loading them can execute arbitrary code).
+
+EXPORT_FORMAT_VERSION = 1
+
+_META_FILE = 'meta.json'
+_STATE_FILE = 'state.pkl'
+_NN_MODEL_FILE = 'nn_model.pt'
+
+_ESTIMATOR_ATTRIBUTES = ['x_converter_', 'classes_', 'is_y_1d_', 'is_y_float64_', 'n_features_in_']
+
+
+class ExportedNNAlgInterface(AlgInterface):
+    """
+    AlgInterface for inference with an exported NN, see export_estimator().
+    It only holds the (stacked) trained model and the static preprocessing layers, and cannot be fitted.
+    """
+    def __init__(self, inference_engine: BatchedInferenceEngine, device: str = 'cpu'):
+        super().__init__()
+        self.inference_engine = inference_engine
+        self.device = device
+
+    def predict(self, ds: DictDataset) -> torch.Tensor:
+        old_allow_tf32 = torch.backends.cuda.matmul.allow_tf32
+        torch.backends.cuda.matmul.allow_tf32 = False  # same as in NNAlgInterface.predict()
+        y_pred = self.inference_engine.predict(ds.to(self.device)).to('cpu')
+        torch.backends.cuda.matmul.allow_tf32 = old_allow_tf32
+        return y_pred
+
+
+class ExportedClassifier(AlgInterfaceClassifier):
+    """
+    Classifier returned by load_exported() for estimators exported with export_estimator().
+    It supports predict(), predict_proba() and the corresponding ensemble versions, but not fit().
+    """
+    def fit(self, X, y, val_idxs=None, cat_features=None):
+        raise NotImplementedError('Exported estimators cannot be fitted')
+
+
+class ExportedRegressor(AlgInterfaceRegressor):
+    """
+    Regressor returned by load_exported() for estimators exported with export_estimator().
+    It supports predict() and predict_ensemble(), but not fit().
+    """
+    def fit(self, X, y, val_idxs=None, cat_features=None):
+        raise NotImplementedError('Exported estimators cannot be fitted')
+
+
+@contextmanager
+def _frozen_hp_managers(layers: List[Layer]):
+    # Layers like DropoutLayer query their hyperparameters through the HyperparamManager at inference time.
+    # While saving, we replace the schedules by their current (final) values
+    # and remove everything else (config, more_info_dict with the training set, regularization terms).
+    hp_managers = {}
+    for layer in layers:
+        for obj in list(layer.modules()) + list(layer.parameters()) + list(layer.buffers()):
+            context = getattr(obj, 'context', None)
+            if context is not None and isinstance(context.hp_manager, HyperparamManager):
+                hp_managers[id(context.hp_manager)] = context.hp_manager
+
+    old_states = {key: copy.copy(hp_manager.__dict__) for key, hp_manager in hp_managers.items()}
+    try:
+        for hp_manager in hp_managers.values():
+            sched_values = hp_manager.get_hyper_sched_values()
+            hp_manager.config = dict()
+            hp_manager.more_info_dict = dict()
+            hp_manager.reg_terms = []
+            hp_manager.hyper_scheds = {name: {pattern: ConstantSchedule(value) for pattern, value in values.items()}
+                                       for name, values in sched_values.items()}
+        yield
+    finally:
+        for key, hp_manager in hp_managers.items():
+            hp_manager.__dict__.clear()
+            hp_manager.__dict__.update(old_states[key])
+
+
+def _get_class_path(obj: Any) -> str:
+    return f'{obj.__class__.__module__}.{obj.__class__.__qualname__}'
+
+
+def _import_class(class_path: str) -> type:
+    module_name, class_name = class_path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _get_booster_lib(bst: Any) -> str:
+    lib = bst.__class__.__module__.split('.')[0]
+    if lib not in ['lightgbm', 'xgboost', 'catboost']:
+        raise ValueError(f'Exporting models of type {bst.__class__} is not supported')
+    return lib
+
+
+def _save_booster(bst: Any, path: Path) -> None:
+    lib = _get_booster_lib(bst)
+    if lib == 'lightgbm':
+        path.write_text(bst.model_to_string())
+    else:
+        # XGBoost infers the format from the file extension, CatBoost uses the native .cbm format by default
+        bst.save_model(str(path))
+
+
+def _load_booster(lib: str, path: Path) -> Any:
+    if lib == 'lightgbm':
+        import lightgbm as lgbm
+        return lgbm.Booster(model_file=str(path))
+    elif lib == 'xgboost':
+        import xgboost as xgb
+        bst = xgb.Booster()
+        bst.load_model(str(path))
+        return bst
+    elif lib == 'catboost':
+        import catboost
+        return catboost.CatBoost().load_model(str(path))
+    else:
+        raise ValueError(f'Unknown booster library "{lib}"')
+
+
+_BOOSTER_FILE_EXTENSIONS = {'lightgbm': 'txt', 'xgboost': 'ubj', 'catboost': 'cbm'}
+
+
+def export_estimator(estimator: AlgInterfaceEstimator, path: Union[str, Path]) -> None:
+    """
+    Exports a fitted estimator to a folder containing only what is needed for inference.
+    Currently supported are NN-based estimators like RealMLP_TD_Classifier
+    and GBDT estimators like LGBM_TD_Classifier, XGB_TD_Classifier, CatBoost_TD_Classifier
+    (without hyperparameter optimization).
+    The exported estimator can be loaded with load_exported().
+    The NN layers and the data preprocessing are pickled, so the export should be loaded
+    with the same version of pytabkit, and only from trusted sources.
+
+    :param estimator: Fitted estimator.
+    :param path: Folder where the exported files should be written to. Will be created if it does not exist.
+    """
+    # imported here since it imports pytorch_lightning
+    from pytabkit.models.alg_interfaces.nn_interfaces import NNAlgInterface
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    alg_interface = estimator.alg_interface_
+    state: Dict[str, Any] = {key: getattr(estimator, key) for key in _ESTIMATOR_ATTRIBUTES if hasattr(estimator, key)}
+    meta: Dict[str, Any] = dict(format_version=EXPORT_FORMAT_VERSION, pytabkit_version=__version__,
+                                estimator_class=_get_class_path(estimator),
+                                is_classification=estimator._is_classification())
+
+    if isinstance(alg_interface, NNAlgInterface):
+        meta['model_type'] = 'nn'
+        engine = alg_interface.model.create_inference_engine()
+        layers = [engine.model] + ([engine.static_model] if engine.static_model is not None else [])
+        with _frozen_hp_managers(layers):
+            torch.save(dict(model=engine.model, static_model=engine.static_model, n_models=engine.n_models,
+                            batch_size=engine.batch_size), path / _NN_MODEL_FILE)
+    elif isinstance(alg_interface, SingleSplitWrapperAlgInterface) \
+            and all(isinstance(s, TreeBasedSubSplitInterface) for s in alg_interface.sub_split_interfaces):
+        meta['model_type'] = 'gbdt'
+        sub_split_states = []
+        for i, sub_interface in enumerate(alg_interface.sub_split_interfaces):
+            lib = _get_booster_lib(sub_interface.model)
+            filename = f'booster_{i}.{_BOOSTER_FILE_EXTENSIONS[lib]}'
+            _save_booster(sub_interface.model, path / filename)
+            sub_split_states.append(dict(interface_class=_get_class_path(sub_interface), lib=lib, filename=filename,
+                                         tfm=sub_interface.tfm, n_classes=sub_interface.n_classes,
+                                         fit_params=sub_interface.fit_params))
+        state['sub_split_states'] = sub_split_states
+    else:
+        raise ValueError(f'Exporting estimators with {alg_interface.__class__.__name__} is not supported')
+
+    with open(path / _STATE_FILE, 'wb') as f:
+        pickle.dump(state, f)
+    # write the meta file last, such that incomplete exports cannot be loaded
+    with open(path / _META_FILE, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_exported(path: Union[str, Path], device: str = 'cpu', mmap: bool = True,
+                  predict_batch_size: Optional[int] = None) -> AlgInterfaceEstimator:
+    """
+    Loads an estimator that has been exported with export_estimator().
+    This does not import pytorch_lightning.
+    Warning: Loading unpickles the stored objects, which can execute arbitrary code.
+    Only load exported folders from trusted sources.
+
+    :param path: Folder that the estimator has been exported to.
+    :param device: Device that NN inference should run on.
+    :param mmap: Whether the NN parameters should be memory-mapped instead of being read into memory.
+        This requires torch>=2.1 and is ignored for older versions.
+    :param predict_batch_size: Batch size for NN inference. If None, the value used during training is used.
+    :return: Returns an ExportedClassifier or ExportedRegressor.
+    """
+    path = Path(path)
+    with open(path / _META_FILE, 'r') as f:
+        meta = json.load(f)
+    if meta.get('format_version', None) != EXPORT_FORMAT_VERSION:
+        raise ValueError(f'Unsupported export format version {meta.get("format_version", None)}, '
+                         f'expected version {EXPORT_FORMAT_VERSION}')
+    if meta.get('pytabkit_version', None) != __version__:
+        warnings.warn(f'The estimator has been exported with pytabkit version {meta.get("pytabkit_version", None)}, '
+                      f'but the installed version is {__version__}. Loading it might fail.')
+    with open(path / _STATE_FILE, 'rb') as f:
+        state = pickle.load(f)
+
+    if meta['model_type'] == 'nn':
+        # the mmap argument of torch.load() is only available for torch>=2.1
+        mmap_kwargs = dict(mmap=mmap) if 'mmap' in inspect.signature(torch.load).parameters else dict()
+        nn_state = torch.load(path / _NN_MODEL_FILE, map_location='cpu', weights_only=False, **mmap_kwargs)
+        model: Layer = nn_state['model'].to(device)
+        static_model: Optional[Layer] = nn_state['static_model']
+        if static_model is not None:
+            static_model = static_model.to(device)
+        engine = BatchedInferenceEngine(model=model, static_model=static_model, n_models=nn_state['n_models'],
+                                        batch_size=predict_batch_size or nn_state['batch_size'])
+        alg_interface = ExportedNNAlgInterface(engine, device=device)
+    elif meta['model_type'] == 'gbdt':
+        sub_split_interfaces = []
+        for sub_split_state in state.pop('sub_split_states'):
+            interface_class = _import_class(sub_split_state['interface_class'])
+            if not issubclass(interface_class, TreeBasedSubSplitInterface):
+                raise ValueError(f'Unexpected interface class {interface_class}')
+            sub_interface = interface_class(fit_params=sub_split_state['fit_params'])
+            sub_interface.tfm = sub_split_state['tfm']
+            sub_interface.n_classes = sub_split_state['n_classes']
+            sub_interface.model = _load_booster(sub_split_state['lib'], path / sub_split_state['filename'])
+            sub_split_interfaces.append(sub_interface)
+        alg_interface = SingleSplitWrapperAlgInterface(sub_split_interfaces)
+    else:
+        raise ValueError(f'Unknown model type "{meta["model_type"]}"')
+
+    estimator = ExportedClassifier() if meta['is_classification'] else ExportedRegressor()
+    for key, value in state.items():
+        setattr(estimator, key, value)
+    estimator.alg_interface_ = alg_interface
+    return estimator
@@ -17,6 +17,7 @@ from sklearn.utils.validation import check_is_fitted, check_X_y
 
 from pytabkit.models.alg_interfaces.alg_interfaces import AlgInterface
 from pytabkit.models.alg_interfaces.base import SplitIdxs, InterfaceResources
+from pytabkit.models.alg_interfaces.gbdt_dataset_cache import gbdt_dataset_cache
 from pytabkit.models.data.data import DictDataset, TensorInfo
 from pytabkit.models.data.splits import RandomSplitter, KFoldSplitter
 from pytabkit.models.data.conversion import ToDictDatasetConverter
@@ -127,7 +128,8 @@ class AlgInterfaceEstimator(BaseEstimator):
         #         or isinstance(y, pd.DataFrame) or isinstance(y, pd.Series)):
         #     raise ValueError(f'y has type {type(y)}, but should be one of np.ndarray, list, pd.DataFrame, or pd.Series')
         # y_df = pd.DataFrame(y)
-        X_df = to_df(X).copy()
+        # numerical arrays are converted without copying them, see ToDictDatasetConverter
+        X_df = X if self.x_converter_.accepts_array(X) else to_df(X).copy()
         y_df = to_df(y).copy()
         # self.y_encoder_.fit_transform(y)
 
@@ -302,27 +304,30 @@ class AlgInterfaceEstimator(BaseEstimator):
         logger = StdoutLogger(verbosity_level=params.get('verbosity', 0))
 
         interface_resources = InterfaceResources(n_threads=n_threads, gpu_devices=gpu_devices)
-        self.cv_alg_interface_.fit(ds=ds, idxs_list=idxs_list, interface_resources=interface_resources,
-                                   logger=logger, tmp_folders=tmp_folders, name=self.__class__.__name__)
-
-        # todo: put alg_interface on the CPU after fit() (for saving)? How to do it?
-
-        # todo: currently, there is only one alg_interface which may fit in parallel (for the NNs),
-        #  but we could add an option to make them fit sequentially for RAM reasons or so
-        #  (maybe this is best done via a MultiSplitWrapper or so)
-
-        if n_refit > 0:
-            self.refit_alg_interface_ = self.cv_alg_interface_.get_refit_interface(n_refit=n_refit)
-            train_idxs = torch.arange(ds.n_samples, dtype=torch.long)[None, :].expand(n_refit, -1)
-            refit_idxs_list = [SplitIdxs(train_idxs=train_idxs,
-                                         val_idxs=None, test_idxs=None, split_seed=refit_split_seed,
-                                         sub_split_seeds=refit_sub_split_seeds, split_id=0)]
-            self.refit_alg_interface_.fit(ds=ds, idxs_list=refit_idxs_list, interface_resources=interface_resources,
-                                          logger=logger, tmp_folders=refit_tmp_folders,
-                                          name=self.__class__.__name__ + ' [refit]')
-            self.alg_interface_ = self.refit_alg_interface_
-        else:
-            self.alg_interface_ = self.cv_alg_interface_
+        try:
+            self.cv_alg_interface_.fit(ds=ds, idxs_list=idxs_list, interface_resources=interface_resources,
+                                       logger=logger, tmp_folders=tmp_folders, name=self.__class__.__name__)
+
+            # todo: put alg_interface on the CPU after fit() (for saving)? How to do it?
+
+            # todo: currently, there is only one alg_interface which may fit in parallel (for the NNs),
+            #  but we could add an option to make them fit sequentially for RAM reasons or so
+            #  (maybe this is best done via a MultiSplitWrapper or so)
+
+            if n_refit > 0:
+                self.refit_alg_interface_ = self.cv_alg_interface_.get_refit_interface(n_refit=n_refit)
+                train_idxs = torch.arange(ds.n_samples, dtype=torch.long)[None, :].expand(n_refit, -1)
+                refit_idxs_list = [SplitIdxs(train_idxs=train_idxs,
+                                             val_idxs=None, test_idxs=None, split_seed=refit_split_seed,
+                                             sub_split_seeds=refit_sub_split_seeds, split_id=0)]
+                self.refit_alg_interface_.fit(ds=ds, idxs_list=refit_idxs_list, interface_resources=interface_resources,
+                                              logger=logger, tmp_folders=refit_tmp_folders,
+                                              name=self.__class__.__name__ + ' [refit]')
+                self.alg_interface_ = self.refit_alg_interface_
+            else:
+                self.alg_interface_ = self.cv_alg_interface_
+        finally:
+            self._clear_gbdt_dataset_cache()
 
         return self
 
@@ -339,12 +344,33 @@ class AlgInterfaceEstimator(BaseEstimator):
         # if isinstance(X, np.ndarray):
         check_array(X, force_all_finite='allow-nan')
 
-        x_ds = self.x_converter_.transform(to_df(X))
+        x_ds = self.x_converter_.transform(X if self.x_converter_.accepts_array(X) else to_df(X))
         if torch.any(torch.isnan(x_ds.tensors['x_cont'])):
             raise ValueError('NaN values in continuous columns are currently not allowed!')
-        y_preds = self.alg_interface_.predict(x_ds).detach().cpu()
+        try:
+            y_preds = self.alg_interface_.predict(x_ds).detach().cpu()
+        finally:
+            self._clear_gbdt_dataset_cache()
         return y_preds
 
+    def _clear_gbdt_dataset_cache(self) -> None:
+        # the converted datasets are only reused within one call to fit() or predict(),
+        # afterward they would only keep memory alive
+        if self.get_config().get('use_gbdt_dataset_cache', False):
+            gbdt_dataset_cache.clear()
+
+    def export(self, path: Union[str, Path]) -> None:
+        """
+        Exports the fitted estimator to a folder containing only what is needed for inference.
+        It can be loaded using pytabkit.models.sklearn.export.load_exported(),
+        which is much faster than unpickling the estimator and does not import pytorch_lightning.
+
+        :param path: Folder where the exported files should be written to.
+        """
+        check_is_fitted(self, ['alg_interface_', 'x_converter_'])
+        from pytabkit.models.sklearn.export import export_estimator  # avoid circular import
+        export_estimator(self, path)
+
 
 class AlgInterfaceClassifier(AlgInterfaceEstimator, ClassifierMixin):
     def _is_classification(self) -> bool:
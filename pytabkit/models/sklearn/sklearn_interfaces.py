@@ -5,21 +5,52 @@ import numpy as np
 
 from pytabkit.models.sklearn.default_params import DefaultParams
 from pytabkit.models.sklearn.sklearn_base import AlgInterfaceRegressor, AlgInterfaceClassifier
-from pytabkit.models.alg_interfaces.rtdl_interfaces import RTDL_MLPSubSplitInterface, ResnetSubSplitInterface, \
-    RandomParamsRTDLMLPAlgInterface, RandomParamsResnetAlgInterface
-from pytabkit.models.alg_interfaces.sub_split_interfaces import SingleSplitWrapperAlgInterface
-from pytabkit.models.alg_interfaces.tabr_interface import TabRSubSplitLearner
-from pytabkit.models.alg_interfaces.alg_interfaces import AlgInterface, \
-    OptAlgInterface
-from pytabkit.models.alg_interfaces.nn_interfaces import NNAlgInterface, RandomParamsNNAlgInterface
-from pytabkit.models.alg_interfaces.catboost_interfaces import CatBoostSubSplitInterface, CatBoostHyperoptAlgInterface, \
-    RandomParamsCatBoostAlgInterface
+from pytabkit.models.alg_interfaces.alg_interfaces import AlgInterface
 from pytabkit.models.alg_interfaces.ensemble_interfaces import AlgorithmSelectionAlgInterface, CaruanaEnsembleAlgInterface
-from pytabkit.models.alg_interfaces.lightgbm_interfaces import LGBMSubSplitInterface, LGBMHyperoptAlgInterface, \
-    RandomParamsLGBMAlgInterface
-from pytabkit.models.alg_interfaces.other_interfaces import RFSubSplitInterface, SklearnMLPSubSplitInterface
-from pytabkit.models.alg_interfaces.xgboost_interfaces import XGBSubSplitInterface, XGBHyperoptAlgInterface, \
-    RandomParamsXGBAlgInterface
+from pytabkit.models.alg_interfaces.sub_split_interfaces import SingleSplitWrapperAlgInterface
+
+
+# The AlgInterface implementations import their model libraries (lightgbm, xgboost, catboost, pytorch_lightning, ...),
+# so the corresponding modules are only imported when an estimator using them is fitted.
+
+def _nn_interfaces():
+    from pytabkit.models.alg_interfaces import nn_interfaces
+    return nn_interfaces
+
+
+def _lightgbm_interfaces():
+    from pytabkit.models.alg_interfaces import lightgbm_interfaces
+    return lightgbm_interfaces
+
+
+def _xgboost_interfaces():
+    from pytabkit.models.alg_interfaces import xgboost_interfaces
+    return xgboost_interfaces
+
+
+def _catboost_interfaces():
+    from pytabkit.models.alg_interfaces import catboost_interfaces
+    return catboost_interfaces
+
+
+def _other_interfaces():
+    from pytabkit.models.alg_interfaces import other_interfaces
+    return other_interfaces
+
+
+def _rtdl_interfaces():
+    from pytabkit.models.alg_interfaces import rtdl_interfaces
+    return rtdl_interfaces
+
+
+def _tabr_interface():
+    from pytabkit.models.alg_interfaces import tabr_interface
+    return tabr_interface
+
+
+def _sub_split_wrapper(sub_split_interface_class, n_cv: int, /, **config) -> AlgInterface:
+    # positional-only arguments since config usually also contains n_cv
+    return SingleSplitWrapperAlgInterface([sub_split_interface_class(**config) for i in range(n_cv)])
 
 
 class RealMLPConstructorMixin:
@@ -62,6 +93,10 @@ class RealMLPConstructorMixin:
                  use_early_stopping: Optional[bool] = None,
                  early_stopping_additive_patience: Optional[int] = None,
                  early_stopping_multiplicative_patience: Optional[float] = None,
+                 use_fused_opt: Optional[bool] = None,
+                 use_fused_encoding: Optional[bool] = None,
+                 use_torch_compile: Optional[bool] = None,
+                 keep_data_on_host: Optional[bool] = None,
                  ):
         """
         Constructor for RealMLP, using the default parameters from RealMLP-TD.
@@ -202,6 +237,18 @@ class RealMLPConstructorMixin:
         :param early_stopping_multiplicative_patience: See use_early_stopping (default=2).
             We recommend to set it to 1 for monotone learning rate schedules
             but to keep it at 2 for the default schedule.
+        :param use_fused_opt: Whether to merge parameters with the same hyperparameters into one optimizer group
+            and update them with fused (foreach) operations, which reduces the optimizer overhead (default=False).
+        :param use_fused_encoding: Whether to encode all one-hot/embedding categorical columns
+            with a single gather operation instead of a loop over columns (default=True).
+            This does not change the results but is faster for datasets with many categorical columns.
+        :param use_torch_compile: Whether to apply the model with torch.compile() in training and inference
+            (default=False). Currently, this is not a speedup in general: In our CPU benchmarks
+            (scripts/benchmark_torch_compile.py), full training steps were mostly slower with compilation,
+            and compilation additionally takes some time at the start of fit() and predict().
+        :param keep_data_on_host: Whether to keep the dataset in CPU memory (possibly memory-mapped)
+            when training on a GPU (default=False). Batches are then gathered on the CPU
+            and copied to the GPU asynchronously. This allows training on datasets that do not fit into GPU memory.
         """
         super().__init__()  # call the constructor of the other superclass for multiple inheritance
         self.device = device
@@ -267,6 +314,10 @@ class RealMLPConstructorMixin:
         self.use_early_stopping = use_early_stopping
         self.early_stopping_additive_patience = early_stopping_additive_patience
         self.early_stopping_multiplicative_patience = early_stopping_multiplicative_patience
+        self.use_fused_opt = use_fused_opt
+        self.use_fused_encoding = use_fused_encoding
+        self.use_torch_compile = use_torch_compile
+        self.keep_data_on_host = keep_data_on_host
 
 
 class RealMLP_TD_Classifier(RealMLPConstructorMixin, AlgInterfaceClassifier):
@@ -278,7 +329,7 @@ class RealMLP_TD_Classifier(RealMLPConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.RealMLP_TD_CLASS
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return NNAlgInterface(**self.get_config())
+        return _nn_interfaces().NNAlgInterface(**self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -293,7 +344,7 @@ class RealMLP_TD_S_Classifier(RealMLPConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.RealMLP_TD_S_CLASS
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return NNAlgInterface(**self.get_config())
+        return _nn_interfaces().NNAlgInterface(**self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -308,7 +359,7 @@ class RealMLP_TD_Regressor(RealMLPConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.RealMLP_TD_REG
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return NNAlgInterface(**self.get_config())
+        return _nn_interfaces().NNAlgInterface(**self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -323,7 +374,7 @@ class RealMLP_TD_S_Regressor(RealMLPConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.RealMLP_TD_S_REG
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return NNAlgInterface(**self.get_config())
+        return _nn_interfaces().NNAlgInterface(**self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -352,6 +403,8 @@ class LGBMConstructorMixin:
                  cat_smooth: Optional[float] = None,
                  cat_l2: Optional[float] = None,
                  val_metric_name: Optional[str] = None,
+                 n_parallel_folds: Optional[int] = None,
+                 use_gbdt_dataset_cache: Optional[bool] = None,
                  ):
         self.device = device
         self.random_state = random_state
@@ -377,6 +430,8 @@ class LGBMConstructorMixin:
         self.cat_smooth = cat_smooth
         self.cat_l2 = cat_l2
         self.val_metric_name = val_metric_name
+        self.n_parallel_folds = n_parallel_folds
+        self.use_gbdt_dataset_cache = use_gbdt_dataset_cache
 
 
 class LGBM_TD_Classifier(LGBMConstructorMixin, AlgInterfaceClassifier):
@@ -384,7 +439,7 @@ class LGBM_TD_Classifier(LGBMConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.LGBM_TD_CLASS
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([LGBMSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_lightgbm_interfaces().LGBMSubSplitInterface, n_cv, **self.get_config())
 
 
 class LGBM_D_Classifier(LGBMConstructorMixin, AlgInterfaceClassifier):
@@ -392,7 +447,7 @@ class LGBM_D_Classifier(LGBMConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.LGBM_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([LGBMSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_lightgbm_interfaces().LGBMSubSplitInterface, n_cv, **self.get_config())
 
 
 class LGBM_TD_Regressor(LGBMConstructorMixin, AlgInterfaceRegressor):
@@ -400,7 +455,7 @@ class LGBM_TD_Regressor(LGBMConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.LGBM_TD_REG
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([LGBMSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_lightgbm_interfaces().LGBMSubSplitInterface, n_cv, **self.get_config())
 
     def _supports_multioutput(self) -> bool:
         return False
@@ -411,7 +466,7 @@ class LGBM_D_Regressor(LGBMConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.LGBM_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([LGBMSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_lightgbm_interfaces().LGBMSubSplitInterface, n_cv, **self.get_config())
 
     def _supports_multioutput(self) -> bool:
         return False
@@ -439,6 +494,8 @@ class XGBConstructorMixin:
                  num_parallel_tree: Optional[int] = None,
                  max_bin: Optional[int] = None,
                  multi_strategy: Optional[str] = None,
+                 n_parallel_folds: Optional[int] = None,
+                 use_gbdt_dataset_cache: Optional[bool] = None,
                  ):
         self.device = device
         self.random_state = random_state
@@ -467,6 +524,8 @@ class XGBConstructorMixin:
         self.num_parallel_tree = num_parallel_tree
         self.max_bin = max_bin
         self.multi_strategy = multi_strategy
+        self.n_parallel_folds = n_parallel_folds
+        self.use_gbdt_dataset_cache = use_gbdt_dataset_cache
 
 
 class XGB_TD_Classifier(XGBConstructorMixin, AlgInterfaceClassifier):
@@ -474,7 +533,7 @@ class XGB_TD_Classifier(XGBConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.XGB_TD_CLASS
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([XGBSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_xgboost_interfaces().XGBSubSplitInterface, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda']
@@ -485,7 +544,7 @@ class XGB_D_Classifier(XGBConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.XGB_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([XGBSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_xgboost_interfaces().XGBSubSplitInterface, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda']
@@ -496,7 +555,7 @@ class XGB_PBB_D_Classifier(XGBConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.XGB_PBB_CLASS
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([XGBSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_xgboost_interfaces().XGBSubSplitInterface, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda']
@@ -507,7 +566,7 @@ class XGB_TD_Regressor(XGBConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.XGB_TD_REG
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([XGBSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_xgboost_interfaces().XGBSubSplitInterface, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda']
@@ -521,7 +580,7 @@ class XGB_D_Regressor(XGBConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.XGB_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([XGBSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_xgboost_interfaces().XGBSubSplitInterface, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda']
@@ -551,6 +610,8 @@ class CatBoostConstructorMixin:
                  l2_leaf_reg: Optional[float] = None,
                  one_hot_max_size: Optional[int] = None,
                  val_metric_name: Optional[str] = None,
+                 n_parallel_folds: Optional[int] = None,
+                 use_gbdt_dataset_cache: Optional[bool] = None,
                  ):
         self.device = device
         self.random_state = random_state
@@ -577,6 +638,8 @@ class CatBoostConstructorMixin:
         self.l2_leaf_reg = l2_leaf_reg
         self.one_hot_max_size = one_hot_max_size
         self.val_metric_name = val_metric_name
+        self.n_parallel_folds = n_parallel_folds
+        self.use_gbdt_dataset_cache = use_gbdt_dataset_cache
 
 
 class CatBoost_TD_Classifier(CatBoostConstructorMixin, AlgInterfaceClassifier):
@@ -584,7 +647,7 @@ class CatBoost_TD_Classifier(CatBoostConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.CB_TD_CLASS
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([CatBoostSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_catboost_interfaces().CatBoostSubSplitInterface, n_cv, **self.get_config())
 
     def _supports_single_class(self) -> bool:
         return False
@@ -598,7 +661,7 @@ class CatBoost_D_Classifier(CatBoostConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.CB_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([CatBoostSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_catboost_interfaces().CatBoostSubSplitInterface, n_cv, **self.get_config())
 
     def _supports_single_class(self) -> bool:
         return False
@@ -612,7 +675,7 @@ class CatBoost_TD_Regressor(CatBoostConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.CB_TD_REG
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([CatBoostSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_catboost_interfaces().CatBoostSubSplitInterface, n_cv, **self.get_config())
 
     def _supports_multioutput(self) -> bool:
         return False
@@ -626,7 +689,7 @@ class CatBoost_D_Regressor(CatBoostConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.CB_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([CatBoostSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_catboost_interfaces().CatBoostSubSplitInterface, n_cv, **self.get_config())
 
     def _supports_multioutput(self) -> bool:
         return False
@@ -669,7 +732,7 @@ class RF_SKL_D_Classifier(RFConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.RF_SKL_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([RFSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_other_interfaces().RFSubSplitInterface, n_cv, **self.get_config())
 
 
 class RF_SKL_D_Regressor(RFConstructorMixin, AlgInterfaceRegressor):
@@ -677,7 +740,7 @@ class RF_SKL_D_Regressor(RFConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.RF_SKL_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([RFSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_other_interfaces().RFSubSplitInterface, n_cv, **self.get_config())
 
 
 class MLPSKLConstructorMixin:
@@ -700,7 +763,7 @@ class MLP_SKL_D_Classifier(MLPSKLConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.MLP_SKL_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([SklearnMLPSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_other_interfaces().SklearnMLPSubSplitInterface, n_cv, **self.get_config())
 
 
 class MLP_SKL_D_Regressor(MLPSKLConstructorMixin, AlgInterfaceRegressor):
@@ -708,7 +771,7 @@ class MLP_SKL_D_Regressor(MLPSKLConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.MLP_SKL_D
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([SklearnMLPSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_other_interfaces().SklearnMLPSubSplitInterface, n_cv, **self.get_config())
 
 
 # HPO methods
@@ -720,6 +783,8 @@ class GBDTHPOConstructorMixin:
                  n_estimators: Optional[int] = None,
                  space: Optional[str] = None,
                  n_hyperopt_steps: Optional[int] = None,
+                 n_parallel_hpo_trials: Optional[int] = None,
+                 opt_method: Optional[str] = None,
                  ):
         self.device = device
         self.random_state = random_state
@@ -732,6 +797,8 @@ class GBDTHPOConstructorMixin:
         self.n_estimators = n_estimators
         self.space = space
         self.n_hyperopt_steps = n_hyperopt_steps
+        self.n_parallel_hpo_trials = n_parallel_hpo_trials
+        self.opt_method = opt_method
 
 
 class XGB_HPO_Classifier(GBDTHPOConstructorMixin, AlgInterfaceClassifier):
@@ -744,7 +811,7 @@ class XGB_HPO_Classifier(GBDTHPOConstructorMixin, AlgInterfaceClassifier):
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
         return AlgorithmSelectionAlgInterface(
-            [SingleSplitWrapperAlgInterface([RandomParamsXGBAlgInterface(model_idx=i, **config) for j in range(n_cv)])
+            [_sub_split_wrapper(_xgboost_interfaces().RandomParamsXGBAlgInterface, n_cv, model_idx=i, **config)
              for i in range(n_hyperopt_steps)])
 
     def _allowed_device_names(self) -> List[str]:
@@ -758,7 +825,7 @@ class XGB_HPO_TPE_Classifier(GBDTHPOConstructorMixin, AlgInterfaceClassifier):
                     tree_method='hist', space='grinsztajn')
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return XGBHyperoptAlgInterface(**self.get_config())
+        return _xgboost_interfaces().XGBHyperoptAlgInterface(**self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda']
@@ -777,7 +844,7 @@ class XGB_HPO_Regressor(GBDTHPOConstructorMixin, AlgInterfaceRegressor):
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
         return AlgorithmSelectionAlgInterface(
-            [SingleSplitWrapperAlgInterface([RandomParamsXGBAlgInterface(model_idx=i, **config) for j in range(n_cv)])
+            [_sub_split_wrapper(_xgboost_interfaces().RandomParamsXGBAlgInterface, n_cv, model_idx=i, **config)
              for i in range(n_hyperopt_steps)])
 
     def _supports_multioutput(self) -> bool:
@@ -794,7 +861,7 @@ class XGB_HPO_TPE_Regressor(GBDTHPOConstructorMixin, AlgInterfaceRegressor):
         return ['cpu', 'cuda']
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return XGBHyperoptAlgInterface(**self.get_config())
+        return _xgboost_interfaces().XGBHyperoptAlgInterface(**self.get_config())
 
     def _supports_multioutput(self) -> bool:
         return False
@@ -810,7 +877,7 @@ class LGBM_HPO_Classifier(GBDTHPOConstructorMixin, AlgInterfaceClassifier):
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
         return AlgorithmSelectionAlgInterface(
-            [SingleSplitWrapperAlgInterface([RandomParamsLGBMAlgInterface(model_idx=i, **config) for j in range(n_cv)])
+            [_sub_split_wrapper(_lightgbm_interfaces().RandomParamsLGBMAlgInterface, n_cv, model_idx=i, **config)
              for i in range(n_hyperopt_steps)])
 
 
@@ -821,7 +888,7 @@ class LGBM_HPO_TPE_Classifier(GBDTHPOConstructorMixin, AlgInterfaceClassifier):
                     space='catboost_quality_benchmarks')
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return LGBMHyperoptAlgInterface(**self.get_config())
+        return _lightgbm_interfaces().LGBMHyperoptAlgInterface(**self.get_config())
 
 
 class LGBM_HPO_Regressor(GBDTHPOConstructorMixin, AlgInterfaceRegressor):
@@ -834,7 +901,7 @@ class LGBM_HPO_Regressor(GBDTHPOConstructorMixin, AlgInterfaceRegressor):
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
         return AlgorithmSelectionAlgInterface(
-            [SingleSplitWrapperAlgInterface([RandomParamsLGBMAlgInterface(model_idx=i, **config) for j in range(n_cv)])
+            [_sub_split_wrapper(_lightgbm_interfaces().RandomParamsLGBMAlgInterface, n_cv, model_idx=i, **config)
              for i in range(n_hyperopt_steps)])
 
     def _supports_multioutput(self) -> bool:
@@ -848,7 +915,7 @@ class LGBM_HPO_TPE_Regressor(GBDTHPOConstructorMixin, AlgInterfaceRegressor):
                     space='catboost_quality_benchmarks')
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return LGBMHyperoptAlgInterface(**self.get_config())
+        return _lightgbm_interfaces().LGBMHyperoptAlgInterface(**self.get_config())
 
     def _supports_multioutput(self) -> bool:
         return False
@@ -864,7 +931,7 @@ class CatBoost_HPO_Classifier(GBDTHPOConstructorMixin, AlgInterfaceClassifier):
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
         return AlgorithmSelectionAlgInterface(
-            [SingleSplitWrapperAlgInterface([RandomParamsCatBoostAlgInterface(model_idx=i, **config) for j in range(n_cv)])
+            [_sub_split_wrapper(_catboost_interfaces().RandomParamsCatBoostAlgInterface, n_cv, model_idx=i, **config)
              for i in range(n_hyperopt_steps)])
 
     def _supports_single_class(self) -> bool:
@@ -881,7 +948,7 @@ class CatBoost_HPO_TPE_Classifier(GBDTHPOConstructorMixin, AlgInterfaceClassifie
                     space='shwartz-ziv')
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return CatBoostHyperoptAlgInterface(**self.get_config())
+        return _catboost_interfaces().CatBoostHyperoptAlgInterface(**self.get_config())
 
     def _supports_single_class(self) -> bool:
         return False
@@ -900,8 +967,7 @@ class CatBoost_HPO_Regressor(GBDTHPOConstructorMixin, AlgInterfaceRegressor):
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
         return AlgorithmSelectionAlgInterface(
-            [SingleSplitWrapperAlgInterface(
-                [RandomParamsCatBoostAlgInterface(model_idx=i, **config) for j in range(n_cv)])
+            [_sub_split_wrapper(_catboost_interfaces().RandomParamsCatBoostAlgInterface, n_cv, model_idx=i, **config)
              for i in range(n_hyperopt_steps)])
 
     def _supports_multioutput(self) -> bool:
@@ -918,7 +984,7 @@ class CatBoost_HPO_TPE_Regressor(GBDTHPOConstructorMixin, AlgInterfaceRegressor)
                     space='shwartz-ziv')
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return CatBoostHyperoptAlgInterface(**self.get_config())
+        return _catboost_interfaces().CatBoostHyperoptAlgInterface(**self.get_config())
 
     def _supports_multioutput(self) -> bool:
         return False
@@ -932,7 +998,14 @@ class RealMLPHPOConstructorMixin:
                  n_cv: int = 1, n_refit: int = 0, val_fraction: float = 0.2, n_threads: Optional[int] = None,
                  tmp_folder: Optional[Union[str, pathlib.Path]] = None, verbosity: int = 0,
                  n_hyperopt_steps: Optional[int] = None, val_metric_name: Optional[str] = None,
+                 n_vectorized_configs: Optional[int] = None,
                  ):
+        """
+        :param n_vectorized_configs: Maximum number of sampled configurations
+            that are trained together in one vectorized model (default: 1).
+            Configurations can only be trained together if they only differ in
+            lr, wd, p_drop, ls_eps and plr_sigma. Using larger values can speed up training, especially on GPUs.
+        """
         self.device = device
         self.random_state = random_state
         self.n_cv = n_cv
@@ -943,6 +1016,7 @@ class RealMLPHPOConstructorMixin:
         self.verbosity = verbosity
         self.n_hyperopt_steps = n_hyperopt_steps
         self.val_metric_name = val_metric_name
+        self.n_vectorized_configs = n_vectorized_configs
 
 
 class RealMLP_HPO_Classifier(RealMLPHPOConstructorMixin, AlgInterfaceClassifier):
@@ -952,7 +1026,9 @@ class RealMLP_HPO_Classifier(RealMLPHPOConstructorMixin, AlgInterfaceClassifier)
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
-        return AlgorithmSelectionAlgInterface([RandomParamsNNAlgInterface(model_idx=i, **config)
+        if config.get('n_vectorized_configs', 1) > 1:
+            return _nn_interfaces().VectorizedRandomParamsNNAlgInterface(**config)
+        return AlgorithmSelectionAlgInterface([_nn_interfaces().RandomParamsNNAlgInterface(model_idx=i, **config)
                                                for i in range(n_hyperopt_steps)])
 
     def _allowed_device_names(self) -> List[str]:
@@ -966,7 +1042,9 @@ class RealMLP_HPO_Regressor(RealMLPHPOConstructorMixin, AlgInterfaceRegressor):
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
-        return AlgorithmSelectionAlgInterface([RandomParamsNNAlgInterface(model_idx=i, **config)
+        if config.get('n_vectorized_configs', 1) > 1:
+            return _nn_interfaces().VectorizedRandomParamsNNAlgInterface(**config)
+        return AlgorithmSelectionAlgInterface([_nn_interfaces().RandomParamsNNAlgInterface(model_idx=i, **config)
                                                for i in range(n_hyperopt_steps)])
 
     def _allowed_device_names(self) -> List[str]:
@@ -1038,7 +1116,7 @@ class Resnet_RTDL_D_Classifier(ResnetConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.RESNET_RTDL_D_CLASS_TabZilla
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([ResnetSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_rtdl_interfaces().ResnetSubSplitInterface, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -1052,7 +1130,7 @@ class Resnet_RTDL_D_Regressor(ResnetConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.RESNET_RTDL_D_REG_TabZilla
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([ResnetSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_rtdl_interfaces().ResnetSubSplitInterface, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -1117,7 +1195,7 @@ class MLP_RTDL_D_Classifier(RTDL_MLPConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.MLP_RTDL_D_CLASS_TabZilla
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([RTDL_MLPSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_rtdl_interfaces().RTDL_MLPSubSplitInterface, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -1134,7 +1212,7 @@ class MLP_RTDL_D_Regressor(RTDL_MLPConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.MLP_RTDL_D_REG_TabZilla
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([RTDL_MLPSubSplitInterface(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_rtdl_interfaces().RTDL_MLPSubSplitInterface, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -1216,7 +1294,7 @@ class TabR_S_D_Classifier(TabrConstructorMixin, AlgInterfaceClassifier):
         return DefaultParams.TABR_S_D_CLASS
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([TabRSubSplitLearner(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_tabr_interface().TabRSubSplitLearner, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -1227,7 +1305,7 @@ class TabR_S_D_Regressor(TabrConstructorMixin, AlgInterfaceRegressor):
         return DefaultParams.TABR_S_D_REG
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
-        return SingleSplitWrapperAlgInterface([TabRSubSplitLearner(**self.get_config()) for i in range(n_cv)])
+        return _sub_split_wrapper(_tabr_interface().TabRSubSplitLearner, n_cv, **self.get_config())
 
     def _allowed_device_names(self) -> List[str]:
         return ['cpu', 'cuda', 'mps']
@@ -1243,7 +1321,7 @@ class MLP_RTDL_HPO_Classifier(RealMLPHPOConstructorMixin, AlgInterfaceClassifier
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
-        return AlgorithmSelectionAlgInterface([RandomParamsRTDLMLPAlgInterface(model_idx=i, **config)
+        return AlgorithmSelectionAlgInterface([_rtdl_interfaces().RandomParamsRTDLMLPAlgInterface(model_idx=i, **config)
                                                for i in range(n_hyperopt_steps)])
 
     def _allowed_device_names(self) -> List[str]:
@@ -1257,7 +1335,7 @@ class MLP_RTDL_HPO_Regressor(RealMLPHPOConstructorMixin, AlgInterfaceRegressor):
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
-        return AlgorithmSelectionAlgInterface([RandomParamsRTDLMLPAlgInterface(model_idx=i, **config)
+        return AlgorithmSelectionAlgInterface([_rtdl_interfaces().RandomParamsRTDLMLPAlgInterface(model_idx=i, **config)
                                                for i in range(n_hyperopt_steps)])
 
     def _allowed_device_names(self) -> List[str]:
@@ -1271,7 +1349,7 @@ class Resnet_RTDL_HPO_Classifier(RealMLPHPOConstructorMixin, AlgInterfaceClassif
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
-        return AlgorithmSelectionAlgInterface([RandomParamsResnetAlgInterface(model_idx=i, **config)
+        return AlgorithmSelectionAlgInterface([_rtdl_interfaces().RandomParamsResnetAlgInterface(model_idx=i, **config)
                                                for i in range(n_hyperopt_steps)])
 
     def _allowed_device_names(self) -> List[str]:
@@ -1285,7 +1363,7 @@ class Resnet_RTDL_HPO_Regressor(RealMLPHPOConstructorMixin, AlgInterfaceRegresso
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
         config = self.get_config()
         n_hyperopt_steps = config['n_hyperopt_steps']
-        return AlgorithmSelectionAlgInterface([RandomParamsResnetAlgInterface(model_idx=i, **config)
+        return AlgorithmSelectionAlgInterface([_rtdl_interfaces().RandomParamsResnetAlgInterface(model_idx=i, **config)
                                                for i in range(n_hyperopt_steps)])
 
     def _allowed_device_names(self) -> List[str]:
@@ -1309,10 +1387,10 @@ class Ensemble_TD_Classifier(AlgInterfaceClassifier):
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
         td_interfaces = [
-            SingleSplitWrapperAlgInterface([LGBMSubSplitInterface(**DefaultParams.LGBM_TD_CLASS, allow_gpu=False) for i in range(n_cv)]),
-            SingleSplitWrapperAlgInterface([XGBSubSplitInterface(**DefaultParams.XGB_TD_CLASS, allow_gpu=False) for i in range(n_cv)]),
-            SingleSplitWrapperAlgInterface([CatBoostSubSplitInterface(**DefaultParams.CB_TD_CLASS, allow_gpu=False) for i in range(n_cv)]),
-            NNAlgInterface(**DefaultParams.RealMLP_TD_CLASS),
+            _sub_split_wrapper(_lightgbm_interfaces().LGBMSubSplitInterface, n_cv, **DefaultParams.LGBM_TD_CLASS, allow_gpu=False),
+            _sub_split_wrapper(_xgboost_interfaces().XGBSubSplitInterface, n_cv, **DefaultParams.XGB_TD_CLASS, allow_gpu=False),
+            _sub_split_wrapper(_catboost_interfaces().CatBoostSubSplitInterface, n_cv, **DefaultParams.CB_TD_CLASS, allow_gpu=False),
+            _nn_interfaces().NNAlgInterface(**DefaultParams.RealMLP_TD_CLASS),
         ]
         return CaruanaEnsembleAlgInterface(td_interfaces)
 
@@ -1335,10 +1413,10 @@ class Ensemble_TD_Regressor(AlgInterfaceRegressor):
 
     def _create_alg_interface(self, n_cv: int) -> AlgInterface:
         td_interfaces = [
-            SingleSplitWrapperAlgInterface([LGBMSubSplitInterface(**DefaultParams.LGBM_TD_REG, allow_gpu=False) for i in range(n_cv)]),
-            SingleSplitWrapperAlgInterface([XGBSubSplitInterface(**DefaultParams.XGB_TD_REG, allow_gpu=False) for i in range(n_cv)]),
-            SingleSplitWrapperAlgInterface([CatBoostSubSplitInterface(**DefaultParams.CB_TD_REG, allow_gpu=False) for i in range(n_cv)]),
-            NNAlgInterface(**DefaultParams.RealMLP_TD_REG),
+            _sub_split_wrapper(_lightgbm_interfaces().LGBMSubSplitInterface, n_cv, **DefaultParams.LGBM_TD_REG, allow_gpu=False),
+            _sub_split_wrapper(_xgboost_interfaces().XGBSubSplitInterface, n_cv, **DefaultParams.XGB_TD_REG, allow_gpu=False),
+            _sub_split_wrapper(_catboost_interfaces().CatBoostSubSplitInterface, n_cv, **DefaultParams.CB_TD_REG, allow_gpu=False),
+            _nn_interfaces().NNAlgInterface(**DefaultParams.RealMLP_TD_REG),
         ]
         return CaruanaEnsembleAlgInterface(td_interfaces)
 
@@ -61,6 +61,15 @@ def cat_if_necessary(tensors: List[torch.Tensor], dim: int):
     return torch.cat(tensors, dim=dim)
 
 
+def is_compiling() -> bool:
+    """
+    :return: Whether the code is currently traced by torch.compile().
+        Always False for older torch versions without torch.compiler.is_compiling().
+    """
+    compiler = getattr(torch, 'compiler', None)
+    return compiler is not None and hasattr(compiler, 'is_compiling') and compiler.is_compiling()
+
+
 def hash_tensor(tensor: torch.Tensor) -> int:
     # for debugging purposes, to print two tensor's hashes to see if they are equal
     # from https://discuss.pytorch.org/t/defining-hash-function-for-multi-dimensional-tensor/107531
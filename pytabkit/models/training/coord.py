@@ -1,4 +1,7 @@
-from typing import Dict
+from typing import Dict, Optional, Union
+
+import numpy as np
+import torch
 
 from pytabkit.models.training.scheduling import ConstantSchedule, get_schedule
 
@@ -17,15 +20,34 @@ class HyperparamManager:
             return self.tc.hyper_base_values[self.hyper_name][self.base_value_pattern] * \
                    self.tc.get_hyper_sched_values()[self.hyper_name][self.sched_pattern]
 
+        def get_tensor(self) -> Optional[torch.Tensor]:
+            """
+            Version of __call__() for use inside torch.compile(), where reading a float that changes in every step
+            would trigger a recompilation. The schedule value is a 0-dim tensor that is updated in-place.
+            :return: A 0-dim tensor, or None if the HyperparamManager does not use schedule tensors.
+            """
+            if self.tc.hyper_sched_tensors is None:
+                return None
+            self.tc.update_hyper_sched_values()
+            return self.tc.hyper_base_values[self.hyper_name][self.base_value_pattern] * \
+                self.tc.hyper_sched_tensors[self.hyper_name][self.sched_pattern]
+
     def __init__(self, **config):
         self.config = config
         self.hyper_base_values = {}
         self.hyper_scheds = {}
         self.hyper_sched_values = None
+        # 0-dim tensor copies of hyper_sched_values, only maintained if the model is compiled, see HyperGetter
+        self.hyper_sched_tensors = {} if config.get('use_torch_compile', False) else None
         # regularization terms
         self.reg_terms = []
         self.needs_update = True  # indicates whether self.hyper_sched_values needs to be updated
         self.more_info_dict = {}  # can be set from outside
+        # Hyperparameter values can also be given as lists with one value per train-test split
+        # (e.g., to train multiple configurations in one vectorized model).
+        # They are converted to tensors with one value per vectorized model, see get_model_values().
+        # This is set by NNCreator.setup_from_dataset().
+        self.n_tv_splits = 1
 
     def get_more_info_dict(self) -> Dict:
         return self.more_info_dict
@@ -45,6 +67,7 @@ class HyperparamManager:
             base_dict = self.config.get(name, default)
             if not isinstance(base_dict, dict):
                 base_dict = {'': base_dict}
+            base_dict = {key: self.get_model_values(value) for key, value in base_dict.items()}
             sched_dict = self.config.get(name + '_sched', default_sched)
             if not isinstance(sched_dict, dict):
                 sched_dict = {'': sched_dict}
@@ -58,6 +81,31 @@ class HyperparamManager:
                                             base_value_pattern=self._find_pattern(self.hyper_base_values[name], scope),
                                             sched_pattern=self._find_pattern(self.hyper_scheds[name], scope))
 
+    def get_model_values(self, value):
+        """
+        :param value: Hyperparameter value, either a scalar or a list with one value per train-test split.
+        :return: The scalar, or a tensor of shape (n_tt_splits * n_tv_splits,)
+            with one value per model of the vectorized model.
+        """
+        if isinstance(value, (list, tuple, np.ndarray, torch.Tensor)):
+            return torch.as_tensor(value, dtype=torch.float32).repeat_interleave(self.n_tv_splits)
+        return value
+
+    def to_model_dims(self, value: Union[float, torch.Tensor], x: torch.Tensor) -> Union[float, torch.Tensor]:
+        """
+        Makes a hyperparameter value broadcastable to a tensor of the vectorized model.
+        :param value: Scalar value or tensor with one value per vectorized model (see get_model_values()).
+        :param x: Tensor whose first dimension corresponds to the vectorized models, or tensor of shape
+            (n_samples, n_features) while the layers of a single model are fitted in NNCreator.create_model().
+        :return: The scalar, or the tensor on the device of x with shape (n_models, 1, ..., 1).
+        """
+        if not isinstance(value, torch.Tensor) or value.dim() == 0:
+            return value
+        if x.dim() <= 2:
+            # not vectorized, use the value of the model that is currently fitted
+            return value[self.more_info_dict['split_idx'] * self.n_tv_splits].item()
+        return value.to(x.device).view(-1, *([1] * (x.dim() - 1)))
+
     # def _to_array(self, value, name: str, length: int) -> torch.Tensor:
     #     if hasattr(value, "__len__"):
     #         # result is already a list or a numpy array
@@ -76,6 +124,14 @@ class HyperparamManager:
             # print(f'update')
             self.hyper_sched_values = {name: {pattern: sched.get_value() for pattern, sched in sched_dict.items()}
                                        for name, sched_dict in self.hyper_scheds.items()}
+            if self.hyper_sched_tensors is not None:
+                for name, values in self.hyper_sched_values.items():
+                    tensors = self.hyper_sched_tensors.setdefault(name, {})
+                    for pattern, value in values.items():
+                        if pattern in tensors:
+                            tensors[pattern].fill_(value)
+                        else:
+                            tensors[pattern] = torch.tensor(value)
             self.needs_update = False
 
     def add_reg_term(self, loss):
@@ -93,6 +149,3 @@ class HyperparamManager:
 
         self.update_hyper_sched_values()
 
-
-
-
@@ -0,0 +1,74 @@
+from typing import Optional
+
+import torch
+
+from pytabkit.models.data.data import DictDataset
+from pytabkit.models.nn_models.base import Layer
+
+
+class BatchedInferenceEngine:
+    """
+    Runs inference for a vectorized NN (a model with a leading n_models dimension)
+    without going through pl.Trainer.predict(), which has a considerable fixed overhead per call.
+    The model is applied in micro-batches under torch.no_grad()
+    and the predictions are written into a single preallocated output tensor.
+    """
+    def __init__(self, model: Layer, static_model: Optional[Layer], n_models: int, batch_size: int = 1024,
+                 use_torch_compile: bool = False, device: Optional[str] = None):
+        """
+        :param model: Trained (stacked) model, taking tensors of shape n_models x batch_size x ...
+        :param static_model: Model that is applied once to the whole dataset before batching
+        (e.g. fixed preprocessing), can be None.
+        :param n_models: Number of models that are vectorized in the model.
+        :param batch_size: Number of samples per micro-batch.
+        :param use_torch_compile: Whether to apply the model using torch.compile().
+        Compilation happens at the first call to predict().
+        :param device: If not None, the data set is kept on its (host) device and each batch is moved to this device,
+        where the static model is applied to the batch (see HostDictDataLoader).
+        """
+        self.model = model
+        self.static_model = static_model
+        self.n_models = n_models
+        self.batch_size = max(1, batch_size)
+        self.use_torch_compile = use_torch_compile
+        self.device = device
+        self.model_forward = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # compiled functions cannot be pickled, the compiled function will be recreated in predict()
+        state['model_forward'] = None
+        return state
+
+    def predict(self, ds: DictDataset) -> torch.Tensor:
+        """
+        :param ds: Dataset (on the device of the model, or on the host if device is not None). Labels will be ignored.
+        :return: Tensor of shape n_models x n_samples x n_outputs on the device of the model.
+        """
+        ds_x, _ = ds.split_xy()
+        was_training = self.model.training
+        self.model.eval()
+        if self.model_forward is None:
+            self.model_forward = torch.compile(self.model.forward) if self.use_torch_compile else self.model.forward
+        with torch.no_grad():
+            if self.static_model is not None and self.device is None:
+                ds_x = self.static_model.forward_ds(ds_x)
+            n_samples = ds_x.n_samples
+            y_pred = None
+            # run at least one batch such that the output shape is known even if n_samples == 0
+            for start in range(0, max(n_samples, 1), self.batch_size):
+                stop = min(start + self.batch_size, n_samples)
+                batch = {key: t[start:stop] for key, t in ds_x.tensors.items()}
+                if self.device is not None:
+                    batch = DictDataset(batch, ds_x.tensor_infos).to(self.device).tensors
+                    if self.static_model is not None:
+                        batch = self.static_model(batch)
+                # expand() does not copy, all models see the same samples
+                batch = {key: t[None].expand(self.n_models, *([-1] * t.dim())) for key, t in batch.items()}
+                y_batch = self.model_forward(batch)['x_cont']
+                if y_pred is None:
+                    y_pred = torch.empty(y_batch.shape[0], n_samples, *y_batch.shape[2:],
+                                         dtype=y_batch.dtype, device=y_batch.device)
+                y_pred[:, start:stop] = y_batch
+        self.model.train(was_training)
+        return y_pred
@@ -11,40 +11,76 @@ from pytabkit.models.training.logging import Logger
 
 
 class ParamCheckpointer:
+    """
+    Stores snapshots of the parameters and buffers of a vectorized model,
+    whose tensors all have a first dimension of size n_tt_splits * n_tv_splits.
+    The snapshots are allocated once, afterward saving or restoring an arbitrary subset of the models
+    only needs one masked torch.where() per tensor, without device synchronization.
+    """
     def __init__(self, n_tv_splits, n_tt_splits):
         self.n_tv_splits = n_tv_splits
         self.n_tt_splits = n_tt_splits
-        self.ckpt_params = [None] * (self.n_tt_splits * self.n_tv_splits)
-        self.ckpt_buffers = [None] * (self.n_tt_splits * self.n_tv_splits)
+        self.snapshots: Optional[List[Tensor]] = None
+        # which models have been saved at least once, only those are restored
+        self.is_saved: Optional[Tensor] = None
+
+    @staticmethod
+    def _get_values(model: Layer) -> List[Tensor]:
+        return list(model.parameters()) + list(model.buffers())
+
+    def _get_single_mask(self, parallel_idx: int, model_idx: int) -> Tensor:
+        mask = torch.zeros(self.n_tt_splits * self.n_tv_splits, dtype=torch.bool)
+        mask[self.n_tv_splits * parallel_idx + model_idx] = True
+        return mask
+
+    def save_masked(self, model: Layer, mask: Tensor):
+        """
+        Saves the parameters of the selected models.
+
+        :param model: Vectorized model.
+        :param mask: Boolean tensor of shape (n_tt_splits, n_tv_splits) or (n_tt_splits * n_tv_splits,),
+            which is True for the models that should be saved.
+        """
+        with torch.no_grad():
+            values = self._get_values(model)
+            if len(values) == 0:
+                return
+            mask = mask.reshape(-1).to(values[0].device)
+            if self.snapshots is None:
+                # the copies also contain the values of the unselected models, but these are not marked as saved
+                self.snapshots = [v.detach().clone() for v in values]
+                self.is_saved = mask.clone()
+                return
+            self.is_saved |= mask
+            for snapshot, v in zip(self.snapshots, values):
+                torch.where(mask.view(-1, *([1] * (v.dim() - 1))), v, snapshot, out=snapshot)
+
+    def restore_masked(self, model: Layer, mask: Tensor):
+        """
+        Restores the saved parameters of the selected models. Models that have not been saved yet are not modified.
+
+        :param model: Vectorized model.
+        :param mask: Boolean tensor of shape (n_tt_splits, n_tv_splits) or (n_tt_splits * n_tv_splits,),
+            which is True for the models that should be restored.
+        """
+        if self.snapshots is None:
+            return
+        with torch.no_grad():
+            mask = mask.reshape(-1).to(self.is_saved.device) & self.is_saved
+            for snapshot, v in zip(self.snapshots, self._get_values(model)):
+                torch.where(mask.view(-1, *([1] * (v.dim() - 1))), snapshot, v, out=v)
 
     def save(self, parallel_idx: int, model_idx: int, model: Layer):
-        idx = self.n_tv_splits * parallel_idx + model_idx
-        with torch.no_grad():
-            for ckpt, values in [(self.ckpt_params, model.parameters()), (self.ckpt_buffers, model.buffers())]:
-                if ckpt[idx] is None:
-                    ckpt[idx] = [v[idx].clone() for v in values]
-                else:
-                    for c, v in zip(ckpt[idx], values):
-                        c.copy_(v[idx])
+        self.save_masked(model, self._get_single_mask(parallel_idx, model_idx))
 
     def restore(self, parallel_idx: int, model_idx: int, model: Layer):
-        idx = self.n_tv_splits * parallel_idx + model_idx
-        with torch.no_grad():
-            for ckpt, values in [(self.ckpt_params, model.parameters()), (self.ckpt_buffers, model.buffers())]:
-                if ckpt[idx] is not None:
-                    for c, v in zip(ckpt[idx], values):
-                        # print(f'Restore diff: {v[start:end]-c}')
-                        v[idx] = c
+        self.restore_masked(model, self._get_single_mask(parallel_idx, model_idx))
 
     def save_all(self, model: Layer):
-        for parallel_idx in range(self.n_tt_splits):
-            for model_idx in range(self.n_tv_splits):
-                self.save(parallel_idx, model_idx, model)
+        self.save_masked(model, torch.ones(self.n_tt_splits * self.n_tv_splits, dtype=torch.bool))
 
     def restore_all(self, model: Layer):
-        for parallel_idx in range(self.n_tt_splits):
-            for model_idx in range(self.n_tv_splits):
-                self.restore(parallel_idx, model_idx, model)
+        self.restore_masked(model, torch.ones(self.n_tt_splits * self.n_tv_splits, dtype=torch.bool))
 
 
 class HyperparamCallback(Callback):
@@ -66,21 +102,46 @@ class HyperparamCallback(Callback):
 class L1L2RegCallback(Callback):
     def __init__(self, hp_manager: HyperparamManager, model: Layer):
         self.hp_manager = hp_manager
-        self.params: List[Variable] = list(model.parameters())
-        self.l1_getters = [self.hp_manager.register_hyper('l1_reg', p.context.scope, default=0.0)
-                           for p in self.params]
-        self.l2_getters = [self.hp_manager.register_hyper('l2_reg', p.context.scope, default=0.0)
-                           for p in self.params]
+        # group parameters whose l1_reg and l2_reg values are given by the same patterns and factors,
+        # such that the scheduled values are only computed once per group (similar to fused optimizer groups)
+        groups = dict()
+        getters = dict()
+        for p in model.parameters():
+            key = []
+            for name in ['l1_reg', 'l2_reg']:
+                getter = self.hp_manager.register_hyper(name, p.context.scope, default=0.0)
+                if self._is_always_zero(getter):
+                    key.append(None)
+                else:
+                    factor = p.hyper_factors.get(name, 1.0)
+                    key.append((name, getter.base_value_pattern, getter.sched_pattern, factor))
+                    getters[key[-1]] = (getter, factor)
+            if key != [None, None]:
+                groups.setdefault(tuple(key), []).append(p)
+        # list of (l1 getter and factor or None, l2 getter and factor or None, parameters)
+        self.groups = [(getters.get(l1_key, None), getters.get(l2_key, None), params)
+                       for (l1_key, l2_key), params in groups.items()]
+
+    def _is_always_zero(self, getter: HyperparamManager.HyperGetter) -> bool:
+        # a base value of zero cannot be changed by the schedule
+        base_value = self.hp_manager.hyper_base_values[getter.hyper_name][getter.base_value_pattern]
+        return isinstance(base_value, (int, float)) and base_value == 0.0
 
     def on_after_backward(self, trainer: "pl.Trainer", pl_module: "pl.LightningModule") -> None:
-        for l1_getter, l2_getter, p in zip(self.l1_getters, self.l2_getters, self.params):
-            l1_reg = l1_getter() * p.hyper_factors.get('l1_reg', 1.0)
-            l2_reg = l2_getter() * p.hyper_factors.get('l2_reg', 1.0)
-
-            if l1_reg != 0.0:
-                p.grad += l1_reg * torch.sign(p)
-            if l2_reg != 0.0:
-                p.grad += (2.0 * l2_reg) * p
+        for l1_getter_factor, l2_getter_factor, params in self.groups:
+            l1_reg = 0.0 if l1_getter_factor is None else l1_getter_factor[0]() * l1_getter_factor[1]
+            l2_reg = 0.0 if l2_getter_factor is None else l2_getter_factor[0]() * l2_getter_factor[1]
+            if l1_reg == 0.0 and l2_reg == 0.0:
+                continue
+            params = [p for p in params if p.grad is not None]
+            if len(params) == 0:
+                continue
+            grads = [p.grad for p in params]
+            with torch.no_grad():
+                if l1_reg != 0.0:
+                    torch._foreach_add_(grads, torch._foreach_sign(params), alpha=l1_reg)
+                if l2_reg != 0.0:
+                    torch._foreach_add_(grads, params, alpha=2.0 * l2_reg)
 
         self.hp_manager.update_hypers(pl_module)
 
@@ -97,17 +158,12 @@ class ModelCheckpointCallback(Callback):
         self.ckpt.save_all(pl_module.model)
 
     def on_validation_end(self, trainer: "pl.Trainer", pl_module: "pl.LightningModule") -> None:
-        for tt_split_idx in range(self.n_tt_splits):
-            for tv_split_idx in range(self.n_tv_splits):
-                if self.use_best_mean_epoch:
-                    if pl_module.best_mean_val_epochs[tt_split_idx] == pl_module.progress.epoch:
-                        # if this is the best epoch, save the model
-                        self.ckpt.save(tt_split_idx, tv_split_idx, pl_module.model)
-                else:
-                    if pl_module.best_val_epochs[tt_split_idx][tv_split_idx] == pl_module.progress.epoch:
-                        # print(f'found improvement')
-                        # if this is the best epoch, save the model
-                        self.ckpt.save(tt_split_idx, tv_split_idx, pl_module.model)
+        if self.use_best_mean_epoch:
+            best_epochs = pl_module.best_mean_val_epochs[:, None].expand(self.n_tt_splits, self.n_tv_splits)
+        else:
+            best_epochs = pl_module.best_val_epochs
+        # save all models for which this is the best epoch
+        self.ckpt.save_masked(pl_module.model, best_epochs == pl_module.progress.epoch)
 
     def on_fit_end(self, trainer: "pl.Trainer", pl_module: "pl.LightningModule") -> None:
         # print(f'Before restore: {list(pl_module.model.parameters())[-1]}')
@@ -138,11 +194,9 @@ class StopAtEpochsCallback(Callback):
             trainer.should_stop = True
             return
 
-        for tt_split_idx, tv_stop_epochs in enumerate(self.stop_epochs):
-            for tv_split_idx, ep in enumerate(tv_stop_epochs):
-                if ep == epoch:
-                    # print(f'Saving checkpoint for model {i}')
-                    self.ckpt.save(tt_split_idx, tv_split_idx, self.model)
+        is_stop_epoch = torch.as_tensor(self.stop_epochs) == epoch
+        if torch.any(is_stop_epoch):
+            self.ckpt.save_masked(self.model, is_stop_epoch)
 
     # def on_train_batch_start(
     #     self, trainer: "pl.Trainer", pl_module: "pl.LightningModule", batch: Any, batch_idx: int
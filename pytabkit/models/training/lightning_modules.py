@@ -3,10 +3,11 @@ from typing import List, Optional, Dict, Any
 import numpy as np
 import torch
 
-from pytabkit.models.data.data import ParallelDictDataLoader, DictDataset
+from pytabkit.models.data.data import ParallelDictDataLoader, DictDataset, HostDictDataLoader
 from pytabkit.models.alg_interfaces.base import SplitIdxs, InterfaceResources
 from pytabkit.models.nn_models.base import Layer
 from pytabkit.models.optim.optimizers import get_opt_class
+from pytabkit.models.training.inference import BatchedInferenceEngine
 from pytabkit.models.training.nn_creator import NNCreator
 from pytabkit.models.training.logging import StdoutLogger, Logger
 from pytabkit.models.training.metrics import Metrics
@@ -32,6 +33,8 @@ class TabNNModule(pl.LightningModule):
 
         self.hp_manager = self.creator.hp_manager
         self.model: Optional[Layer] = None
+        # compiled version of self.model.forward() if use_torch_compile=True, created in get_model_forward()
+        self.model_forward = None
         self.criterion = None
         self.train_dl = None
 
@@ -50,7 +53,7 @@ class TabNNModule(pl.LightningModule):
         self.best_mean_val_epochs = None
         self.best_val_errors = None
         self.best_val_epochs = None
-        self.has_stopped_list = None
+        self.has_stopped = None
 
         # LightningModule
         self.automatic_optimization = False
@@ -66,9 +69,29 @@ class TabNNModule(pl.LightningModule):
             ds, idxs_list=idxs_list, interface_resources=interface_resources
         )
         self.model = self.creator.create_model(ds, idxs_list=idxs_list)
+        self.model_forward = None
         self.train_dl, self.val_dl = self.creator.create_dataloaders(ds)
         self.criterion, self.val_metric_name = self.creator.get_criterions()
 
+    def get_model_forward(self):
+        """
+        Returns the function that is used to apply the model in training and validation.
+        If use_torch_compile=True, this is a compiled version of self.model.forward().
+        The compiled function is stored as a function and not as a submodule,
+        such that the parameters are not registered twice.
+        """
+        if self.model_forward is None:
+            self.model_forward = self.model.forward
+            if self.config.get('use_torch_compile', False):
+                self.model_forward = torch.compile(self.model.forward)
+        return self.model_forward
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        # compiled functions cannot be pickled, they will be recreated in get_model_forward() when needed
+        state['model_forward'] = None
+        return state
+
     def create_callbacks(self):
         """ Helper method to return callbacks for the trainer.fit callback argument."""
         return self.creator.create_callbacks(self.model, self.my_logger)
@@ -76,29 +99,43 @@ class TabNNModule(pl.LightningModule):
     def get_predict_dataloader(self, ds: DictDataset):
         """ Helper method to create a dataloader for inference."""
         ds_x, _ = ds.split_xy()
-        ds_x = self.creator.static_model.forward_ds(ds_x)
         idxs_single = torch.arange(ds.n_samples, dtype=torch.long)
         idxs = idxs_single[None, :].expand(
             self.creator.n_tt_splits * self.creator.n_tv_splits, -1
         )
+        batch_size = self.creator.config.get("predict_batch_size", 1024)
+        if self.creator.keep_data_on_host:
+            return HostDictDataLoader(ds=ds_x, idxs=idxs, batch_size=batch_size, output_device=self.creator.device_info,
+                                      transform=self.creator.static_model)
+
+        ds_x = self.creator.static_model.forward_ds(ds_x)
+        return ParallelDictDataLoader(ds=ds_x, idxs=idxs, batch_size=batch_size)
 
-        return ParallelDictDataLoader(ds=ds_x, idxs=idxs,
-                                      batch_size=self.creator.config.get("predict_batch_size", 1024))
+    def create_inference_engine(self) -> BatchedInferenceEngine:
+        """ Helper method to create an engine for inference without pl.Trainer.predict(). """
+        return BatchedInferenceEngine(model=self.model, static_model=self.creator.static_model,
+                                      n_models=self.creator.n_tt_splits * self.creator.n_tv_splits,
+                                      batch_size=self.creator.config.get("predict_batch_size", 1024),
+                                      use_torch_compile=self.config.get('use_torch_compile', False),
+                                      device=self.creator.device_info if self.creator.keep_data_on_host else None)
 
     # ----- Start LightningModule Methods -----
     def on_fit_start(self):
         self.model.train()
+        # the validation state is kept in tensors on the training device to avoid synchronizations,
+        # they have shape n_tt_splits (mean over tv splits) or n_tt_splits x n_tv_splits (single splits)
+        shape = (self.creator.n_tt_splits, self.creator.n_tv_splits)
+        device = self.creator.device_info
         # mean val errors will not be accurate if all epochs after this yield NaN
-        self.best_mean_val_errors = [np.Inf] * self.creator.n_tt_splits
+        self.best_mean_val_errors = torch.full(shape[:1], np.Inf, device=device)
         # epoch 0 counts as before training, epoch 1 is first epoch
-        self.best_mean_val_epochs = [0] * self.creator.n_tt_splits
-        # don't use simpler notation of the form [[]] * 2 because this will have two references to the same inner array!
-        self.best_val_errors = [[np.Inf] * self.creator.n_tv_splits for i in range(self.creator.n_tt_splits)]
-        self.best_val_epochs = [[0] * self.creator.n_tv_splits for i in range(self.creator.n_tt_splits)]
-        self.has_stopped_list = [[False] * self.creator.n_tv_splits for i in range(self.creator.n_tt_splits)]
+        self.best_mean_val_epochs = torch.zeros(shape[:1], dtype=torch.long, device=device)
+        self.best_val_errors = torch.full(shape, np.Inf, device=device)
+        self.best_val_epochs = torch.zeros(shape, dtype=torch.long, device=device)
+        self.has_stopped = torch.zeros(shape, dtype=torch.bool, device=device)
 
     def training_step(self, batch, batch_idx):
-        output = self.model(batch)
+        output = self.get_model_forward()(batch)
         opt = self.optimizers()
         # do sum() over models dimension
         loss = self.criterion(output["x_cont"], output["y"]).sum()
@@ -119,86 +156,64 @@ class TabNNModule(pl.LightningModule):
         self.model.eval()
 
     def validation_step(self, batch, batch_idx):
-        self.val_preds.append(self.model(batch)["x_cont"])
+        self.val_preds.append(self.get_model_forward()(batch)["x_cont"])
 
     def on_validation_epoch_end(self):
         self.model.train(self.old_training)
         self.old_training = None
         y_pred = torch.cat(self.val_preds, dim=-2)
-        val_errors = torch.as_tensor(
-            [
-                Metrics.apply(
-                    y_pred[i, :, :], self.val_dl.val_y[i, :, :], self.val_metric_name
-                )
-                for i in range(y_pred.shape[0])
-            ]
-        )
+        # evaluate all models at once, the bookkeeping below is also vectorized
+        # such that only a constant number of device synchronizations per epoch is needed
+        val_errors = Metrics.apply_batched(y_pred, self.val_dl.val_y, self.val_metric_name)
         val_errors = val_errors.view(
             self.creator.n_tt_splits, self.creator.n_tv_splits
         )
         mean_val_errors = val_errors.mean(dim=-1)  # mean over cv/refit dimension
-        mean_val_error = mean_val_errors.mean().item()
 
-        self.my_logger.log(
-            2,
-            f"Epoch {self.progress.epoch + 1}/{self.progress.max_epochs}: val error = {mean_val_error:6.6f}",
-        )
+        if self.my_logger.get_verbosity_level() >= 2:
+            mean_val_error = mean_val_errors.mean().item()
+            self.my_logger.log(
+                2,
+                f"Epoch {self.progress.epoch + 1}/{self.progress.max_epochs}: val error = {mean_val_error:6.6f}",
+            )
 
         use_early_stopping = self.config.get('use_early_stopping', False)
         early_stopping_additive_patience = self.config.get('early_stopping_additive_patience', 20)
         early_stopping_multiplicative_patience = self.config.get('early_stopping_multiplicative_patience', 2)
+        use_last_best_epoch = self.config.get('use_last_best_epoch', True)
 
         current_epoch = self.progress.epoch + 1
 
-        for tt_split_idx in range(self.creator.n_tt_splits):
-            use_last_best_epoch = self.config.get('use_last_best_epoch', True)
-
-            has_stopped = self.has_stopped_list[tt_split_idx]
-
-            # compute best single-split validation errors
-            for tv_split_idx in range(self.creator.n_tv_splits):
-                if use_early_stopping and not has_stopped[tv_split_idx]:
-                    if current_epoch > early_stopping_multiplicative_patience \
-                            * self.best_val_epochs[tt_split_idx][tv_split_idx] \
-                            + early_stopping_additive_patience:
-                        has_stopped[tv_split_idx] = True
-
-                if not has_stopped[tv_split_idx]:
-                    # compute best validation errors
-                    current_err = val_errors[tt_split_idx, tv_split_idx].item()
-                    best_err = self.best_val_errors[
-                        tt_split_idx][tv_split_idx]
-                    # use <= on purpose such that latest epoch among tied best epochs is kept
-                    # this has been slightly beneficial for accuracy in previous experiments
-                    improved = current_err <= best_err if use_last_best_epoch \
-                        else current_err < best_err
-                    if improved:
-                        self.best_val_errors[tt_split_idx][tv_split_idx] = current_err
-                        self.best_val_epochs[tt_split_idx][tv_split_idx] = (
-                                self.progress.epoch + 1
-                        )
-
-            if not any(has_stopped):
-                # compute best mean validation errors (averaged over sub-splits (cv/refit))
-                # use <= on purpose such that latest epoch among tied best epochs is kept
-                # this has been slightly beneficial for accuracy in previous experiments
-                improved = mean_val_errors[tt_split_idx] <= self.best_mean_val_errors[
-                    tt_split_idx] if use_last_best_epoch \
-                    else mean_val_errors[tt_split_idx] < self.best_mean_val_errors[tt_split_idx]
-                if improved:
-                    self.best_mean_val_errors[tt_split_idx] = mean_val_errors[tt_split_idx]
-                    self.best_mean_val_epochs[tt_split_idx] = (
-                            self.progress.epoch + 1
-                    )
+        if use_early_stopping:
+            self.has_stopped |= current_epoch > early_stopping_multiplicative_patience \
+                                * self.best_val_epochs + early_stopping_additive_patience
+
+        # compute best single-split validation errors
+        # use <= on purpose such that latest epoch among tied best epochs is kept
+        # this has been slightly beneficial for accuracy in previous experiments
+        improved = val_errors <= self.best_val_errors if use_last_best_epoch \
+            else val_errors < self.best_val_errors
+        improved &= ~self.has_stopped
+        self.best_val_errors = torch.where(improved, val_errors, self.best_val_errors)
+        self.best_val_epochs = torch.where(improved, current_epoch, self.best_val_epochs)
+
+        # compute best mean validation errors (averaged over sub-splits (cv/refit))
+        improved = mean_val_errors <= self.best_mean_val_errors if use_last_best_epoch \
+            else mean_val_errors < self.best_mean_val_errors
+        improved &= ~self.has_stopped.any(dim=-1)
+        self.best_mean_val_errors = torch.where(improved, mean_val_errors, self.best_mean_val_errors)
+        self.best_mean_val_epochs = torch.where(improved, current_epoch, self.best_mean_val_epochs)
+
         self.progress.epoch += 1
 
-        if use_early_stopping and all(sum(self.has_stopped_list, [])):
+        if use_early_stopping and self.has_stopped.all().item():
             self.trainer.should_stop = True
 
     def on_fit_end(self):
         if self.creator.config.get("use_best_epoch", True):
             self.fit_params = [{'stop_epoch': mean_ep, 'best_indiv_stop_epochs': single_eps}
-                               for mean_ep, single_eps in zip(self.best_mean_val_epochs, self.best_val_epochs)]
+                               for mean_ep, single_eps in zip(self.best_mean_val_epochs.tolist(),
+                                                              self.best_val_epochs.tolist())]
         else:
             self.fit_params = [
                 {"stop_epoch": self.progress.max_epochs}
@@ -208,8 +223,9 @@ class TabNNModule(pl.LightningModule):
     def predict_step(self, batch: Any, batch_idx: int, dataloader_idx: int = 0) -> Any:
         self.model.eval()
         with torch.no_grad():
-            return self.model(batch)["x_cont"].to("cpu")
+            return self.get_model_forward()(batch)["x_cont"].to("cpu")
 
     def configure_optimizers(self):
         param_groups = [{"params": [p], "lr": 0.01} for p in self.model.parameters()]
-        return get_opt_class(self.config.get('opt', 'adam'))(param_groups, self.hp_manager)
+        return get_opt_class(self.config.get('opt', 'adam'))(param_groups, self.hp_manager,
+                                                             fused=self.config.get('use_fused_opt', False))
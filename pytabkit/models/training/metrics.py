@@ -1,7 +1,6 @@
 from typing import Dict, Any, List, Optional, Tuple, Callable
 
 import numpy as np
-import torchmetrics
 from sklearn.metrics import roc_auc_score, balanced_accuracy_score, matthews_corrcoef
 import torch.nn.functional as F
 import torch
@@ -9,7 +8,7 @@ import copy
 
 from pytabkit.models.data.data import DictDataset, TaskType
 from pytabkit.models.data.nested_dict import NestedDict
-from pytabkit.models.torch_utils import cat_if_necessary, torch_np_quantile
+from pytabkit.models.torch_utils import torch_np_quantile
 from pytabkit.models.training.auc_mu import auc_mu_impl
 
 
@@ -182,7 +181,7 @@ def get_y_probs(y: torch.Tensor, n_classes: int) -> torch.Tensor:
         raise ValueError(f'get_y_probs() expects y with non-floating dtype')
     if len(y.shape) > 2:
         # recursion
-        return cat_if_necessary([get_y_probs(y[i], n_classes) for i in range(y.shape[0])], dim=0)
+        return torch.stack([get_y_probs(y[i], n_classes) for i in range(y.shape[0])], dim=0)
 
     return torch.bincount(y.squeeze(-1), minlength=n_classes).to(torch.float32) / y.shape[0]
 
@@ -289,6 +288,7 @@ def expected_calibration_error(y_pred: torch.Tensor, y: torch.Tensor):
         # print(f'{torch.min(y_pred_indiv_probs)=}')
         # print(f'{torch.max(y_pred_indiv_probs)=}')
 
+        import torchmetrics  # imported here since importing it is slow
         metric = torchmetrics.CalibrationError(task='binary' if is_binary else 'multiclass', num_classes=num_classes)
         model_scores.append(metric.forward(y_pred_indiv_probs, y_indiv))
 
@@ -339,6 +339,7 @@ def auc_ovr_torchmetrics(y_pred: torch.Tensor, y: torch.Tensor):
         # print(f'{torch.min(y_pred_indiv_probs)=}')
         # print(f'{torch.max(y_pred_indiv_probs)=}')
 
+        import torchmetrics  # imported here since importing it is slow
         metric = torchmetrics.AUROC(task='binary' if is_binary else 'multiclass', num_classes=num_classes)
         model_scores.append(metric.forward(y_pred_indiv_probs, y_indiv))
 
@@ -350,6 +351,9 @@ def auc_ovr_torchmetrics(y_pred: torch.Tensor, y: torch.Tensor):
 
 
 class Metrics:
+    # metrics for which apply() does not compute separate values for each model when given a n_models dimension
+    non_batched_metric_names = ['nrmse', 'nmae']
+
     def __init__(self, metric_names, val_metric_name, task_type):
         self.metric_names = metric_names
         self.val_metric_name = val_metric_name
@@ -411,12 +415,10 @@ class Metrics:
             else:
                 # classification
                 # y_pred[invalid] = -np.Inf  # leads to NaN after softmax()
-                y_pred = torch.clone(y_pred)
-                not_invalid = y_pred[~invalid]
-                if len(not_invalid) == 0:
-                    y_pred[invalid] = 0.0
-                else:
-                    y_pred[invalid] = torch.min(not_invalid) - 100   # a very small value, basically zero probability
+                # replace by a very small value (basically zero probability), computed separately for each model
+                min_valid = y_pred.masked_fill(invalid, np.Inf).amin(dim=(-2, -1), keepdim=True)
+                replacement = torch.where(torch.isinf(min_valid), torch.zeros_like(min_valid), min_valid - 100)
+                y_pred = torch.where(invalid, replacement, y_pred)
                 y_pred_probs = torch.softmax(y_pred, dim=-1)
                 y_pred = torch.log(y_pred_probs + 1e-30)
 
@@ -505,6 +507,23 @@ class Metrics:
         else:
             raise ValueError(f'Unknown metric {metric_name}')
 
+    @staticmethod
+    def apply_batched(y_pred: torch.Tensor, y: torch.Tensor, metric_name: str) -> torch.Tensor:
+        """
+        Evaluates a metric separately for each model, without a Python loop over the models if possible.
+
+        :param y_pred: Predictions of shape n_models x n_samples x output_dim.
+        :param y: Labels of shape n_models x n_samples x y_dim.
+        :param metric_name: Name of the metric.
+        :return: Tensor of shape (n_models,) on the device of y_pred,
+            containing the same values as Metrics.apply(y_pred[i], y[i], metric_name) for all i.
+        """
+        if metric_name in Metrics.non_batched_metric_names:
+            # these normalize by statistics of y that would otherwise be computed across all models
+            results = [Metrics.apply(y_pred[i], y[i], metric_name) for i in range(y_pred.shape[0])]
+            return torch.stack([r.to(y_pred.device, torch.float32) for r in results])
+        return Metrics.apply(y_pred, y, metric_name).to(y_pred.device, torch.float32).reshape(y_pred.shape[0])
+
     @staticmethod
     def apply_sklearn_classification_metric(y_pred: torch.Tensor, y: torch.Tensor, metric_function: Callable,
                                             needs_pred_probs: bool, two_class_single_column: bool = True):
@@ -3,7 +3,8 @@ from typing import List, Optional, Tuple, Callable, Dict, Any
 import numpy as np
 import torch
 
-from pytabkit.models.data.data import DictDataset, ParallelDictDataLoader, TaskType, ValDictDataLoader
+from pytabkit.models.data.data import DictDataset, ParallelDictDataLoader, TaskType, ValDictDataLoader, \
+    HostDictDataLoader
 from pytabkit.models.nn_models.base import set_hp_context, SequentialLayer, Layer, Variable
 from pytabkit.models.nn_models.models import NNFactory
 from pytabkit.models.optim.optimizers import get_opt_class
@@ -12,6 +13,7 @@ from pytabkit.models.training.lightning_callbacks import StopAtEpochsCallback, H
 from pytabkit.models.training.coord import HyperparamManager
 from pytabkit.models.training.logging import Logger
 from pytabkit.models.training.metrics import Metrics, mse, cross_entropy
+from pytabkit.models.torch_utils import seeded_randperm
 from pytabkit.models.alg_interfaces.base import SplitIdxs, InterfaceResources
 
 
@@ -23,6 +25,9 @@ class NNCreator:
         self.n_tt_splits = None
         self.n_tv_splits = None
         self.static_model = None
+        # if True, the data set is kept on the CPU and only batches are moved to the device,
+        # the static model is then applied to each batch instead of the whole data set
+        self.keep_data_on_host = self.config.get('keep_data_on_host', False)
 
         self.factory = self.config.get('factory', None)
         if self.factory is None:
@@ -50,6 +55,8 @@ class NNCreator:
         # and the number of sub-splits per split
         self.n_tt_splits = len(idxs_list)
         self.n_tv_splits = idxs_list[0].train_idxs.shape[0]
+        # hyperparameters given per train-test split are repeated for the train-val splits
+        self.hp_manager.n_tv_splits = self.n_tv_splits
 
         self.is_cv = idxs_list[0].val_idxs is not None
         assert np.all([(split_idxs.val_idxs is not None) == self.is_cv for split_idxs in idxs_list])
@@ -78,15 +85,39 @@ class NNCreator:
         val_criterion = self.config.get('val_metric_name', Metrics.default_metric_name(task_type))
         return train_criterion, val_criterion
 
+    def _get_host_train_ds(self, ds: DictDataset, static_model: Layer, train_idxs: torch.Tensor, ram_limit_gb: float,
+                           seed: int) -> DictDataset:
+        # only transform a subsample of the training set whose transformed version fits into the RAM limit,
+        # the fitters may subsample it further in fit_transform_subsample()
+        static_tensor_infos = static_model.forward_tensor_infos(ds.tensor_infos)
+        n_features = max(1, sum(ti.get_n_features() for ti in static_tensor_infos.values()))
+        max_n_samples = max(1, int(ram_limit_gb * (1024 ** 3) / (4 * n_features)))
+        if max_n_samples < train_idxs.shape[0]:
+            train_idxs = train_idxs[seeded_randperm(train_idxs.shape[0], 'cpu', seed)[:max_n_samples]]
+        train_ds = DictDataset(ds.get_batch(train_idxs), ds.tensor_infos, device='cpu').to(self.device_info)
+        return static_model.forward_ds(train_ds)
+
     def create_model(self, ds: DictDataset, idxs_list: List[SplitIdxs]):
-        ds = ds.to(self.device_info)
         # Create static model
         model_fitter = self.factory.create(ds.tensor_infos)
         static_fitter, dynamic_fitter = model_fitter.split_off_dynamic()
-        self.static_model, ds = static_fitter.fit_transform(ds)
+        if self.keep_data_on_host:
+            # the static fitter does not need data, so we do not need to transform the whole data set
+            self.static_model = static_fitter.fit(ds).to(self.device_info)
+        else:
+            ds = ds.to(self.device_info)
+            self.static_model, ds = static_fitter.fit_transform(ds)
+        # self.static_model may be extended by a shared data_tfm below, which is not applied to train_ds
+        base_static_model = self.static_model
 
         # in the single split case, we can already apply static fitters to the dataset
-        is_single_split = len(idxs_list) == 1 and idxs_list[0].n_trainval_splits == 1
+        # this is also possible if all splits are the same,
+        # e.g., when training multiple hyperparameter configurations on the same split in one vectorized model
+        is_single_split = idxs_list[0].n_trainval_splits == 1 and all(
+            split_idxs.split_seed == idxs_list[0].split_seed
+            and split_idxs.sub_split_seeds == idxs_list[0].sub_split_seeds
+            and torch.equal(split_idxs.train_idxs, idxs_list[0].train_idxs) for split_idxs in idxs_list)
+        shared_data_tfm = None
 
         models = []
         # Build non-static models
@@ -102,23 +133,35 @@ class NNCreator:
                     if 'fixed_weight' in self.config:
                         self.hp_manager.get_more_info_dict()['fixed_weight'] = \
                             self.config['fixed_weight'][model_idx]
-                    train_ds = ds.get_sub_dataset(split_idxs.train_idxs[sub_idx, :])
+                    ram_limit_gb = self.config.get('init_ram_limit_gb', 1.0)
+                    if self.keep_data_on_host:
+                        train_ds = self._get_host_train_ds(ds, base_static_model, split_idxs.train_idxs[sub_idx, :],
+                                                           ram_limit_gb, seed=split_idxs.sub_split_seeds[sub_idx])
+                    else:
+                        train_ds = ds.get_sub_dataset(split_idxs.train_idxs[sub_idx, :])
                     # still call it 'trainval_ds'
                     # because that's what the clipping and output standardization layers use
                     self.hp_manager.get_more_info_dict()['trainval_ds'] = train_ds
+                    # allows to use different initialization hyperparameters for different train-test splits
+                    self.hp_manager.get_more_info_dict()['split_idx'] = split_idx
                     data_fitter, individual_fitter = dynamic_fitter.split_off_individual()
-                    ram_limit_gb = self.config.get('init_ram_limit_gb', 1.0)
-                    with set_hp_context(self.hp_manager):
-                        torch.manual_seed(split_idxs.split_seed)  # should not be necessary, but just in case
-                        data_tfm, tfmd_ds = data_fitter.fit_transform_subsample(
-                            train_ds, ram_limit_gb, needs_tensors=individual_fitter.needs_tensors)
+                    if shared_data_tfm is not None:
+                        # fitting data_tfm again would yield the same result
+                        data_tfm, tfmd_ds = shared_data_tfm
+                    else:
+                        with set_hp_context(self.hp_manager):
+                            torch.manual_seed(split_idxs.split_seed)  # should not be necessary, but just in case
+                            data_tfm, tfmd_ds = data_fitter.fit_transform_subsample(
+                                train_ds, ram_limit_gb, needs_tensors=individual_fitter.needs_tensors)
 
                     torch.manual_seed(split_idxs.sub_split_seeds[sub_idx])
                     with set_hp_context(self.hp_manager):
                         individual_tfm = individual_fitter.fit_transform_subsample(
                             tfmd_ds, ram_limit_gb=ram_limit_gb, needs_tensors=False)[0]
                     if is_single_split and self.config.get('allow_single_split_opt', True):
-                        self.static_model = SequentialLayer([self.static_model, data_tfm])
+                        if shared_data_tfm is None:
+                            self.static_model = SequentialLayer([self.static_model, data_tfm])
+                            shared_data_tfm = (data_tfm, tfmd_ds)
                         models.append(individual_tfm)
                     else:
                         models.append(SequentialLayer([data_tfm, individual_tfm]))
@@ -179,11 +222,23 @@ class NNCreator:
         return callbacks
 
     def create_dataloaders(self, ds: DictDataset):
+        batch_size = self.config.get('batch_size', 256)
+        adjust_bs = self.config.get('adjust_bs', False)
+        val_batch_size = self.config.get('predict_batch_size', 1024)
+        val_dl = None
+        if self.keep_data_on_host:
+            train_dl = HostDictDataLoader(ds, self.train_idxs, batch_size=batch_size, shuffle=True, drop_last=True,
+                                          adjust_bs=adjust_bs, output_device=self.device_info,
+                                          transform=self.static_model)
+            if self.is_cv and self.fit_params is None:
+                val_dl = ValDictDataLoader(ds, self.val_idxs, val_batch_size=val_batch_size,
+                                           output_device=self.device_info, transform=self.static_model)
+            return train_dl, val_dl
+
         ds = ds.to(self.device_info)
         ds = self.static_model(ds)
-        train_dl = ParallelDictDataLoader(ds, self.train_idxs, batch_size=self.config.get('batch_size', 256),
-                                          shuffle=True, drop_last=True, adjust_bs=self.config.get('adjust_bs', False))
-        val_dl = None
+        train_dl = ParallelDictDataLoader(ds, self.train_idxs, batch_size=batch_size,
+                                          shuffle=True, drop_last=True, adjust_bs=adjust_bs)
         if self.is_cv and self.fit_params is None:
-            val_dl = ValDictDataLoader(ds, self.val_idxs, val_batch_size=self.config.get('predict_batch_size', 1024))
+            val_dl = ValDictDataLoader(ds, self.val_idxs, val_batch_size=val_batch_size)
         return train_dl, val_dl
@@ -184,14 +184,14 @@ def argsort(lst):
 
 def join_dicts(*dicts):
     # Attention: arguments do not commute since later dicts can override entries from earlier dicts!
-    result = copy.copy(dicts[0])
+    result = dict(dicts[0])  # instead of copy.copy(), which cannot be traced by torch.compile()
     for d in dicts[1:]:
         result.update(d)
     return result
 
 
 def update_dict(d: dict, update: Optional[dict] = None, remove_keys: Optional[Union[Any, List[Any]]] = None):
-    d = copy.copy(d)
+    d = dict(d)  # instead of copy.copy(), which cannot be traced by torch.compile()
     if update is not None:
         d.update(update)
     if remove_keys is not None:
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+import sklearn.datasets
+
+from pytabkit.models.sklearn.sklearn_interfaces import RealMLP_TD_Classifier
+
+
+def measure_steps_per_second(n_samples: int, n_cont: int, n_cat: int, n_cv: int, use_torch_compile: bool,
+                             n_steps: int = 200, n_warmup_steps: int = 20) -> float:
+    """
+    Measures the number of full training steps (forward, backward and optimizer step) per second
+    of the vectorized RealMLP-TD model, as in TabNNModule.training_step().
+    """
+    x, y = sklearn.datasets.make_classification(n_samples=n_samples, n_features=n_cont, n_informative=n_cont // 2,
+                                                n_classes=3, random_state=0)
+    x_df = pd.DataFrame(x, columns=[f'cont_{i}' for i in range(n_cont)])
+    rng = np.random.default_rng(0)
+    for i in range(n_cat):
+        x_df[f'cat_{i}'] = pd.Categorical(rng.integers(0, 2 + 3 * i, size=n_samples).astype(str))
+
+    # fit for one epoch to obtain the model and the data loader, then measure the training steps separately
+    clf = RealMLP_TD_Classifier(n_epochs=1, n_cv=n_cv, random_state=0, device='cpu',
+                                use_torch_compile=use_torch_compile)
+    clf.fit(x_df, y)
+    module = clf.alg_interface_.model
+    model_forward = module.get_model_forward()
+    opt = clf.alg_interface_.trainer.optimizers[0]
+    module.model.train()
+
+    batches = list(module.train_dl)
+    start_time = None
+    for step in range(n_warmup_steps + n_steps):
+        if step == n_warmup_steps:
+            start_time = time.time()
+        batch = batches[step % len(batches)]
+        output = model_forward(batch)
+        loss = module.criterion(output['x_cont'], output['y']).sum()
+        loss.backward()
+        opt.step()
+        opt.zero_grad()
+    return n_steps / (time.time() - start_time)
+
+
+if __name__ == '__main__':
+    torch.set_num_threads(1)
+    configs = [dict(n_samples=4000, n_cont=10, n_cat=0, n_cv=1),
+               dict(n_samples=4000, n_cont=50, n_cat=0, n_cv=1),
+               dict(n_samples=4000, n_cont=20, n_cat=10, n_cv=1),
+               dict(n_samples=4000, n_cont=20, n_cat=10, n_cv=5)]
+    for config in configs:
+        steps_per_second = {use_torch_compile: measure_steps_per_second(**config,
+                                                                         use_torch_compile=use_torch_compile)
+                            for use_torch_compile in [False, True]}
+        print(f'{config}: {steps_per_second[False]:.1f} steps/s without and '
+              f'{steps_per_second[True]:.1f} steps/s with torch.compile()', flush=True)
@@ -15,7 +15,7 @@ from pytabkit.bench.alg_wrappers.interface_wrappers import \
     RandomParamsCatBoostInterfaceWrapper
 from pytabkit.bench.eval.analysis import get_ensemble_groups
 from pytabkit.bench.run.task_execution import RunConfig, TabBenchJobManager
-from pytabkit.bench.scheduling.schedulers import SimpleJobScheduler
+from pytabkit.bench.scheduling.schedulers import LPTBackfillJobScheduler
 from pytabkit.models import utils
 from pytabkit.models.alg_interfaces.nn_interfaces import RealMLPParamSampler
 from pytabkit.bench.scheduling.execution import RayJobManager
@@ -29,7 +29,7 @@ def run_gbdt_rs_configs(paths: Optional[Paths] = None, min_step_idx: int = 0, n_
     if paths is None:
         paths = Paths.from_env_variables()
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager(available_cpu_ram_multiplier=0.5))
+    scheduler = LPTBackfillJobScheduler(RayJobManager(available_cpu_ram_multiplier=0.5))
     run_config = RunConfig(min_split_idx=min_split_idx, n_tt_splits=min_split_idx + n_splits, n_cv=1, n_refit=0,
                            save_y_pred=True)
 
@@ -71,7 +71,7 @@ def run_mlp_tuning_configs(paths: Paths, n_steps: int = 50, tag: str = 'paper',
     # 2h37m for 10 steps on meta-train-class
     # for 5 steps on all: 1h20m + 13h4m
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -107,7 +107,7 @@ def run_mlp_random_configs(paths: Paths, n_steps: int = 50, tag: str = 'mlp_rand
     # 2h37m for 10 steps on meta-train-class
     # for 5 steps on all: 1h20m + 13h4m
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -162,7 +162,7 @@ def run_mlp_random_seed_configs(paths: Paths, n_steps: int = 50, tag: str = 'mlp
     # 2h37m for 10 steps on meta-train-class
     # for 5 steps on all: 1h20m + 13h4m
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -189,7 +189,7 @@ def run_rtdl_tuning_configs(paths: Paths, n_steps: int = 50, tag: str = 'paper',
                             with_mlp: bool = True, with_resnet: bool = True, only_meta_train: bool = False,
                             only_meta_test: bool = False, start_split=0, end_split=10):
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=end_split, min_split_idx=start_split, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -228,7 +228,7 @@ def run_rtdl_tuning_configs(paths: Paths, n_steps: int = 50, tag: str = 'paper',
 def run_refit_configs(paths: Paths, tag: str = 'paper', rerun: bool = False):
     # refit experiments took 3 to 3.5 days
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager(available_cpu_ram_multiplier=0.5))
+    scheduler = LPTBackfillJobScheduler(RayJobManager(available_cpu_ram_multiplier=0.5))
     config_10_5_5 = RunConfig(n_tt_splits=10, n_cv=5, n_refit=5, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -281,7 +281,7 @@ def run_ablations(paths: Paths, param_configs: Dict[str, Any], with_class: bool
                   tune_lr: bool = True,
                   tag: str = 'paper_mlp_ablations', rerun: bool = False):
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=False)  # todo: it's false
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -323,7 +323,7 @@ def run_ablations(paths: Paths, param_configs: Dict[str, Any], with_class: bool
 def run_td_configs(paths: Paths, tag: str = 'paper', rerun: bool = False):
     # this took around 17h24m
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -389,7 +389,7 @@ def run_td_configs(paths: Paths, tag: str = 'paper', rerun: bool = False):
 def run_additional_configs(paths: Paths, tag: str = 'paper_additional', rerun: bool = False):
     # this took around 17h24m
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -449,7 +449,7 @@ def run_additional_configs(paths: Paths, tag: str = 'paper_additional', rerun: b
 def run_td_ce_configs(paths: Paths, tag: str = 'paper_val_ce', rerun: bool = False):
     # this took around 17h24m
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -552,7 +552,7 @@ def run_td_ce_configs(paths: Paths, tag: str = 'paper_val_ce', rerun: bool = Fal
 def run_mlp_no_ls(paths: Paths, tag: str = 'paper', rerun: bool = False):
     # this took around 48m
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -586,7 +586,7 @@ def run_mlp_no_ls(paths: Paths, tag: str = 'paper', rerun: bool = False):
 def run_tabr_configs(paths: Paths, rerun: bool = False):
     # this took around 4d12h and some (less expensive) experiments were already completed
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -660,7 +660,7 @@ def run_tabr_configs(paths: Paths, rerun: bool = False):
 def run_early_stopping_configs(paths: Paths, tag: str = 'paper_early_stopping', rerun: bool = False):
     # around 4h
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -713,7 +713,7 @@ def run_early_stopping_configs(paths: Paths, tag: str = 'paper_early_stopping',
 def run_brier_stopping_configs(paths: Paths, tag: str = 'paper_early_stopping', rerun: bool = False):
     # around 4h
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -753,7 +753,7 @@ def run_brier_stopping_configs(paths: Paths, tag: str = 'paper_early_stopping',
 def run_cross_entropy_stopping_configs(paths: Paths, tag: str = 'paper_early_stopping', rerun: bool = False):
     # around 4h
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -793,7 +793,7 @@ def run_cross_entropy_stopping_configs(paths: Paths, tag: str = 'paper_early_sto
 def run_seed_opt_configs(paths: Paths, random_seed_offset: int, tag: str = 'paper', rerun: bool = False):
     # this took around 17h24m
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -823,7 +823,7 @@ def run_seed_opt_configs(paths: Paths, random_seed_offset: int, tag: str = 'pape
 def run_ensemble_configs(paths: Paths, tag: str = 'paper', rerun: bool = False):
     # around 20 minutes or so
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -848,7 +848,7 @@ def run_ensemble_configs(paths: Paths, tag: str = 'paper', rerun: bool = False):
 
 def run_mlp_hpo_alg_selection(paths: Paths, n_hpo_steps: int, tag: str = 'paper', rerun: bool = False):
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager(max_n_threads=32))
+    scheduler = LPTBackfillJobScheduler(RayJobManager(max_n_threads=32))
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -876,7 +876,7 @@ def run_mlp_hpo_alg_selection(paths: Paths, n_hpo_steps: int, tag: str = 'paper'
 
 def run_rtdl_hpo_alg_selection(paths: Paths, n_hpo_steps: int, tag: str = 'paper', rerun: bool = False):
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager(max_n_threads=32))
+    scheduler = LPTBackfillJobScheduler(RayJobManager(max_n_threads=32))
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -904,7 +904,7 @@ def run_rtdl_hpo_alg_selection(paths: Paths, n_hpo_steps: int, tag: str = 'paper
 
 def run_gbdt_hpo_alg_selection(paths: Paths, n_hpo_steps: int, tag: str = 'paper', rerun: bool = False):
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager(max_n_threads=16))
+    scheduler = LPTBackfillJobScheduler(RayJobManager(max_n_threads=16))
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -936,7 +936,7 @@ def run_rtdl_default_configs(paths: Paths, tag: str = 'paper', rerun: bool = Fal
                              tabzilla_defaults: bool = False):
     # ca 50 min for meta-train-reg
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -997,7 +997,7 @@ def run_rtdl_rssc_default_configs(paths: Paths, tag: str = 'paper', rerun: bool
                                   only_meta_train: bool = False, only_meta_test: bool = False):
     # ca 50 min for meta-train-reg
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -1068,7 +1068,7 @@ def run_tabr_default_configs(paths: Paths, tag: str = 'paper', rerun: bool = Fal
                              start_split: int = 0, end_split: int = 10):
     # ca 50 min for meta-train-reg
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=end_split, min_split_idx=start_split, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -1106,7 +1106,7 @@ def run_tabr_default_configs(paths: Paths, tag: str = 'paper', rerun: bool = Fal
 def run_default_configs(paths: Paths, tag: str = 'paper', rerun: bool = False):
     # took 12h55s
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -1160,7 +1160,7 @@ def run_gbdts_hpo(paths: Paths, n_estimators: int = 1000, early_stopping_rounds:
     # took 7h17m for n_estimators=2
     # took about 6h30m for n_estimators=1  (but slightly more tasks were run for that because of the rerun=True)
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
     config_5_1_0 = RunConfig(n_tt_splits=5, n_cv=1, n_refit=0, save_y_pred=True)
 
@@ -1198,7 +1198,7 @@ def run_gbdts_hpo(paths: Paths, n_estimators: int = 1000, early_stopping_rounds:
 def run_preprocessing_experiments(paths: Paths, tag: str = 'paper_preprocessing'):
     # this took 7h9m for just two different scikit-learn based transformation configurations!
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -1257,7 +1257,7 @@ def run_trees_custom(paths: Paths, n_estimators: int, tag: str = 'paper', with_d
     # took about 6h30m for n_estimators=1  (but slightly more tasks were run for that because of the rerun=True)
     # the large main overhead is probably mainly for evaluating the metrics
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -1387,7 +1387,7 @@ def run_architecture_ablations(paths: Paths, tag: str = 'paper', rerun: bool = F
                                start_split: int = 0, end_split: int = 10):
     # ca 1h45m + 40m + 2h
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=end_split, min_split_idx=start_split, n_cv=1, n_refit=0, save_y_pred=True)
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -1504,7 +1504,7 @@ def run_architecture_ablations(paths: Paths, tag: str = 'paper', rerun: bool = F
 
 def run_cumulative_ablations(paths: Paths, tag: str = 'paper_cumulative_ablations', rerun: bool = False):
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=False)  # todo: it's false
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -1617,7 +1617,7 @@ def run_cumulative_ablations(paths: Paths, tag: str = 'paper_cumulative_ablation
 def run_cumulative_ablations_new(paths: Paths, n_lrs: int = -1, tag: str = 'paper_cumulative_ablations_new',
                                  rerun: bool = False):
     job_mgr = TabBenchJobManager(paths)
-    scheduler = SimpleJobScheduler(RayJobManager())
+    scheduler = LPTBackfillJobScheduler(RayJobManager())
     config_10_1_0 = RunConfig(n_tt_splits=10, n_cv=1, n_refit=0, save_y_pred=False)  # todo: it's false
 
     train_class_task_infos = TaskCollection.from_name('meta-train-class', paths).load_infos(paths)
@@ -1,14 +1,24 @@
 from pathlib import Path
 
+import numpy as np
 from sklearn.datasets import make_classification
 import torch
 
-from pytabkit.bench.alg_wrappers.interface_wrappers import XGBInterfaceWrapper
+from pytabkit.bench.alg_wrappers.interface_wrappers import XGBInterfaceWrapper, NNInterfaceWrapper
+from pytabkit.bench.alg_wrappers.vectorization_tuning import VectorizationTuner
 from pytabkit.bench.data.paths import Paths
 from pytabkit.bench.data.tasks import TaskDescription, TaskInfo, Task, TaskCollection
+from pytabkit.bench.eval.evaluation import MultiResultsTable
 from pytabkit.bench.run.task_execution import TabBenchJobManager, RunConfig
 from pytabkit.bench.scheduling.execution import RayJobManager
-from pytabkit.bench.scheduling.schedulers import SimpleJobScheduler
+from pytabkit.bench.scheduling.jobs import AbstractJob
+from pytabkit.bench.scheduling.resource_feedback import ResourceFeedback
+from pytabkit.bench.scheduling.resource_manager import ResourceManager, JobInfo
+from pytabkit.bench.scheduling.resources import NodeResources, SystemResources
+from pytabkit.bench.scheduling.schedulers import SimpleJobScheduler, LPTBackfillJobScheduler
+from pytabkit.models import utils
+from pytabkit.models.alg_interfaces.base import RequiredResources
+from pytabkit.models.alg_interfaces.resource_computation import get_resource_features
 from pytabkit.models.data.data import TensorInfo, DictDataset
 from pytabkit.models.sklearn.default_params import DefaultParams
 
@@ -51,3 +61,138 @@ def test_bench_simple(tmp_path: Path):
                      tags=['default'], rerun=False)
 
     job_mgr.run_jobs(scheduler)
+
+    # ----- load results -----
+    task_collection = TaskCollection.from_name('custom-class', paths)
+    table = MultiResultsTable.load(task_collection, n_cv=1, paths=paths)
+    store_table = MultiResultsTable.load(task_collection, n_cv=1, paths=paths, use_result_store=True)
+    assert store_table.test_table.alg_names == table.test_table.alg_names == ['XGB-D-class']
+    assert store_table.test_table.alg_task_results == table.test_table.alg_task_results
+    assert store_table.val_table.alg_task_results == table.val_table.alg_task_results
+
+
+def test_load_task_mmap(tmp_path: Path):
+    paths = Paths(base_folder=str(tmp_path / 'tab_bench_data'))
+    n_samples = 100
+    gen = torch.Generator().manual_seed(0)
+    tensors = dict(x_cont=torch.randn(n_samples, 3, generator=gen),
+                   x_cat=torch.randint(0, 4, (n_samples, 2), generator=gen),
+                   y=torch.randint(0, 2, (n_samples, 1), generator=gen))
+    tensor_infos = dict(x_cont=TensorInfo(feat_shape=[3]), x_cat=TensorInfo(cat_sizes=[4, 4]),
+                        y=TensorInfo(cat_sizes=[2]))
+    ds = DictDataset(tensors, tensor_infos)
+    task_info = TaskInfo.from_ds(task_desc=TaskDescription('custom-class', 'ds_mmap'), ds=ds)
+    Task(task_info=task_info, ds=ds).save(paths)
+
+    task = task_info.load_task(paths, mmap=False)
+    task_mmap = task_info.load_task(paths, mmap=True)
+    assert task_mmap.ds.tensors['x_cat'].dtype == torch.int32
+    for key in ['x_cont', 'x_cat', 'y']:
+        assert torch.equal(task_mmap.ds.tensors[key].type(task.ds.tensors[key].dtype), task.ds.tensors[key])
+
+    # the arrays are mapped copy-on-write, so writing to them does not change the stored files
+    task_mmap.ds.tensors['x_cont'][:] = 0.0
+    task_mmap.ds.tensors['x_cat'][:] = 0
+    task_reloaded = task_info.load_task(paths, mmap=True)
+    assert torch.equal(task_reloaded.ds.tensors['x_cont'], task.ds.tensors['x_cont'])
+    assert torch.equal(task_reloaded.ds.tensors['x_cat'].long(), task.ds.tensors['x_cat'])
+
+
+def test_vectorization_tuner(tmp_path: Path, monkeypatch):
+    paths = Paths(base_folder=str(tmp_path / 'tab_bench_data'))
+    n_samples = 300
+    X, Y = make_classification(n_samples=n_samples, n_features=5, random_state=0)
+    ds = DictDataset(dict(x_cont=torch.as_tensor(X, dtype=torch.float32),
+                          x_cat=torch.randint(0, 3, (n_samples, 1)), y=torch.as_tensor(Y)[:, None]),
+                     dict(x_cont=TensorInfo(feat_shape=[5]), x_cat=TensorInfo(cat_sizes=[3]),
+                          y=TensorInfo(cat_sizes=[2])))
+    task_info = TaskInfo.from_ds(task_desc=TaskDescription('custom-class', 'ds_tuning'), ds=ds)
+    Task(task_info=task_info, ds=ds).save(paths)
+
+    wrapper = NNInterfaceWrapper(**utils.join_dicts(DefaultParams.RealMLP_TD_CLASS,
+                                                    dict(max_n_vectorized=3, auto_tune_n_vectorized=True,
+                                                         auto_tune_n_samples=200, hidden_sizes=[8, 8],
+                                                         use_gpu=False)))
+    max_n_vectorized = wrapper.get_max_n_vectorized(task_info, paths=paths)
+    assert 1 <= max_n_vectorized <= 3
+    results = utils.deserialize(next(paths.vectorization_tuning().iterdir()), use_yaml=True)
+    assert results['widths'] == [1, 2, 3, 1, 2, 3]
+    assert results['n_samples'] == [50, 50, 50, 200, 200, 200]
+
+    # the cached measurements are used for the second call, and a tiny memory budget forces a single model
+    monkeypatch.setattr(VectorizationTuner, 'calibrate', None)
+    wrapper.config['auto_tune_max_ram_gb'] = 0.0
+    assert wrapper.get_max_n_vectorized(task_info, paths=paths) == 1
+
+
+def test_resource_feedback(tmp_path: Path):
+    feedback = ResourceFeedback(tmp_path / 'resource_feedback', min_n_records=10)
+    ds = DictDataset(tensors=None, tensor_infos=dict(x_cont=TensorInfo(feat_shape=[5]), x_cat=TensorInfo(cat_sizes=[3]),
+                                                     y=TensorInfo(cat_sizes=[2])), device='cpu', n_samples=1000)
+    rng = np.random.default_rng(0)
+    predictions = []
+    for i in range(10):
+        predicted = RequiredResources(time_s=rng.uniform(10, 100), n_threads=1, cpu_ram_gb=rng.uniform(1, 4))
+        features = ResourceFeedback.get_features(get_resource_features({}, ds, n_cv=1, n_refit=0, n_splits=1),
+                                                 predicted)
+        assert feedback.correct('group', features, predicted) is predicted  # not enough records yet
+        feedback.add_record('group', features, time_s=2 * predicted.time_s, cpu_ram_gb=0.5 * predicted.cpu_ram_gb)
+        predictions.append((features, predicted))
+
+    for features, predicted in predictions:
+        corrected = ResourceFeedback(tmp_path / 'resource_feedback', min_n_records=10).correct('group', features,
+                                                                                             predicted)
+        assert 1.5 * predicted.time_s <= corrected.time_s <= 2.5 * predicted.time_s
+        # the RAM estimate is pessimistic but tighter than the static estimate
+        assert 0.5 * predicted.cpu_ram_gb <= corrected.cpu_ram_gb <= 0.9 * predicted.cpu_ram_gb
+
+
+class _SleepJob(AbstractJob):
+    def __init__(self, name: str, time_s: float, n_threads: int):
+        self.name = name
+        self.time_s = time_s
+        self.n_threads = n_threads
+
+    def get_group(self) -> str:
+        return 'sleep'
+
+    def get_required_resources(self) -> RequiredResources:
+        return RequiredResources(time_s=self.time_s, n_threads=self.n_threads, cpu_ram_gb=1.0)
+
+    def get_desc(self) -> str:
+        return self.name
+
+
+class _LocalJobManager:
+    def __init__(self, resource_manager: ResourceManager):
+        self.resource_manager = resource_manager
+        self.submitted = []
+
+    def get_resource_manager(self) -> ResourceManager:
+        return self.resource_manager
+
+    def submit_job(self, job_info: JobInfo) -> None:
+        self.resource_manager.job_started(job_info)
+        self.submitted.append(job_info.job.name)
+
+
+def test_lpt_backfill_scheduler():
+    node = NodeResources(node_id=0, n_threads=4, cpu_ram_gb=16.0, gpu_usages=np.zeros(0), gpu_rams_gb=np.zeros(0),
+                         physical_core_usages=np.zeros(2))
+    resource_manager = ResourceManager(SystemResources([node]), SystemResources([NodeResources.zeros_like(node)]))
+    job_manager = _LocalJobManager(resource_manager)
+    scheduler = LPTBackfillJobScheduler(job_manager)
+    scheduler.add_jobs([_SleepJob('running', 100.0, 2), _SleepJob('short', 10.0, 1), _SleepJob('medium', 80.0, 1),
+                        _SleepJob('long', 200.0, 4), _SleepJob('short_2', 20.0, 1)])
+    # the first job has been running for 50s of its estimated 100s
+    running_job_info = scheduler.job_infos[0]
+    running_job_info.set_started(node.try_assign(running_job_info.required_resources,
+                                                 resource_manager.get_fixed_resources()))
+    job_manager.submit_job(running_job_info)
+    running_job_info.start_time -= 50.0
+    job_manager.submitted = []
+
+    scheduler._submit_more_jobs()
+    # the long job is blocked until the running job finishes in ~50s,
+    # so only the short jobs that finish before that are backfilled, longest first
+    assert job_manager.submitted == ['short_2', 'short']
@@ -0,0 +1,40 @@
+import pytest
+import torch
+
+from pytabkit.models.data.data import TensorInfo, DictDataset
+from pytabkit.models.nn_models.categorical import EncodingFactory, SingleOneHotFactory, SingleEmbeddingFactory, \
+    SingleTargetEncodingFactory, FusedEncodingLayer
+
+
+@pytest.mark.parametrize("single_factory", [SingleOneHotFactory(max_one_hot_cat_size=8),
+                                            SingleOneHotFactory(use_missing_zero=False, use_1d_binary_onehot=False),
+                                            SingleEmbeddingFactory(), SingleTargetEncodingFactory()])
+def test_fused_encoding_matches_loop(single_factory):
+    torch.manual_seed(0)
+    cat_sizes = [2, 3, 5, 40, 3, 100]
+    n_samples, n_models = 64, 3
+    x_cat = torch.stack([torch.randint(0, cat_size, (n_samples,)) for cat_size in cat_sizes], dim=1)
+    ds = DictDataset({'x_cat': x_cat, 'x_cont': torch.randn(n_samples, 2), 'y': torch.randint(0, 3, (n_samples, 1))},
+                     {'x_cat': TensorInfo(cat_sizes=cat_sizes), 'x_cont': TensorInfo(feat_shape=[2]),
+                      'y': TensorInfo(cat_sizes=[3])})
+    stacked_tensors = {key: value[None].expand(n_models, *value.shape) for key, value in ds.tensors.items()}
+
+    results = []
+    for use_fused_encoding in [False, True]:
+        torch.manual_seed(1)
+        fitter = EncodingFactory(single_factory, use_fused_encoding=use_fused_encoding).create(ds.tensor_infos)
+        layers = [fitter.fit(ds) for _ in range(n_models)]
+        assert isinstance(layers[0], FusedEncodingLayer) == use_fused_encoding
+        stacked_layer = layers[0].stack(layers)
+        stacked_out = stacked_layer.forward_tensors(stacked_tensors)
+        if 'x_cont' in stacked_out and stacked_out['x_cont'].requires_grad:
+            (stacked_out['x_cont'] ** 2).sum().backward()
+        grads = [p.grad.reshape(n_models, -1) for p in stacked_layer.parameters()]
+        results.append((layers[0](ds).tensors, stacked_out, torch.cat(grads, dim=-1) if len(grads) > 0 else None))
+
+    for out, fused_out in [(results[0][0], results[1][0]), (results[0][1], results[1][1])]:
+        assert out.keys() == fused_out.keys()
+        for key in out:
+            assert torch.equal(out[key], fused_out[key])
+    if results[0][2] is not None:
+        assert torch.allclose(results[0][2], results[1][2])
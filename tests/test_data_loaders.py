@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import torch
+from sklearn.datasets import make_classification
+
+from pytabkit.models import utils
+from pytabkit.models.alg_interfaces.base import SplitIdxs, InterfaceResources
+from pytabkit.models.alg_interfaces.nn_interfaces import NNAlgInterface
+from pytabkit.models.data.data import DictDataset, TensorInfo, ParallelDictDataLoader, HostDictDataLoader
+from pytabkit.models.sklearn.default_params import DefaultParams
+from pytabkit.models.sklearn.sklearn_interfaces import RealMLP_TD_Classifier
+from pytabkit.models.training.logging import StdoutLogger
+from pytabkit.models.training.nn_creator import NNCreator
+
+
+def test_host_data_loader_matches_parallel_data_loader():
+    n_samples = 50
+    ds = DictDataset({'x_cont': torch.randn(n_samples, 3),
+                      'x_cat': torch.randint(0, 4, (n_samples, 2), dtype=torch.int32),
+                      'y': torch.randn(n_samples, 1)},
+                     {'x_cont': TensorInfo(feat_shape=[3]), 'x_cat': TensorInfo(cat_sizes=[4, 4]),
+                      'y': TensorInfo(feat_shape=[1])})
+    idxs = torch.stack([torch.randperm(n_samples)[:40] for _ in range(3)], dim=0)
+    for shuffle in [False, True]:
+        results = []
+        for dl_class in [ParallelDictDataLoader, HostDictDataLoader]:
+            torch.manual_seed(0)
+            results.append(list(dl_class(ds, idxs, batch_size=16, shuffle=shuffle)))
+        assert len(results[0]) == len(results[1]) == 3
+        for batch, host_batch in zip(*results):
+            assert batch.keys() == host_batch.keys()
+            for key in batch:
+                assert torch.equal(batch[key], host_batch[key])
+
+    transform = lambda tensors: {**tensors, 'x_cont': 2 * tensors['x_cont']}
+    batch = next(iter(HostDictDataLoader(ds, idxs, batch_size=16, transform=transform)))
+    assert torch.equal(batch['x_cont'], 2 * ds.tensors['x_cont'][idxs[:, :16]])
+
+
+def test_keep_data_on_host():
+    X, y = make_classification(n_samples=200, n_features=5, n_informative=3, n_classes=3, random_state=0)
+    X = pd.DataFrame(X, columns=[f'num_{i}' for i in range(X.shape[1])])
+    X['cat'] = pd.Series(np.arange(200) % 4).astype(str).astype('category')
+    y_probs = [RealMLP_TD_Classifier(n_epochs=2, n_cv=2, random_state=0, keep_data_on_host=keep_data_on_host)
+               .fit(X, y).predict_proba(X) for keep_data_on_host in [False, True]]
+    assert np.allclose(y_probs[0], y_probs[1])
+
+
+def test_keep_data_on_host_identical_splits(monkeypatch):
+    # identical splits share the fitted data transformation, which must not be applied to the host training data
+    host_train_datasets = []
+    orig_get_host_train_ds = NNCreator._get_host_train_ds
+
+    def recording_get_host_train_ds(self, *args, **kwargs):
+        host_train_datasets.append(orig_get_host_train_ds(self, *args, **kwargs))
+        return host_train_datasets[-1]
+
+    monkeypatch.setattr(NNCreator, '_get_host_train_ds', recording_get_host_train_ds)
+
+    x, y = make_classification(n_samples=200, n_features=5, random_state=0)
+    ds = DictDataset({'x_cont': torch.as_tensor(x, dtype=torch.float32),
+                      'x_cat': torch.as_tensor(np.arange(200) % 4)[:, None], 'y': torch.as_tensor(y)[:, None]},
+                     {'x_cont': TensorInfo(feat_shape=[5]), 'x_cat': TensorInfo(cat_sizes=[4]),
+                      'y': TensorInfo(cat_sizes=[2])})
+    perm = torch.randperm(200, generator=torch.Generator().manual_seed(0))
+    idxs = SplitIdxs(train_idxs=perm[None, :150], val_idxs=perm[None, 150:], test_idxs=None, split_seed=0,
+                     sub_split_seeds=[1], split_id=0)
+    # the quantile transform is fitted on the data and not individual, so it is shared between the splits
+    config = utils.update_dict(DefaultParams.RealMLP_TD_CLASS,
+                               dict(n_epochs=2, lr=[0.04, 0.1], tfms=['one_hot', 'quantile'], num_emb_type='none'))
+    y_preds = []
+    for keep_data_on_host in [False, True]:
+        alg_interface = NNAlgInterface(**utils.update_dict(config, dict(keep_data_on_host=keep_data_on_host)))
+        alg_interface.fit(ds, [idxs, idxs], InterfaceResources(n_threads=1, gpu_devices=[]),
+                          StdoutLogger(verbosity_level=-1), [None, None], 'host' if keep_data_on_host else 'device')
+        y_preds.append(alg_interface.predict(ds))
+    assert torch.allclose(y_preds[0], y_preds[1], atol=1e-5)
+    assert len(host_train_datasets) == 2
+    for key, tensor in host_train_datasets[0].tensors.items():
+        assert torch.equal(tensor, host_train_datasets[1].tensors[key])
+
+
+def test_shared_idxs():
+    n_samples = 30
+    ds = DictDataset({'x_cont': torch.randn(n_samples, 3), 'x_cat': torch.randint(0, 4, (n_samples, 1))},
+                     {'x_cont': TensorInfo(feat_shape=[3]), 'x_cat': TensorInfo(cat_sizes=[4])})
+    for idxs_single in [torch.arange(n_samples), torch.randperm(n_samples)[:20]]:
+        idxs = idxs_single[None, :].expand(4, -1)
+        for dl_class in [ParallelDictDataLoader, HostDictDataLoader]:
+            for shuffle in [False, True]:
+                results = []
+                for share_idxs in [False, True]:
+                    torch.manual_seed(0)
+                    results.append(list(dl_class(ds, idxs, batch_size=8, shuffle=shuffle, share_idxs=share_idxs)))
+                for batch, shared_batch in zip(*results):
+                    for key in batch:
+                        assert torch.equal(batch[key], shared_batch[key])
+                        # unshuffled batches only contain one copy of the rows
+                        assert (shared_batch[key].stride(0) == 0) == (not shuffle)
+
+
+def test_to_numpy_matches_to_df():
+    n_samples = 20
+    ds = DictDataset({'x_cont': torch.randn(n_samples, 3), 'x_cat': torch.randint(0, 4, (n_samples, 2))},
+                     {'x_cont': TensorInfo(feat_shape=[3]), 'x_cat': TensorInfo(cat_sizes=[4, 4])})
+    x, cat_col_idxs = ds.to_numpy()
+    x_df = ds.to_df()
+    assert x.dtype == np.float32 and x.flags['C_CONTIGUOUS']
+    assert cat_col_idxs == [x_df.columns.get_loc(col) for col in x_df.select_dtypes(include='category').columns]
+    assert np.allclose(x, x_df.astype(np.float32).to_numpy())
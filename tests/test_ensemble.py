@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import torch
+
+from pytabkit.models.alg_interfaces.ensemble_interfaces import CaruanaEnsembleAlgInterface, \
+    IncrementalEnsembleSelector
+from pytabkit.models.data.data import TaskType
+
+
+@pytest.mark.parametrize("metric_name", ['cross_entropy', 'class_error', 'brier', '1-auc_ovr', 'rmse', 'mae'])
+def test_incremental_caruana_matches_reference(metric_name):
+    torch.manual_seed(0)
+    n_samples, n_models = 500, 10
+    if metric_name in ['rmse', 'mae']:
+        task_type = TaskType.REGRESSION
+        y = torch.randn(n_samples, 1)
+        y_preds = [y + (0.5 + torch.rand(1)) * torch.randn(n_samples, 1) for i in range(n_models)]
+    else:
+        task_type = TaskType.CLASSIFICATION
+        y = torch.randint(0, 3, (n_samples, 1))
+        y_preds = [torch.randn(n_samples, 3) + 2 * torch.rand(1) * torch.nn.functional.one_hot(y[:, 0], 3)
+                   for i in range(n_models)]
+
+    alg_interface = CaruanaEnsembleAlgInterface([None] * n_models)
+    alg_interface.task_type = task_type
+    ref_weights = alg_interface._select_weights(y_preds, y, metric_name, n_caruana_steps=15)
+    # use small chunks to also test chunking
+    weights = IncrementalEnsembleSelector(y_preds, y, task_type, metric_name,
+                                          max_chunk_numel=3 * y_preds[0].numel()).select(n_steps=15)
+    assert np.array_equal(ref_weights, weights)
+
+
+@pytest.mark.parametrize("metric_name", ['cross_entropy', 'class_error', 'brier', 'rmse'])
+def test_incremental_caruana_with_nan_predictions(metric_name):
+    torch.manual_seed(0)
+    n_samples, n_models = 500, 5
+    if metric_name == 'rmse':
+        task_type = TaskType.REGRESSION
+        y = torch.randn(n_samples, 1)
+        y_preds = [y + (0.5 + torch.rand(1)) * torch.randn(n_samples, 1) for i in range(n_models)]
+    else:
+        task_type = TaskType.CLASSIFICATION
+        y = torch.randint(0, 3, (n_samples, 1))
+        y_preds = [torch.randn(n_samples, 3) + 2 * torch.rand(1) * torch.nn.functional.one_hot(y[:, 0], 3)
+                   for i in range(n_models)]
+    # one candidate has NaN predictions, on all samples or on some of them
+    y_preds[0] = torch.full_like(y_preds[0], np.nan)
+    y_preds[1] = 3 * y_preds[1] if task_type == TaskType.CLASSIFICATION else y.clone()
+    y_preds[1][:20] = np.nan
+
+    alg_interface = CaruanaEnsembleAlgInterface([None] * n_models)
+    alg_interface.task_type = task_type
+    ref_weights = alg_interface._select_weights(y_preds, y, metric_name, n_caruana_steps=15)
+    weights = IncrementalEnsembleSelector(y_preds, y, task_type, metric_name).select(n_steps=15)
+    assert np.array_equal(ref_weights, weights)
+    assert weights[0] == 0 and np.sum(weights) > 0
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+
+from pytabkit.models.sklearn.export import load_exported
+from pytabkit.models.sklearn.sklearn_interfaces import RealMLP_TD_Classifier, LGBM_TD_Classifier, \
+    RealMLP_TD_Regressor
+
+
+@pytest.mark.parametrize("model_class", [RealMLP_TD_Classifier, LGBM_TD_Classifier])
+def test_export_classifier(model_class, tmp_path):
+    X, y = make_classification(n_samples=200, n_features=5, n_informative=3, n_classes=3, random_state=0)
+    X = pd.DataFrame(X, columns=[f'num_{i}' for i in range(X.shape[1])])
+    X['cat'] = pd.Series(np.arange(200) % 4).astype(str).astype('category')
+    params = dict(n_epochs=4) if model_class == RealMLP_TD_Classifier else dict(n_estimators=20)
+    clf = model_class(n_cv=2, random_state=0, **params).fit(X, y)
+    clf.export(tmp_path)
+
+    loaded = load_exported(tmp_path)
+    assert np.allclose(clf.predict_proba(X), loaded.predict_proba(X), atol=1e-6)
+    assert np.array_equal(clf.predict(X), loaded.predict(X))
+
+
+def test_export_regressor(tmp_path):
+    X = np.random.RandomState(0).randn(100, 3)
+    y = X[:, 0] + X[:, 1] ** 2
+    reg = RealMLP_TD_Regressor(n_epochs=4, random_state=0).fit(X, y)
+    reg.export(tmp_path)
+    loaded = load_exported(tmp_path, mmap=False)
+    y_pred = loaded.predict(X)
+    assert y_pred.shape == (100,)
+    assert np.allclose(reg.predict(X), y_pred, atol=1e-6)
+
+
+def test_load_exported_does_not_import_lightning(tmp_path):
+    X, y = make_classification(n_samples=100, n_features=4, random_state=0)
+    RealMLP_TD_Classifier(n_epochs=2, random_state=0).fit(X, y).export(tmp_path)
+    code = (f'import sys; from pytabkit.models.sklearn.export import load_exported; '
+            f'load_exported({str(tmp_path)!r}); assert "pytorch_lightning" not in sys.modules')
+    subprocess.run([sys.executable, '-c', code], check=True)
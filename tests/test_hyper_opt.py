@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+import pytest
+import sklearn.datasets
+from hyperopt import hp
+
+from pytabkit.models.hyper_opt.hyper_optimizers import HyperoptOptimizer
+from pytabkit.models.sklearn.sklearn_interfaces import XGB_HPO_TPE_Classifier, LGBM_HPO_TPE_Classifier
+from pytabkit.models.training.logging import StdoutLogger
+
+
+def _get_evaluated_params(n_parallel: int):
+    space = {'a': hp.uniform('a', -2, 2), 'b': hp.choice('b', [0.0, hp.loguniform('b_positive', -3, 0)])}
+    rng = np.random.default_rng(n_parallel)
+    evaluated = dict()
+
+    def f(params, step=None):
+        # random delays, such that parallel steps finish in a random order
+        time.sleep(0.01 * rng.uniform())
+        evaluated[step if step is not None else len(evaluated) + 1] = params
+        return (params['a'] - 0.5) ** 2 + params['b'], None
+
+    opt = HyperoptOptimizer(space, fixed_params=dict(c=1), n_hyperopt_steps=25)
+    best_params, _ = opt.optimize(f, seed=0, opt_desc='test', logger=StdoutLogger(verbosity_level=-2),
+                                  n_parallel=n_parallel)
+    return [evaluated[step] for step in sorted(evaluated.keys())], best_params
+
+
+def test_parallel_hyperopt_is_deterministic():
+    sequential_params, _ = _get_evaluated_params(n_parallel=1)
+    assert len(sequential_params) == 25
+    assert all(params['c'] == 1 for params in sequential_params)
+    # the configurations proposed in parallel only depend on the seed and n_parallel
+    parallel_params, parallel_best = _get_evaluated_params(n_parallel=4)
+    assert (parallel_params, parallel_best) == _get_evaluated_params(n_parallel=4)
+    # pending steps must not be proposed again
+    assert len({params['a'] for params in parallel_params}) == 25
+
+
+@pytest.mark.parametrize("estimator_class", [XGB_HPO_TPE_Classifier, LGBM_HPO_TPE_Classifier])
+def test_successive_halving_resumes_training(estimator_class):
+    x, y = sklearn.datasets.make_classification(n_samples=300, n_features=5, random_state=0)
+    y_probs = []
+    for n_parallel_hpo_trials in [1, 3]:
+        clf = estimator_class(n_hyperopt_steps=9, n_estimators=45, opt_method='successive_halving', random_state=0,
+                              n_threads=3, n_parallel_hpo_trials=n_parallel_hpo_trials)
+        y_probs.append(clf.fit(x, y).predict_proba(x))
+        budgets = [step_results['fit_params']['hyper_fit_params']['n_estimators']
+                   for step_results in clf.alg_interface_.results_list]
+        assert budgets == [5] * 9 + [15] * 3 + [45]
+        # the configuration with the full budget continued training from its evaluation with the smaller budgets
+        sub_split_interface = clf.alg_interface_.best_alg_interface.sub_split_interfaces[0]
+        assert sub_split_interface.n_estimators == 45
+        assert len(sub_split_interface.val_errors) <= 45
+    assert np.allclose(y_probs[0], y_probs[1])
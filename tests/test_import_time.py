@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+_HEAVY_MODULES = ['lightgbm', 'xgboost', 'catboost', 'pytorch_lightning', 'skorch', 'smac', 'ConfigSpace',
+                  'torchmetrics']
+
+
+def _run_and_get_imported(code: str):
+    code = (f'import sys\n'
+            f'{code}\n'
+            f'print("imported:" + ",".join(m for m in {_HEAVY_MODULES!r} if m in sys.modules))')
+    lines = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                           text=True).stdout.strip().split('\n')
+    return [m for m in lines[-1][len('imported:'):].split(',') if m]
+
+
+def test_sklearn_interfaces_import_without_backends():
+    assert _run_and_get_imported('import pytabkit.models.sklearn.sklearn_interfaces') == []
+
+
+def test_backends_imported_only_when_needed():
+    imported = _run_and_get_imported(
+        'import numpy as np\n'
+        'from pytabkit.models.sklearn.sklearn_interfaces import LGBM_TD_Regressor\n'
+        'LGBM_TD_Regressor(n_estimators=2).fit(np.random.randn(20, 2), np.random.randn(20))')
+    assert imported == ['lightgbm']
+
+
+def test_sklearn_interfaces_import_time():
+    # -X importtime reports the cumulative import time of each module in microseconds on stderr,
+    # the bound is generous since most of the time is spent importing torch, pandas and sklearn
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'import pytabkit.models.sklearn.sklearn_interfaces'],
+                            check=True, capture_output=True, text=True).stderr
+    cumulative_us = [int(line.split('|')[1]) for line in stderr.split('\n')
+                     if line.strip().endswith('| pytabkit.models.sklearn.sklearn_interfaces')]
+    assert len(cumulative_us) == 1
+    assert cumulative_us[0] < 20 * 10 ** 6
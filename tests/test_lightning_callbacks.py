@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import torch
+
+from pytabkit.models.nn_models.base import Layer, Variable
+from pytabkit.models.training.coord import HyperparamManager
+from pytabkit.models.training.lightning_callbacks import ParamCheckpointer, L1L2RegCallback
+from pytabkit.models.training.scheduling import LearnerProgress
+
+
+class _ParamLayer(Layer):
+    def __init__(self):
+        super().__init__()
+        self.weight = Variable(torch.zeros(4, 3), trainable=True)
+        self.scale = Variable(torch.zeros(4, 1), trainable=False)
+
+
+def test_param_checkpointer():
+    layer = _ParamLayer()
+    ckpt = ParamCheckpointer(n_tv_splits=2, n_tt_splits=2)
+    ckpt.restore_all(layer)  # nothing saved yet
+    ckpt.save(1, 0, layer)
+    with torch.no_grad():
+        layer.weight += 1.0
+        layer.scale += 1.0
+    ckpt.save_masked(layer, torch.tensor([[True, False], [False, False]]))
+    with torch.no_grad():
+        layer.weight += 1.0
+        layer.scale += 1.0
+    ckpt.restore_all(layer)
+    # model 0 was saved after the first update, model 2 before it, the others have not been saved
+    assert layer.weight[:, 0].tolist() == [1.0, 2.0, 0.0, 2.0]
+    assert layer.scale[:, 0].tolist() == [1.0, 2.0, 0.0, 2.0]
+
+
+def test_l1_l2_reg_callback():
+    layer = _ParamLayer()
+    with torch.no_grad():
+        layer.weight.copy_(torch.randn(4, 3))
+    layer.weight.grad = torch.ones(4, 3)
+    hp_manager = HyperparamManager(l1_reg=0.1, l2_reg=0.2)
+    callback = L1L2RegCallback(hp_manager, layer)
+    progress = LearnerProgress()
+    progress.max_epochs = 1
+    callback.on_after_backward(None, SimpleNamespace(progress=progress))
+    expected = 1.0 + 0.1 * torch.sign(layer.weight) + 0.4 * layer.weight
+    assert torch.allclose(layer.weight.grad, expected)
+
+    # no groups are created if all regularization values are zero
+    assert len(L1L2RegCallback(HyperparamManager(), layer).groups) == 0
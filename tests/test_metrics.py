@@ -12,3 +12,22 @@ def test_pinball():
     loss = Metrics.apply(y_pred, y, 'pinball(0.95)').item()
     sklearn_loss = sklearn.metrics.mean_pinball_loss(y.numpy(), y_pred.numpy(), alpha=0.95)
     assert np.isclose(loss, sklearn_loss)
+
+
+def test_apply_batched():
+    torch.manual_seed(0)
+    y_pred = torch.randn(4, 50, 3)
+    y_pred[1, 3, 2] = np.nan
+    y = torch.randint(0, 3, (4, 50, 1))
+    for metric_name in ['class_error', 'cross_entropy', 'brier', 'n_cross_entropy', '1-auc_ovr']:
+        batched = Metrics.apply_batched(y_pred, y, metric_name)
+        assert batched.shape == (4,)
+        for i in range(4):
+            assert np.isclose(batched[i].item(), Metrics.apply(y_pred[i], y[i], metric_name).item())
+
+    y_pred = torch.randn(4, 50, 1)
+    y = torch.randn(4, 50, 1) + torch.arange(4)[:, None, None]
+    for metric_name in ['rmse', 'nrmse', 'nmae', 'n_pinball(0.9)']:
+        batched = Metrics.apply_batched(y_pred, y, metric_name)
+        for i in range(4):
+            assert np.isclose(batched[i].item(), Metrics.apply(y_pred[i], y[i], metric_name).item())
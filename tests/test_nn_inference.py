@@ -0,0 +1,52 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from sklearn.datasets import make_classification
+
+from pytabkit.models.sklearn.sklearn_interfaces import RealMLP_TD_Classifier
+
+
+@pytest.mark.parametrize("n_cv", [1, 3])
+def test_inference_engine_matches_trainer_predict(n_cv):
+    X, y = make_classification(n_samples=300, n_features=5, n_informative=3, n_classes=3, random_state=0)
+    X = pd.DataFrame(X, columns=[f'num_{i}' for i in range(X.shape[1])])
+    X['cat'] = pd.Series(np.arange(300) % 4).astype(str).astype('category')
+    clf = RealMLP_TD_Classifier(n_epochs=4, n_cv=n_cv, predict_batch_size=64, random_state=0)
+    clf.fit(X, y)
+
+    alg_interface = clf.alg_interface_
+    x_ds = clf.x_converter_.transform(X)
+
+    y_pred_engine = alg_interface.predict(x_ds)
+    alg_interface.config['use_trainer_predict'] = True
+    y_pred_trainer = alg_interface.predict(x_ds)
+
+    assert y_pred_engine.shape == y_pred_trainer.shape == (n_cv, 300, 3)
+    assert torch.allclose(y_pred_engine, y_pred_trainer, atol=1e-6)
+
+
+def test_torch_compile():
+    X, y = make_classification(n_samples=200, n_features=5, n_informative=3, n_classes=3, random_state=0)
+    X = pd.DataFrame(X, columns=[f'num_{i}' for i in range(X.shape[1])])
+    X['cat'] = pd.Series(np.arange(200) % 4).astype(str).astype('category')
+    clf = RealMLP_TD_Classifier(n_epochs=2, n_cv=2, random_state=0, use_torch_compile=True)
+    clf.fit(X, y)
+
+    module = clf.alg_interface_.model
+    batch = next(iter(module.train_dl))
+    module.model.train()
+    assert torch._dynamo.explain(module.model.forward)(batch).graph_break_count == 0
+
+    x_ds = clf.x_converter_.transform(X)
+    y_pred_compiled = clf.alg_interface_.predict(x_ds)
+    clf.alg_interface_.inference_engine.use_torch_compile = False
+    clf.alg_interface_.inference_engine.model_forward = None
+    y_pred = clf.alg_interface_.predict(x_ds)
+    assert torch.allclose(y_pred_compiled, y_pred, atol=1e-5)
+
+    # compiled functions are not pickled
+    clf_copy = pickle.loads(pickle.dumps(clf))
+    assert np.allclose(clf_copy.predict_proba(X), clf.predict_proba(X), atol=1e-5)
@@ -0,0 +1,40 @@
+import sklearn.datasets
+import torch
+
+from pytabkit.models import utils
+from pytabkit.models.alg_interfaces.base import SplitIdxs, InterfaceResources
+from pytabkit.models.alg_interfaces.nn_interfaces import NNAlgInterface
+from pytabkit.models.data.data import DictDataset, TensorInfo
+from pytabkit.models.sklearn.default_params import DefaultParams
+from pytabkit.models.training.logging import StdoutLogger
+
+
+def test_fused_optimizer_matches_unfused():
+    x, y = sklearn.datasets.make_classification(n_samples=200, n_features=5, random_state=0)
+    ds = DictDataset({'x_cont': torch.as_tensor(x, dtype=torch.float32), 'x_cat': torch.zeros(200, 0, dtype=torch.long),
+                      'y': torch.as_tensor(y)[:, None]},
+                     {'x_cont': TensorInfo(feat_shape=[5]), 'x_cat': TensorInfo(cat_sizes=[]),
+                      'y': TensorInfo(cat_sizes=[2])})
+    perm = torch.randperm(200, generator=torch.Generator().manual_seed(0))
+    idxs = SplitIdxs(train_idxs=perm[None, :150], val_idxs=perm[None, 150:], test_idxs=None, split_seed=0,
+                     sub_split_seeds=[1], split_id=0)
+    # weight decay is nonzero such that the fused weight decay is also checked
+    config = utils.update_dict(DefaultParams.RealMLP_TD_CLASS, dict(n_epochs=3, batch_size=64, wd=0.02))
+
+    alg_interfaces = []
+    for use_fused_opt in [False, True]:
+        alg_interface = NNAlgInterface(**utils.update_dict(config, dict(use_fused_opt=use_fused_opt)))
+        alg_interface.fit(ds, [idxs], InterfaceResources(n_threads=1, gpu_devices=[]),
+                          StdoutLogger(verbosity_level=-1), [None], 'fused' if use_fused_opt else 'unfused')
+        alg_interfaces.append(alg_interface)
+
+    params = list(alg_interfaces[0].model.model.parameters())
+    fused_params = list(alg_interfaces[1].model.model.parameters())
+    fused_opt = alg_interfaces[1].trainer.optimizers[0]
+    # the parameters are merged into fewer groups, and there are groups with different hyperparameter factors
+    assert len(fused_opt.opt.param_groups) < len(fused_params)
+    assert len({str(sorted(group['params'][0].hyper_factors.items())) for group in fused_opt.opt.param_groups}) > 1
+
+    assert len(params) == len(fused_params)
+    for p, fused_p in zip(params, fused_params):
+        assert torch.allclose(p, fused_p, atol=1e-5)
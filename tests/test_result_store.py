@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from pytabkit.bench.data.tasks import TaskDescription
+from pytabkit.bench.run.result_store import ResultStore
+
+
+def test_result_store(tmp_path: Path):
+    store = ResultStore(tmp_path / 'store.sqlite3')
+    task_descs = [TaskDescription('src', 'task_a'), TaskDescription('src', 'task_b')]
+    for alg_idx, alg_name in enumerate(['alg_1', 'alg_2']):
+        for task_desc in task_descs[:alg_idx + 1]:
+            for split_id in range(3):
+                metrics_dict = {'cv': {'test': {'1': {'0': {'class_error': 0.1 * split_id, 'brier': 0.5}}}}}
+                store.add_metrics(alg_name, task_desc, 1, 'random-split', split_id, metrics_dict)
+    # overwrite a single result
+    store.add_metrics('alg_1', task_descs[0], 1, 'random-split', 2,
+                      {'cv': {'test': {'1': {'0': {'class_error': 1.0}}}}})
+
+    assert store.get_complete_alg_names(task_descs, n_cv=1, split_type='random-split') == ['alg_2']
+    assert len(store.load_df(alg_names=['alg_1'], metric_names=['brier'])) == 3
+    assert set(store.load_df(task_descs=[task_descs[1]])['alg_name']) == {'alg_2'}
+
+    table = store.get_split_table('class_error', n_cv=1, split_type='random-split')
+    assert table.shape == (3, 3)
+    assert table.loc[('alg_1', 'src', 'task_a')].tolist() == [0.0, 0.1, 1.0]
+
+    nested = ResultStore.to_nested(store.load_df(n_cv=1), ['alg_2', 'alg_1'], task_descs)
+    assert len(nested[0][1]) == 3
+    assert len(nested[1][1]) == 0
+    assert [split_dict['cv']['test']['1']['0']['class_error'] for split_dict in nested[1][0]] == [0.0, 0.1, 1.0]
+    assert nested[0][1][1]['cv']['test']['1']['0'] == {'class_error': 0.1, 'brier': 0.5}
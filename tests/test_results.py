@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+import torch
+
+from pytabkit.bench.run.results import ResultManager, load_y_preds, save_y_preds
+
+
+@pytest.mark.parametrize('y_pred_format', ['float32', 'float16', 'uint8'])
+def test_save_load_y_preds(tmp_path: Path, y_pred_format: str):
+    y_preds = torch.randn(2, 1000, 3)
+    save_y_preds(tmp_path / 'y_preds.npy', y_preds, y_pred_format=y_pred_format, chunk_size=300)
+    loaded = load_y_preds(tmp_path / 'y_preds.npy')
+    assert loaded.shape == y_preds.shape and loaded.dtype == torch.float32
+    if y_pred_format == 'float32':
+        assert torch.equal(loaded, y_preds)
+    elif y_pred_format == 'float16':
+        assert torch.allclose(loaded, y_preds, atol=1e-2)
+    else:
+        assert torch.allclose(loaded.softmax(dim=-1), y_preds.softmax(dim=-1), atol=1.0 / 255)
+
+
+@pytest.mark.parametrize('y_pred_format', ['float32', 'msgpack'])
+def test_result_manager_y_preds(tmp_path: Path, y_pred_format: str):
+    y_preds = torch.randn(1, 100, 2)
+    rm = ResultManager(y_pred_format=y_pred_format)
+    rm.add_results(is_cv=True, results_dict={'metrics': {'test': {'1': {'0': {'rmse': 1.0}}}},
+                                             'y_preds': y_preds, 'fit_params': {'n_estimators': 3}})
+    rm.save(tmp_path)
+    assert (tmp_path / 'y_preds_cv.npy').exists() == (y_pred_format != 'msgpack')
+
+    loaded = ResultManager.load(tmp_path)
+    assert torch.equal(torch.as_tensor(loaded.other_dict['cv']['y_preds'], dtype=torch.float32), y_preds)
+    assert loaded.other_dict['cv']['fit_params'] == {'n_estimators': 3}
@@ -1,6 +1,13 @@
+import numpy as np
+import pandas as pd
 import pytest
+import sklearn.datasets
 from sklearn.utils.estimator_checks import parametrize_with_checks
 
+from pytabkit.models.alg_interfaces.xgboost_interfaces import XGBSubSplitInterface
+from pytabkit.models.alg_interfaces.gbdt_dataset_cache import gbdt_dataset_cache, GBDTDatasetCache
+from pytabkit.models.data.conversion import ToDictDatasetConverter
+
 from pytabkit.models.sklearn.sklearn_interfaces import RealMLP_TD_Classifier, RealMLP_TD_Regressor, \
     RealMLP_TD_S_Regressor, LGBM_TD_Classifier, LGBM_TD_Regressor, XGB_TD_Classifier, XGB_TD_Regressor, CatBoost_TD_Classifier, \
     CatBoost_TD_Regressor, MLP_RTDL_D_Classifier, MLP_RTDL_D_Regressor, Resnet_RTDL_D_Classifier, TabR_S_D_Classifier, \
@@ -22,3 +29,83 @@ from pytabkit.models.sklearn.sklearn_interfaces import RealMLP_TD_Classifier, Re
 def test_sklearn_compatible_estimator(estimator, check):
     check(estimator)
 
+
+
+# the second fold reuses the converted test set in predict(),
+# XGBoost additionally reuses the validation DMatrix for computing the validation predictions of each fold
+@pytest.mark.parametrize("estimator_class,expected_n_hits", [(LGBM_TD_Classifier, 1), (XGB_TD_Classifier, 3),
+                                                             (CatBoost_TD_Classifier, 1)])
+def test_gbdt_dataset_cache(estimator_class, expected_n_hits):
+    x, y = sklearn.datasets.make_classification(n_samples=500, n_features=5, random_state=0)
+    gbdt_dataset_cache.clear()
+    y_probs = []
+    for use_gbdt_dataset_cache in [False, True]:
+        n_hits = gbdt_dataset_cache.n_hits
+        clf = estimator_class(n_cv=2, n_estimators=20, random_state=0, n_threads=1,
+                              use_gbdt_dataset_cache=use_gbdt_dataset_cache)
+        clf.fit(x, y)
+        # the converted datasets are not kept alive after fit() and predict()
+        assert len(gbdt_dataset_cache.entries) == 0
+        y_probs.append(clf.predict_proba(x))
+        assert len(gbdt_dataset_cache.entries) == 0
+        assert gbdt_dataset_cache.n_hits - n_hits == (expected_n_hits if use_gbdt_dataset_cache else 0)
+    assert np.allclose(y_probs[0], y_probs[1])
+
+
+def test_parallel_folds(monkeypatch):
+    x, y = sklearn.datasets.make_classification(n_samples=500, n_features=5, random_state=0)
+    # record the number of threads that each fold is trained with
+    n_threads_list = []
+    orig_fit = XGBSubSplitInterface._fit
+
+    def recording_fit(self, *args, **kwargs):
+        n_threads_list.append(kwargs['n_threads'])
+        return orig_fit(self, *args, **kwargs)
+
+    monkeypatch.setattr(XGBSubSplitInterface, '_fit', recording_fit)
+
+    y_probs = []
+    for n_parallel_folds in [1, 2]:
+        n_threads_list.clear()
+        clf = XGB_TD_Classifier(n_cv=4, n_estimators=20, random_state=0, n_threads=4,
+                                n_parallel_folds=n_parallel_folds)
+        y_probs.append(clf.fit(x, y).predict_proba(x))
+        # each of the folds that are fitted concurrently gets its share of the threads
+        assert n_threads_list == [4 // n_parallel_folds] * 4
+    assert np.allclose(y_probs[0], y_probs[1])
+
+
+def test_gbdt_dataset_cache_limits():
+    cache = GBDTDatasetCache(max_n_entries=8, max_n_bytes=100)
+    with cache.use('a', lambda: ['a'], n_bytes=60) as value:
+        # an entry in use is not shared with other users
+        with cache.use('a', lambda: ['a'], n_bytes=60) as other_value:
+            assert other_value is not value
+    with cache.use('a', lambda: ['a'], n_bytes=60) as other_value:
+        assert other_value is value
+    assert (cache.n_hits, cache.n_misses) == (1, 1)
+    # the byte limit evicts the least recently used entry, too large entries are not cached
+    with cache.use('b', lambda: ['b'], n_bytes=60):
+        pass
+    with cache.use('c', lambda: ['c'], n_bytes=200):
+        pass
+    assert list(cache.entries.keys()) == ['b']
+
+
+def test_numerical_array_fast_path():
+    x, y = sklearn.datasets.make_regression(n_samples=200, n_features=4, random_state=0)
+    x = x.astype(np.float32)
+
+    # C-contiguous float32 arrays are converted without copying them
+    converter = ToDictDatasetConverter()
+    assert np.shares_memory(x, converter.fit_transform(x).tensors['x_cont'].numpy())
+    assert np.shares_memory(x, converter.transform(x).tensors['x_cont'].numpy())
+
+    reg_np = RealMLP_TD_Regressor(n_epochs=4, random_state=0, n_threads=1).fit(x, y)
+    assert reg_np.x_converter_.uses_numpy_fast_path
+    reg_df = RealMLP_TD_Regressor(n_epochs=4, random_state=0, n_threads=1).fit(pd.DataFrame(x), y)
+    assert not reg_df.x_converter_.uses_numpy_fast_path
+    y_pred = reg_np.predict(x)
+    assert np.allclose(y_pred, reg_df.predict(pd.DataFrame(x)))
+    # a model fitted on an array can still predict on the corresponding DataFrame
+    assert np.allclose(y_pred, reg_np.predict(pd.DataFrame(x)))
@@ -0,0 +1,59 @@
+import sklearn.datasets
+import torch
+
+from pytabkit.models import utils
+from pytabkit.models.alg_interfaces.base import SplitIdxs, InterfaceResources
+from pytabkit.models.alg_interfaces.nn_interfaces import NNAlgInterface, VectorizedRandomParamsNNAlgInterface
+from pytabkit.models.data.data import DictDataset, TensorInfo
+from pytabkit.models.sklearn.default_params import DefaultParams
+from pytabkit.models.sklearn.sklearn_interfaces import RealMLP_HPO_Classifier
+from pytabkit.models.training.logging import StdoutLogger
+
+
+def test_per_split_hyperparams_match_separate_training():
+    x, y = sklearn.datasets.make_classification(n_samples=200, n_features=5, random_state=0)
+    ds = DictDataset({'x_cont': torch.as_tensor(x, dtype=torch.float32), 'x_cat': torch.zeros(200, 0, dtype=torch.long),
+                      'y': torch.as_tensor(y)[:, None]},
+                     {'x_cont': TensorInfo(feat_shape=[5]), 'x_cat': TensorInfo(cat_sizes=[]),
+                      'y': TensorInfo(cat_sizes=[2])})
+    perm = torch.randperm(200, generator=torch.Generator().manual_seed(0))
+    idxs = SplitIdxs(train_idxs=perm[None, :150], val_idxs=perm[None, 150:], test_idxs=None, split_seed=0,
+                     sub_split_seeds=[1], split_id=0)
+    # full-batch training without dropout, such that the vectorized training is not randomized differently
+    config = utils.update_dict(DefaultParams.RealMLP_TD_CLASS, dict(n_epochs=5, batch_size=256, p_drop=0.0))
+    hparams = dict(lr=[0.04, 0.1], wd=[0.0, 0.02], ls_eps=[0.1, 0.0], plr_sigma=[0.1, 0.3])
+    resources = InterfaceResources(n_threads=1, gpu_devices=[])
+    logger = StdoutLogger(verbosity_level=-1)
+
+    # train both configurations in one vectorized model by using the same split twice
+    alg_interface = NNAlgInterface(**utils.update_dict(config, hparams))
+    alg_interface.fit(ds, [idxs, idxs], resources, logger, [None, None], 'vectorized')
+    y_preds = alg_interface.predict(ds)
+    assert y_preds.shape[0] == 2
+
+    for i in range(2):
+        alg_interface = NNAlgInterface(**utils.update_dict(config, {key: value[i] for key, value in hparams.items()}))
+        alg_interface.fit(ds, [idxs], resources, logger, [None], 'single')
+        assert torch.allclose(y_preds[i], alg_interface.predict(ds)[0], atol=1e-4)
+
+
+def test_realmlp_hpo_vectorized_configs(monkeypatch):
+    x, y = sklearn.datasets.make_classification(n_samples=300, n_features=5, random_state=0)
+    config = utils.update_dict(DefaultParams.RealMLP_TD_CLASS, dict(n_epochs=16, batch_size=256))
+    # only the configuration with index 1 is trained (non-negligibly), the others are far worse
+    params_list = [utils.update_dict(config, dict(lr=1e-8)), utils.update_dict(config, dict(lr=0.04)),
+                   utils.update_dict(config, dict(lr=1e-8, act='relu')), utils.update_dict(config, dict(lr=1e-8, wd=0.0))]
+    monkeypatch.setattr(VectorizedRandomParamsNNAlgInterface, '_sample_params', lambda self, ds, seed: params_list)
+
+    clf = RealMLP_HPO_Classifier(n_hyperopt_steps=len(params_list), n_vectorized_configs=2, random_state=0,
+                                 n_threads=1)
+    clf.fit(x, y)
+    alg_interface = clf.alg_interface_
+    assert isinstance(alg_interface, VectorizedRandomParamsNNAlgInterface)
+    # configurations that only differ in per-model hyperparameters are trained together, at most two at once
+    assert alg_interface._get_groups(params_list) == [[0, 1], [3], [2]]
+    assert alg_interface.fit_params[0]['best_alg_idx'] == 1
+    assert alg_interface.best_group_pos == 1
+    assert alg_interface.alg_interface.config['lr'] == [1e-8, 0.04]
+    assert clf.predict_proba(x).shape == (300, 2)
+    assert (clf.predict(x) == y).mean() > 0.8